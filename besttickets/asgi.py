@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "besttickets.settings")
+# async requests run database work in different threads, so connections kept per
+# thread would not be reused, keep them in a pool (DB_POOL_MAX_SIZE) or pgbouncer
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
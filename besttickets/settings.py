@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "tickets.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -77,17 +79,45 @@ WSGI_APPLICATION = "besttickets.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": "postgres",
-        "USER": "postgres",
-        "PASSWORD": "postgres",
-        "HOST": "db",
-        "PORT": 5432,
+        "NAME": os.environ.get("DB_NAME", "postgres"),
+        "USER": os.environ.get("DB_USER", "postgres"),
+        "PASSWORD": os.environ.get("DB_PASSWORD", "postgres"),
+        "HOST": os.environ.get("DB_HOST", "db"),
+        "PORT": int(os.environ.get("DB_PORT", 5432)),
+        # seconds a connection is kept between requests, asgi.py defaults it to 0
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        # reused connection is checked before the first query of a request
+        "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", True),
+        # transaction pooling (pgbouncer) can't keep cursors between transactions
+        "DISABLE_SERVER_SIDE_CURSORS": env_bool(
+            "DB_DISABLE_SERVER_SIDE_CURSORS", False
+        ),
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
+# connection pool of psycopg 3 shared by all threads of the process,
+# it replaces persistent connections
+if os.environ.get("DB_POOL_MAX_SIZE"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ["DB_POOL_MAX_SIZE"]),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # drop connections which have been idle longer than that, in seconds
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -109,8 +139,113 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DATETIME_FORMAT": "%Y-%m-%d %H:%M:%S",
+    "DEFAULT_RENDERER_CLASSES": (
+        "tickets.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    "DEFAULT_PAGINATION_CLASS": "tickets.pagination.CreatedCursorPagination",
+    "PAGE_SIZE": 100,
+}
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "besttickets"),
+    }
+}
+
+# Tickets
+
+# cache of event payloads, seconds availability in cached payloads may be stale,
+# 0 drops them whenever tickets are reserved or released
+TICKETS_CACHE_ALIAS = "default"
+TICKETS_CACHE_TIMEOUT = int(os.environ.get("TICKETS_CACHE_TIMEOUT", 300))
+TICKETS_CACHE_AVAILABILITY_STALENESS = int(
+    os.environ.get("TICKETS_CACHE_AVAILABILITY_STALENESS", 0)
+)
+# a cache of one process isn't dropped by reservations and releases of other
+# processes, availability is kept there only for the staleness above
+TICKETS_CACHE_SHARED = env_bool(
+    "TICKETS_CACHE_SHARED",
+    CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache",
+)
+
+# seconds an order waits for payment before its tickets are released
+TICKETS_ORDER_TTL = int(os.environ.get("TICKETS_ORDER_TTL", 15 * 60))
+
+# store deciding claims in memory, "redis://host:6379/0", "memory://" in tests or
+# empty to reserve in the database, orders are written by flush_reservations in
+# batches and order ids are taken from the database sequence in blocks
+TICKETS_RESERVATION_STORE = os.environ.get("TICKETS_RESERVATION_STORE", "")
+TICKETS_RESERVATION_ID_BLOCK = int(os.environ.get("TICKETS_RESERVATION_ID_BLOCK", 100))
+TICKETS_RESERVATION_FLUSH_BATCH_SIZE = int(
+    os.environ.get("TICKETS_RESERVATION_FLUSH_BATCH_SIZE", 500)
+)
+TICKETS_RESERVATION_FLUSH_INTERVAL = float(
+    os.environ.get("TICKETS_RESERVATION_FLUSH_INTERVAL", 0.5)
+)
+
+# waiting room of checkouts, orders admitted per second per event (0 lets every
+# checkout in, Event.admission_rate overrides it), admissions taken at once after a
+# quiet period, seconds an admission stays valid after its slot, seconds the async
+# order endpoint holds a queued checkout instead of answering 429 and the store,
+# "memory://" for one process or "redis://host:6379/0" shared by all of them
+TICKETS_WAITING_ROOM_RATE = float(os.environ.get("TICKETS_WAITING_ROOM_RATE", 0))
+TICKETS_WAITING_ROOM_BURST = int(os.environ.get("TICKETS_WAITING_ROOM_BURST", 10))
+TICKETS_WAITING_ROOM_ADMISSION_WINDOW = int(
+    os.environ.get("TICKETS_WAITING_ROOM_ADMISSION_WINDOW", 120)
+)
+TICKETS_WAITING_ROOM_PARK = float(os.environ.get("TICKETS_WAITING_ROOM_PARK", 5))
+TICKETS_WAITING_ROOM_STORE = os.environ.get("TICKETS_WAITING_ROOM_STORE", "memory://")
+
+# seconds a response to an order request with Idempotency-Key is replayed
+TICKETS_IDEMPOTENCY_TTL = int(os.environ.get("TICKETS_IDEMPOTENCY_TTL", 24 * 60 * 60))
+
+# carts accepted by one request to the batch order endpoint
+TICKETS_ORDER_BATCH_MAX = int(os.environ.get("TICKETS_ORDER_BATCH_MAX", 500))
+
+# orders confirmed by one request to the payment endpoint
+TICKETS_PAYMENT_BATCH_MAX = int(os.environ.get("TICKETS_PAYMENT_BATCH_MAX", 1000))
+
+# rows accepted by one inventory import and rows inserted by one INSERT of it
+TICKETS_IMPORT_MAX_ROWS = int(os.environ.get("TICKETS_IMPORT_MAX_ROWS", 100000))
+TICKETS_IMPORT_BATCH_SIZE = int(os.environ.get("TICKETS_IMPORT_BATCH_SIZE", 2000))
+
+# expired unpaid orders released in one transaction and seconds between sweeps
+TICKETS_EXPIRY_BATCH_SIZE = int(os.environ.get("TICKETS_EXPIRY_BATCH_SIZE", 500))
+TICKETS_EXPIRY_INTERVAL = float(os.environ.get("TICKETS_EXPIRY_INTERVAL", 30))
+
+# seconds changes of availability are collected before a delta is streamed to
+# clients and seconds between keepalive comments and reads of an idle stream
+TICKETS_STREAM_INTERVAL = float(os.environ.get("TICKETS_STREAM_INTERVAL", 0.5))
+TICKETS_STREAM_KEEPALIVE = float(os.environ.get("TICKETS_STREAM_KEEPALIVE", 15))
+
+# rows read by one query of exports of tickets
+TICKETS_EXPORT_CHUNK_SIZE = int(os.environ.get("TICKETS_EXPORT_CHUNK_SIZE", 2000))
+
+# fraction of requests whose latency, query count and DB time are recorded
+TICKETS_METRICS_SAMPLE_RATE = float(os.environ.get("TICKETS_METRICS_SAMPLE_RATE", 0))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "tickets.metrics": {
+            "handlers": ["console"],
+            "level": os.environ.get("TICKETS_METRICS_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
 }
 
 # Internationalization
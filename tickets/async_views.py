@@ -0,0 +1,143 @@
+"""
+Async variants of order and availability endpoints for the ASGI entry point.
+
+Database work runs in a thread with sync_to_async, so while a request waits on
+PostgreSQL the event loop keeps serving the other open connections. Payloads and
+Idempotency-Key handling are the same as in the DRF views.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import backends, idempotency, reservations, streams, values, waiting_room
+from .models import Event, TicketType
+from .renderers import FastJSONRenderer
+from .serializers import CartSerializer, OrderSerializer
+
+
+def json_response(data, status_code, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status_code,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def validate_cart(data):
+    cart = CartSerializer(data=data, many=True)
+    if not cart.is_valid() or not len(cart.validated_data):
+        return None, cart.errors
+    return cart.validated_data, None
+
+
+def error_payload(exc):
+    # the same payload as the exception handler of DRF
+    if isinstance(exc.detail, (list, dict)):
+        return exc.detail
+    return {"detail": exc.detail}
+
+
+def create_order(cart):
+    order = backends.get_backend().create_order(cart)
+    return OrderSerializer(instance=order).data, status.HTTP_201_CREATED
+
+
+def make_order(cart, key=None, data=None):
+    """
+    Response data, status code and whether it was replayed of an order of the
+    validated cart, the order is made once per Idempotency-Key.
+    """
+    try:
+        if key:
+            return idempotency.run(key, data, lambda: create_order(cart))
+        return (*create_order(cart), False)
+    except APIException as exc:
+        return error_payload(exc), exc.status_code, False
+
+
+def stored_order(key, data):
+    try:
+        return idempotency.stored(key, data)
+    except APIException as exc:
+        return error_payload(exc), exc.status_code, False
+
+
+def order_response(payload, status_code, replayed):
+    response = json_response(payload, status_code)
+    if replayed:
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def order_create(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return json_response(
+            {"detail": "JSON parse error"}, status.HTTP_400_BAD_REQUEST
+        )
+    # a retry gets the stored response without validation or the waiting room
+    key = request.headers.get(idempotency.HEADER)
+    if key:
+        stored = await sync_to_async(stored_order)(key, data)
+        if stored is not None:
+            return order_response(*stored)
+
+    cart, errors = await sync_to_async(validate_cart)(data)
+    if cart is None:
+        return json_response(errors, status.HTTP_400_BAD_REQUEST)
+
+    rates = waiting_room.event_rates(cart)
+    if rates:
+        token = request.headers.get(waiting_room.TOKEN_HEADER)
+        admission = await sync_to_async(waiting_room.admit)(rates, token)
+        if (
+            not admission.admitted
+            and admission.wait <= settings.TICKETS_WAITING_ROOM_PARK
+        ):
+            # a short wait is spent on the event loop, no thread is held by it
+            await asyncio.sleep(admission.wait)
+            admission = await sync_to_async(waiting_room.admit)(rates, admission.token)
+        if not admission.admitted:
+            exc = waiting_room.Queued(admission)
+            return json_response(
+                exc.detail, exc.status_code, {"Retry-After": str(exc.wait)}
+            )
+
+    return order_response(*await sync_to_async(make_order)(cart, key, data))
+
+
+@require_GET
+async def ticket_types_list(request, event_id):
+    if not await Event.objects.filter(pk=event_id).aexists():
+        return json_response({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+
+    rows = values.ticket_type_rows(
+        TicketType.objects.filter(event=event_id).order_by("created_at", "id")
+    )
+    return json_response(
+        values.ticket_types([row async for row in rows]), status.HTTP_200_OK
+    )
+
+
+@require_GET
+async def availability_stream(request, event_id):
+    if not await Event.objects.filter(pk=event_id).aexists():
+        return json_response({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+
+    return StreamingHttpResponse(
+        streams.availability_events(event_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
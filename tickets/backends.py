@@ -0,0 +1,435 @@
+"""
+Reservation backends used by order endpoints.
+
+DatabaseBackend reserves tickets with a PostgreSQL transaction per order. StoreBackend
+decides claims in a Redis-protocol store: available tickets of every ticket type are
+kept there and a claim of all cart lines is one atomic script, which also queues the
+order. Orders and tickets are written to PostgreSQL later, in batches, by
+flush_reservations. The backend is chosen by TICKETS_RESERVATION_STORE, empty for the
+database, "redis://..." for Redis and "memory://" for an in-process store of tests.
+
+Order ids are taken from the PostgreSQL sequence in blocks, so a queued order is
+answered with the id its row gets later and writing a batch twice is harmless.
+"""
+
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from . import cache, inventory, reservations, sales
+from .models import Order, Ticket, TicketType
+
+CLAIM_SCRIPT = """
+local missing = {}
+for i = 2, #KEYS do
+    local stock = redis.call("GET", KEYS[i])
+    if not stock then
+        table.insert(missing, i - 1)
+    elseif tonumber(stock) < tonumber(ARGV[i]) then
+        return {0}
+    end
+end
+if #missing > 0 then
+    return {-1, unpack(missing)}
+end
+for i = 2, #KEYS do
+    redis.call("DECRBY", KEYS[i], ARGV[i])
+end
+redis.call("RPUSH", KEYS[1], ARGV[1])
+return {1}
+"""
+
+RELEASE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call("EXISTS", key) == 1 then
+        redis.call("INCRBY", key, ARGV[i])
+    end
+end
+"""
+
+TAKE_SCRIPT = """
+local records = redis.call("LRANGE", KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #records > 0 then
+    redis.call("RPUSH", KEYS[2], unpack(records))
+    redis.call("LTRIM", KEYS[1], #records, -1)
+end
+return records
+"""
+
+
+class Oversold(Exception):
+    """
+    Queued orders take more tickets than the database has, their batch is not
+    written and stays in flight.
+    """
+
+
+class MemoryStore:
+    """
+    In-process store with the semantics of RedisStore, for tests and development
+    with a single process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stock = {}
+        self.pending = []
+        self.flushing = []
+
+    def claim(self, quantities, record):
+        """
+        Take quantities of all ticket types and queue the record, or nothing.
+        Returns True, False when some ticket type has not enough tickets or
+        a list of ticket type ids without stock in the store.
+        """
+        with self.lock:
+            missing = [pk for pk in quantities if pk not in self.stock]
+            if missing:
+                return missing
+            if any(self.stock[pk] < quantity for pk, quantity in quantities.items()):
+                return False
+            for pk, quantity in quantities.items():
+                self.stock[pk] -= quantity
+            self.pending.append(record)
+            return True
+
+    def release(self, quantities):
+        with self.lock:
+            for pk, quantity in quantities.items():
+                if pk in self.stock:
+                    self.stock[pk] += quantity
+
+    def init_stock(self, stock):
+        """
+        Set stock of ticket types which have none in the store.
+        """
+        with self.lock:
+            for pk, available in stock.items():
+                self.stock.setdefault(pk, available)
+
+    def forget_stock(self, ticket_type_ids):
+        with self.lock:
+            for pk in ticket_type_ids:
+                self.stock.pop(pk, None)
+
+    def get_stock(self, ticket_type_id):
+        return self.stock.get(ticket_type_id)
+
+    def take(self, count):
+        """
+        Move up to count oldest queued records to the in-flight list and return them.
+        """
+        with self.lock:
+            records = self.pending[:count]
+            del self.pending[:count]
+            self.flushing.extend(records)
+            return records
+
+    def in_flight(self):
+        return list(self.flushing)
+
+    def queued(self):
+        with self.lock:
+            return self.pending + self.flushing
+
+    def ack(self):
+        """
+        Drop in-flight records once they are written to the database.
+        """
+        with self.lock:
+            self.flushing = []
+
+
+class RedisStore:
+    """
+    Store in Redis or a server speaking its protocol, claims and queueing run as
+    one Lua script.
+    """
+
+    def __init__(self, url, prefix="tickets:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("Redis reservation store requires redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.pending_key = f"{prefix}pending"
+        self.flushing_key = f"{prefix}flushing"
+        self.claim_script = self.client.register_script(CLAIM_SCRIPT)
+        self.release_script = self.client.register_script(RELEASE_SCRIPT)
+        self.take_script = self.client.register_script(TAKE_SCRIPT)
+
+    def stock_key(self, ticket_type_id):
+        return f"{self.prefix}stock:{ticket_type_id}"
+
+    def claim(self, quantities, record):
+        pks = list(quantities)
+        result, *missing = self.claim_script(
+            keys=[self.pending_key] + [self.stock_key(pk) for pk in pks],
+            args=[record] + [quantities[pk] for pk in pks],
+        )
+        if result == -1:
+            return [pks[index - 1] for index in missing]
+        return result == 1
+
+    def release(self, quantities):
+        pks = list(quantities)
+        self.release_script(
+            keys=[self.stock_key(pk) for pk in pks],
+            args=[quantities[pk] for pk in pks],
+        )
+
+    def init_stock(self, stock):
+        pipeline = self.client.pipeline()
+        for pk, available in stock.items():
+            pipeline.set(self.stock_key(pk), available, nx=True)
+        pipeline.execute()
+
+    def forget_stock(self, ticket_type_ids):
+        if ticket_type_ids:
+            self.client.delete(*(self.stock_key(pk) for pk in ticket_type_ids))
+
+    def get_stock(self, ticket_type_id):
+        stock = self.client.get(self.stock_key(ticket_type_id))
+        return None if stock is None else int(stock)
+
+    def take(self, count):
+        records = self.take_script(
+            keys=[self.pending_key, self.flushing_key], args=[count]
+        )
+        return [record.decode() for record in records]
+
+    def in_flight(self):
+        return [
+            record.decode() for record in self.client.lrange(self.flushing_key, 0, -1)
+        ]
+
+    def queued(self):
+        pipeline = self.client.pipeline()
+        pipeline.lrange(self.pending_key, 0, -1)
+        pipeline.lrange(self.flushing_key, 0, -1)
+        pending, flushing = pipeline.execute()
+        return [record.decode() for record in pending + flushing]
+
+    def ack(self):
+        self.client.delete(self.flushing_key)
+
+
+class DatabaseBackend:
+    def create_order(self, cart):
+        with transaction.atomic():
+            return reservations.create_order(cart)
+
+    def create_orders(self, carts):
+        with transaction.atomic():
+            return reservations.create_orders(carts)
+
+    def released(self, quantities):
+        pass
+
+    def forget_stock(self, ticket_type_ids):
+        pass
+
+
+class StoreBackend:
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.order_ids = []
+
+    def next_order_id(self):
+        with self.lock:
+            if not self.order_ids:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                        "FROM generate_series(1, %s)",
+                        [Order._meta.db_table, settings.TICKETS_RESERVATION_ID_BLOCK],
+                    )
+                    self.order_ids = [row[0] for row in cursor.fetchall()]
+            return self.order_ids.pop(0)
+
+    def create_order(self, cart):
+        """
+        Claim tickets of validated cart in the store and queue the order, returns
+        an unsaved order with its id. Raises SoldOut like the database backend.
+        """
+        quantities = reservations.cart_quantities(cart)
+        created_at = now()
+        order = Order(
+            id=self.next_order_id(),
+            total=sum(item["ticket_type"].price * item["quantity"] for item in cart),
+            created_at=created_at,
+            expired_at=created_at + timedelta(seconds=settings.TICKETS_ORDER_TTL),
+        )
+        record = json.dumps(
+            {
+                "id": order.id,
+                "total": str(order.total),
+                "created_at": order.created_at.isoformat(),
+                "expired_at": order.expired_at.isoformat(),
+                "lines": [[pk, quantity] for pk, quantity in quantities.items()],
+                "events": sorted({item["ticket_type"].event_id for item in cart}),
+            }
+        )
+
+        claimed = self.store.claim(quantities, record)
+        if isinstance(claimed, list):
+            self.load_stock(claimed)
+            claimed = self.store.claim(quantities, record)
+        if claimed is not True:
+            raise reservations.SoldOut()
+        return order
+
+    def create_orders(self, carts):
+        """
+        Claim validated carts one by one in the store, returns a list with an order
+        for every cart or None where a cart had not enough tickets.
+        """
+        orders = []
+        for cart in carts:
+            try:
+                orders.append(self.create_order(cart))
+            except reservations.SoldOut:
+                orders.append(None)
+        return orders
+
+    def load_stock(self, ticket_type_ids=None):
+        """
+        Put available tickets of ticket types, all by default, into the store where
+        it has none, less tickets of orders which are queued and not written yet.
+        """
+        # queued orders are read first, an order written by the flusher between the
+        # two reads is then counted twice rather than missed
+        queued = self.store.queued()
+        ticket_types = TicketType.objects.prefetch_related("stripes")
+        if ticket_type_ids is not None:
+            ticket_types = ticket_types.filter(pk__in=ticket_type_ids)
+        stock = {
+            ticket_type.pk: ticket_type.tickets_available
+            for ticket_type in ticket_types
+        }
+        for record in queued:
+            for pk, quantity in json.loads(record)["lines"]:
+                if pk in stock:
+                    stock[pk] -= quantity
+        self.store.init_stock(stock)
+
+    def released(self, quantities):
+        self.store.release(quantities)
+
+    def forget_stock(self, ticket_type_ids):
+        self.store.forget_stock(ticket_type_ids)
+
+    def flush(self, batch_size):
+        """
+        Write one batch of queued orders to the database, returns their number.
+        """
+        records = self.store.take(batch_size)
+        if records:
+            self.write(records)
+            self.store.ack()
+        return len(records)
+
+    def reconcile(self):
+        """
+        Write orders left in flight by a stopped flusher and all queued orders, then
+        load stock of ticket types missing in the store, e.g. after its restart.
+        """
+        in_flight = self.store.in_flight()
+        if in_flight:
+            self.write(in_flight)
+            self.store.ack()
+        while self.flush(settings.TICKETS_RESERVATION_FLUSH_BATCH_SIZE):
+            pass
+        self.load_stock()
+        return len(in_flight)
+
+    def write(self, records):
+        orders = [json.loads(record) for record in records]
+        for order in orders:
+            order["created_at"] = parse_datetime(order["created_at"])
+            order["expired_at"] = parse_datetime(order["expired_at"])
+        with transaction.atomic():
+            # a batch written before a crash of the flusher is skipped
+            existing = set(
+                Order.objects.filter(pk__in=[order["id"] for order in orders])
+                .select_for_update()
+                .values_list("pk", flat=True)
+            )
+            orders = [order for order in orders if order["id"] not in existing]
+            if not orders:
+                return
+
+            quantities = {}
+            for order in orders:
+                for pk, quantity in order["lines"]:
+                    quantities[pk] = quantities.get(pk, 0) + quantity
+            available, striped = inventory.lock_available(quantities)
+            if any(
+                available.get(pk, 0) < quantity for pk, quantity in quantities.items()
+            ) or not inventory.claim_locked(quantities, striped):
+                raise Oversold(
+                    f"Not enough tickets for orders {[order['id'] for order in orders]}"
+                )
+
+            Order.objects.bulk_create(
+                Order(
+                    id=order["id"],
+                    total=Decimal(order["total"]),
+                    expired_at=order["expired_at"],
+                )
+                for order in orders
+            )
+            # bulk_create sets auto_now_add fields, claim time is put back
+            Order.objects.filter(pk__in=[order["id"] for order in orders]).update(
+                created_at=Case(
+                    *(
+                        When(pk=order["id"], then=Value(order["created_at"]))
+                        for order in orders
+                    ),
+                    output_field=DateTimeField(),
+                )
+            )
+            Ticket.objects.bulk_create(
+                Ticket(type_id=pk, order_id=order["id"])
+                for order in orders
+                for pk, quantity in order["lines"]
+                for _ in range(quantity)
+            )
+            sales.record(
+                (pk, striped.get(pk, 0), order["created_at"], {"reserved": quantity})
+                for order in orders
+                for pk, quantity in order["lines"]
+            )
+            cache.availability_changed(
+                event_id for order in orders for event_id in order["events"]
+            )
+
+
+_backends = {}
+
+
+def get_backend():
+    """
+    Reservation backend of TICKETS_RESERVATION_STORE, one per process.
+    """
+    url = settings.TICKETS_RESERVATION_STORE
+    if url not in _backends:
+        if not url:
+            _backends[url] = DatabaseBackend()
+        elif url.startswith("memory://"):
+            _backends[url] = StoreBackend(MemoryStore())
+        elif url.startswith(("redis://", "rediss://", "unix://")):
+            _backends[url] = StoreBackend(RedisStore(url))
+        else:
+            raise ImproperlyConfigured(f"Unknown reservation store {url}")
+    return _backends[url]
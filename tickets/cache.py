@@ -0,0 +1,152 @@
+"""
+Read-through cache of event list and detail payloads.
+
+Payloads are kept per event (or list page) and per nested flag in the configured
+cache, changes of events and ticket types invalidate them at once. Nested payloads
+also contain availability, they are invalidated after tickets are reserved or
+released, unless TICKETS_CACHE_AVAILABILITY_STALENESS allows them to be that many
+seconds old. Payloads with availability in a cache which isn't shared by all
+processes (TICKETS_CACHE_SHARED) are kept only that long, changes made by other
+processes, e.g. the expiry worker, don't drop them.
+
+A payload built while its event changes isn't kept: the version of the event is
+read before and after the build, and invalidation changes it, so a reader which
+read the database before a commit doesn't store what it read after the commit
+dropped the cache.
+"""
+
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .pubsub import pubsub
+
+
+def _cache():
+    return caches[settings.TICKETS_CACHE_ALIAS]
+
+
+def _list_version_key(nested):
+    return f"tickets:events:list:{int(nested)}:version"
+
+
+def _list_key(nested, url):
+    # url has only query parameters the list uses, so other ones don't make new
+    # entries
+    # pages of the list are many, they are dropped all at once by a new version
+    version_key = _list_version_key(nested)
+    version = _cache().get(version_key)
+    if version is None:
+        _cache().add(version_key, uuid4().hex, None)
+        version = _cache().get(version_key)
+    url_hash = hashlib.md5(url.encode()).hexdigest()
+    return f"tickets:events:list:{int(nested)}:{version}:{url_hash}"
+
+
+def _detail_key(event_id, nested):
+    return f"tickets:events:{event_id}:{int(nested)}"
+
+
+def _event_version_key(event_id):
+    return f"tickets:events:{event_id}:version"
+
+
+def _timeout(nested):
+    staleness = settings.TICKETS_CACHE_AVAILABILITY_STALENESS
+    if nested and (staleness or not settings.TICKETS_CACHE_SHARED):
+        return staleness
+    return settings.TICKETS_CACHE_TIMEOUT
+
+
+def _get_or_build(key, nested, build, version_key=None):
+    cache = _cache()
+    data = cache.get(key)
+    if data is None:
+        version = cache.get(version_key) if version_key else None
+        data = build()
+        timeout = _timeout(nested)
+        if not timeout:
+            return data
+        if version_key is None:
+            cache.set(key, data, timeout)
+        elif cache.get(version_key) == version:
+            cache.set(key, data, timeout)
+            # invalidated between the check and the set
+            if cache.get(version_key) != version:
+                cache.delete(key)
+    return data
+
+
+def event_list(nested, url, build):
+    """
+    Return cached payload of event list page with the url, build() makes it when
+    it's not cached. The url must not have query parameters the list ignores.
+    """
+    return _get_or_build(_list_key(nested, url), nested, build)
+
+
+def event_detail(event_id, nested, build):
+    """
+    Return cached payload of single event, build() makes it when it's not cached.
+    """
+    return _get_or_build(
+        _detail_key(event_id, nested), nested, build, _event_version_key(event_id)
+    )
+
+
+def _availability_key(event_id):
+    return f"tickets:events:{event_id}:availability"
+
+
+def event_availability(event_id, build):
+    """
+    Return cached availability payload of single event, build() makes it when
+    it's not cached. It's dropped together with nested payloads of the event and
+    kept as long as them.
+    """
+    return _get_or_build(
+        _availability_key(event_id), True, build, _event_version_key(event_id)
+    )
+
+
+def _invalidate(nested_flags, event_ids):
+    cache = _cache()
+    # pages of lists are stored under their version, a payload built before the
+    # change goes to a key nobody reads
+    versions = {_list_version_key(nested): uuid4().hex for nested in nested_flags}
+    versions.update({_event_version_key(pk): uuid4().hex for pk in event_ids})
+    cache.set_many(versions, None)
+    keys = [_detail_key(pk, nested) for pk in event_ids for nested in nested_flags]
+    if True in nested_flags:
+        keys += [_availability_key(pk) for pk in event_ids]
+    cache.delete_many(keys)
+
+
+def invalidate_event(event_id):
+    """
+    Drop all cached payloads with the event once the current transaction commits.
+    """
+    transaction.on_commit(lambda: _invalidate((False, True), [event_id]))
+
+
+def invalidate_events(event_ids):
+    """
+    Drop all cached payloads with the events and list pages once the current
+    transaction commits.
+    """
+    event_ids = set(event_ids)
+    transaction.on_commit(lambda: _invalidate((False, True), event_ids))
+
+
+def availability_changed(event_ids):
+    """
+    Drop cached payloads with availability of the events and publish the change
+    to its subscribers once the current transaction commits.
+    """
+    event_ids = set(event_ids)
+    if not settings.TICKETS_CACHE_AVAILABILITY_STALENESS:
+        transaction.on_commit(lambda: _invalidate((True,), event_ids))
+    transaction.on_commit(lambda: pubsub.publish(event_ids))
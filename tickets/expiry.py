@@ -0,0 +1,33 @@
+"""
+Release of tickets reserved by orders which were not paid before expired_at.
+
+Expired orders are taken in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+several workers can run at the same time without waiting for each other.
+"""
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import inventory
+from .models import Order, Ticket
+
+
+def release_expired(batch_size, until=None):
+    """
+    Release tickets of one batch of expired unpaid orders and mark the orders
+    as expired. Returns numbers of released orders and tickets.
+    """
+    until = until or now()
+    with transaction.atomic():
+        order_ids = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(paid=Order.UNPAID, expired_at__lte=until)
+            .order_by("expired_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not order_ids:
+            return 0, 0
+
+        tickets = inventory.release_tickets(Ticket.objects.filter(order__in=order_ids))
+        Order.objects.filter(pk__in=order_ids).update(paid=Order.EXPIRED)
+    return len(order_ids), tickets
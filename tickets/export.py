@@ -0,0 +1,125 @@
+"""
+Streaming export of tickets of an event with their orders for reconciliation.
+
+Rows are read in chunks of TICKETS_EXPORT_CHUNK_SIZE and written one by one as CSV
+or NDJSON, so memory use doesn't depend on the number of exported rows. A chunk is
+a query which starts after the last (order_id, id) of the one before, it needs no
+server-side cursor, which pgbouncer in transaction mode doesn't keep
+(DB_DISABLE_SERVER_SIDE_CURSORS), and no OFFSET, which reads all skipped rows.
+"""
+
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from .models import Ticket
+
+FORMATS = ("csv", "ndjson")
+
+COLUMNS = (
+    ("order_id", "order_id"),
+    ("order_created_at", "order__created_at"),
+    ("order_expired_at", "order__expired_at"),
+    ("order_total", "order__total"),
+    ("order_paid", "order__paid"),
+    ("order_paid_date", "order__paid_date"),
+    ("ticket_id", "pk"),
+    ("ticket_status", "status"),
+    ("ticket_type_id", "type_id"),
+    ("ticket_type_category", "type__category"),
+    ("ticket_type_price", "type__price"),
+    ("event_id", "type__event_id"),
+)
+HEADER = [name for name, _ in COLUMNS]
+TICKET_ID = HEADER.index("ticket_id")
+
+
+def parse_time(value):
+    """
+    Aware datetime of ISO date or datetime, dates mean their start, None for other
+    values.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    return make_aware(moment) if is_naive(moment) else moment
+
+
+def rows(event_id, since=None, until=None):
+    """
+    Tuples of COLUMNS of tickets of the event, whose orders were made between since
+    and until, in order of orders, read lazily.
+    """
+    tickets = Ticket.objects.filter(type__event=event_id)
+    if since is not None:
+        tickets = tickets.filter(order__created_at__gte=since)
+    if until is not None:
+        tickets = tickets.filter(order__created_at__lt=until)
+    tickets = tickets.order_by("order_id", "pk").values_list(
+        *(field for _, field in COLUMNS)
+    )
+    chunk_size = settings.TICKETS_EXPORT_CHUNK_SIZE
+    chunk = list(tickets[:chunk_size])
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            break
+        order_id, pk = chunk[-1][0], chunk[-1][TICKET_ID]
+        after = Q(order_id__gt=order_id) | Q(order_id=order_id, pk__gt=pk)
+        chunk = list(tickets.filter(after)[:chunk_size])
+
+
+def _value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class _Line:
+    """
+    File-like object of csv.writer which returns the written line.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow([_value(value) for value in row])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(
+            {
+                name: (
+                    value if value is None or isinstance(value, int) else _value(value)
+                )
+                for name, value in zip(HEADER, row)
+            }
+        ) + "\n"
+
+
+def lines(format, event_id, since=None, until=None):
+    """
+    Lines of the export in the format, read lazily.
+    """
+    if format == "csv":
+        return csv_lines(rows(event_id, since, until))
+    return ndjson_lines(rows(event_id, since, until))
@@ -0,0 +1,105 @@
+"""
+Idempotency-Key support of order creation.
+
+The first request with a key inserts its row and creates the order in the same
+transaction, the response is stored in the row before commit. A retry with the key
+gets the stored response without validating or reserving anything. A duplicate
+arriving while the first one runs waits on the primary key of the row until the
+first commits and replays its response, or takes over the key if the first failed,
+failed requests reserve nothing and are not stored. Rows expire after
+TICKETS_IDEMPOTENCY_TTL seconds and are deleted by release_expired_orders.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key was already used for another request"
+    default_code = "idempotency_key_reused"
+
+
+def fingerprint(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+def _replay(record, digest):
+    if record.fingerprint != digest:
+        raise KeyReused()
+    return json.loads(record.response), record.status_code, True
+
+
+def _check_key(key):
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        raise ValidationError(
+            {HEADER: ["Ensure this value has at most 255 characters."]}
+        )
+
+
+def stored(key, data):
+    """
+    Stored response of an earlier request with key and data as in run(), None
+    when there is none.
+    """
+    _check_key(key)
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is not None and record.expired_at > now():
+        return _replay(record, fingerprint(data))
+    return None
+
+
+def run(key, data, handle):
+    """
+    Return response of handle() for the request with key and data as response
+    data, status code and whether it was replayed. handle() returns response data
+    and status code, its exceptions are raised and nothing is stored.
+    """
+    _check_key(key)
+    digest = fingerprint(data)
+
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is not None and record.expired_at > now():
+        return _replay(record, digest)
+
+    with transaction.atomic():
+        if record is not None:
+            IdempotencyKey.objects.filter(key=key, expired_at__lte=now()).delete()
+        try:
+            # a concurrent request with the key waits here until this one ends
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key,
+                    fingerprint=digest,
+                    expired_at=now()
+                    + timedelta(seconds=settings.TICKETS_IDEMPOTENCY_TTL),
+                )
+        except IntegrityError:
+            return _replay(IdempotencyKey.objects.get(key=key), digest)
+        data, record.status_code = handle()
+        record.response = json.dumps(data, cls=JSONEncoder)
+        record.save(update_fields=["response", "status_code"])
+        return data, record.status_code, False
+
+
+def evict_expired(batch_size, until=None):
+    """
+    Delete one batch of expired keys, returns their number.
+    """
+    keys = IdempotencyKey.objects.filter(expired_at__lte=until or now()).values("key")
+    deleted, _ = IdempotencyKey.objects.filter(key__in=keys[:batch_size]).delete()
+    return deleted
@@ -0,0 +1,221 @@
+"""
+Bulk import of events and their ticket types.
+
+Every row is a ticket type with its event, either an existing one by "event" id or
+a new one by "event_name" and "event_date", rows with the same new event share it.
+All rows are checked in one pass without serializers, existing events are loaded
+with one query, and only when every row is valid events and ticket types are
+inserted with bulk_create in batches of TICKETS_IMPORT_BATCH_SIZE, in one
+transaction.
+"""
+
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from . import cache
+from .models import Event, TicketType
+
+COLUMNS = ("event", "event_name", "event_date", "category", "price", "qty")
+
+NAME_MIN_LENGTH = 5
+NAME_MAX_LENGTH = Event._meta.get_field("name").max_length
+CATEGORY_MAX_LENGTH = TicketType._meta.get_field("category").max_length
+PRICE_MAX = Decimal(10) ** (
+    TicketType._meta.get_field("price").max_digits
+    - TicketType._meta.get_field("price").decimal_places
+)
+CENT = Decimal("0.01")
+QTY_MAX = connection.ops.integer_field_range(
+    TicketType._meta.get_field("qty").get_internal_type()
+)[1]
+
+
+def read_csv(content):
+    """
+    Rows of CSV text with a header of COLUMNS.
+    """
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _integer(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = value.strip()
+    number = int(value)
+    if isinstance(value, float) and number != value:
+        raise ValueError
+    return number
+
+
+def _price(value):
+    if isinstance(value, bool):
+        raise ValueError
+    price = Decimal(str(value).strip())
+    if not price.is_finite():
+        raise ValueError
+    return price
+
+
+def _check(row, errors):
+    """
+    Validated fields of a row, errors of invalid fields are added to errors.
+    """
+    fields = {}
+
+    if not _blank(row.get("event")):
+        try:
+            fields["event"] = _integer(row["event"])
+        except (TypeError, ValueError):
+            errors["event"] = ["A valid integer is required."]
+        if not _blank(row.get("event_name")) or not _blank(row.get("event_date")):
+            errors["event"] = ["Give either event or event_name and event_date."]
+    else:
+        name = row.get("event_name")
+        if _blank(name):
+            errors["event_name"] = ["This field is required."]
+        elif not isinstance(name, str):
+            errors["event_name"] = ["Not a valid string."]
+        elif not NAME_MIN_LENGTH <= len(name.strip()) <= NAME_MAX_LENGTH:
+            errors["event_name"] = [
+                f"Ensure this field has {NAME_MIN_LENGTH} to {NAME_MAX_LENGTH} "
+                "characters."
+            ]
+        else:
+            fields["event_name"] = name.strip()
+
+        date = row.get("event_date")
+        if _blank(date):
+            errors["event_date"] = ["This field is required."]
+        else:
+            try:
+                date = parse_datetime(str(date).strip())
+            except ValueError:
+                date = None
+            if date is None:
+                errors["event_date"] = ["Expected ISO datetime."]
+            else:
+                fields["event_date"] = make_aware(date) if is_naive(date) else date
+
+    category = row.get("category")
+    if _blank(category):
+        errors["category"] = ["This field is required."]
+    elif not isinstance(category, str):
+        errors["category"] = ["Not a valid string."]
+    elif len(category.strip()) > CATEGORY_MAX_LENGTH:
+        errors["category"] = [
+            f"Ensure this field has no more than {CATEGORY_MAX_LENGTH} characters."
+        ]
+    else:
+        fields["category"] = category.strip()
+
+    if _blank(row.get("price")):
+        errors["price"] = ["This field is required."]
+    else:
+        try:
+            price = _price(row["price"])
+        except (InvalidOperation, ValueError):
+            errors["price"] = ["A valid number is required."]
+        else:
+            if price < 0 or price >= PRICE_MAX:
+                errors["price"] = [f"Ensure this value is between 0 and {PRICE_MAX}."]
+            elif price != price.quantize(CENT):
+                errors["price"] = [
+                    "Ensure that there are no more than 2 decimal places."
+                ]
+            else:
+                fields["price"] = price
+
+    if _blank(row.get("qty")):
+        errors["qty"] = ["This field is required."]
+    else:
+        try:
+            fields["qty"] = _integer(row["qty"])
+        except (TypeError, ValueError, OverflowError):
+            errors["qty"] = ["A valid integer is required."]
+        else:
+            if not 0 <= fields["qty"] <= QTY_MAX:
+                errors["qty"] = [f"Ensure this value is between 0 and {QTY_MAX}."]
+
+    return fields
+
+
+def load(rows):
+    """
+    Insert events and ticket types of rows, returns counts of created events and
+    ticket types and errors of invalid rows, nothing is inserted when any row is
+    invalid. Rows are numbered from 1 in errors.
+    """
+    errors = []
+    checked = []
+    for number, row in enumerate(rows, 1):
+        row_errors = {}
+        if not isinstance(row, dict):
+            row_errors["non_field_errors"] = ["Expected an object."]
+        else:
+            fields = _check(row, row_errors)
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+        else:
+            checked.append((number, fields))
+
+    with transaction.atomic():
+        existing = set(
+            Event.objects.filter(
+                pk__in={fields["event"] for _, fields in checked if "event" in fields}
+            ).values_list("pk", flat=True)
+        )
+        for number, fields in checked:
+            if "event" in fields and fields["event"] not in existing:
+                errors.append(
+                    {
+                        "row": number,
+                        "errors": {
+                            "event": [f"Event {fields['event']} does not exist."]
+                        },
+                    }
+                )
+        if errors:
+            errors.sort(key=lambda error: error["row"])
+            return {"events": 0, "ticket_types": 0}, errors
+
+        events = {}
+        for _, fields in checked:
+            if "event" not in fields:
+                key = (fields["event_name"], fields["event_date"])
+                if key not in events:
+                    events[key] = Event(name=key[0], date_event=key[1])
+        Event.objects.bulk_create(
+            events.values(), batch_size=settings.TICKETS_IMPORT_BATCH_SIZE
+        )
+
+        ticket_types = [
+            TicketType(
+                event_id=(
+                    fields["event"]
+                    if "event" in fields
+                    else events[fields["event_name"], fields["event_date"]].pk
+                ),
+                category=fields["category"],
+                price=fields["price"],
+                qty=fields["qty"],
+            )
+            for _, fields in checked
+        ]
+        TicketType.objects.bulk_create(
+            ticket_types, batch_size=settings.TICKETS_IMPORT_BATCH_SIZE
+        )
+        # bulk_create doesn't send post_save, which invalidates cached events
+        cache.invalidate_events(existing)
+
+    return {"events": len(events), "ticket_types": len(ticket_types)}, []
@@ -0,0 +1,335 @@
+"""
+Inventory counters for ticket types.
+
+TicketType.sold keeps the number of taken (reserved or paid) tickets, so checking
+availability reads one row instead of counting Ticket rows. Every change of the
+counter goes through this module, rebuild() recomputes it from Ticket rows.
+
+Hot ticket types can be striped: their capacity is split into InventoryStripe rows,
+an order claims from a random stripe not locked by other orders and falls back to
+all of them when free ones are short, so concurrent orders lock different rows.
+Rows are locked in one order everywhere, ticket types by primary key first, then
+stripes by ticket type and index.
+"""
+
+import random
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from . import cache, sales
+from .models import InventoryStripe, Ticket, TicketType
+
+
+def claim(ticket_type_id, quantity=1, stripe_count=0):
+    """
+    Take quantity tickets of the ticket type, returns False if there are not enough left.
+    """
+    if not stripe_count:
+        updated = TicketType.objects.filter(
+            pk=ticket_type_id, stripe_count=0, sold__lte=F("qty") - quantity
+        ).update(sold=F("sold") + quantity)
+        if updated:
+            return True
+        stripe_count = _stripe_count(ticket_type_id)
+        if not stripe_count:
+            return False
+    return _claim_striped(ticket_type_id, quantity, stripe_count)
+
+
+def _stripe_count(ticket_type_id):
+    return (
+        TicketType.objects.filter(pk=ticket_type_id)
+        .values_list("stripe_count", flat=True)
+        .first()
+    )
+
+
+class _ShortStripe(Exception):
+    pass
+
+
+def _change_stripe(ticket_type_id, stripe_count, condition, change):
+    # a stripe no other order holds is taken without waiting
+    pk = (
+        InventoryStripe.objects.filter(condition, ticket_type_id=ticket_type_id)
+        .select_for_update(skip_locked=True)
+        .order_by("?")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if pk is not None:
+        InventoryStripe.objects.filter(pk=pk).update(sold=F("sold") + change)
+        return True
+
+    # all are held, wait for a random one, a short stripe stays locked after the
+    # UPDATE, so it is released by rolling back to the savepoint
+    try:
+        with transaction.atomic():
+            updated = InventoryStripe.objects.filter(
+                condition,
+                ticket_type_id=ticket_type_id,
+                index=random.randrange(stripe_count),
+            ).update(sold=F("sold") + change)
+            if not updated:
+                raise _ShortStripe()
+        return True
+    except _ShortStripe:
+        return False
+
+
+def _claim_striped(ticket_type_id, quantity, stripe_count):
+    if _change_stripe(
+        ticket_type_id, stripe_count, Q(sold__lte=F("qty") - quantity), quantity
+    ):
+        return True
+
+    # stripes are short, wait for all of them and take from several
+    with transaction.atomic():
+        stripes = list(_lock_stripes([ticket_type_id]))
+        if sum(stripe.qty - stripe.sold for stripe in stripes) < quantity:
+            return False
+        left = quantity
+        changed = []
+        for stripe in stripes:
+            taken = min(left, stripe.qty - stripe.sold)
+            if taken > 0:
+                stripe.sold += taken
+                left -= taken
+                changed.append(stripe)
+        InventoryStripe.objects.bulk_update(changed, ["sold"])
+        return True
+
+
+def _lock_stripes(ticket_type_ids):
+    return (
+        InventoryStripe.objects.filter(ticket_type__in=ticket_type_ids)
+        .select_for_update()
+        .order_by("ticket_type", "index")
+    )
+
+
+def available():
+    """
+    Expression of available tickets of a ticket type read from its counter or its
+    stripes, for annotations of TicketType querysets.
+    """
+    stripes = (
+        InventoryStripe.objects.filter(ticket_type=OuterRef("pk"))
+        .order_by()
+        .values("ticket_type")
+        .annotate(available=Sum(F("qty") - F("sold")))
+        .values("available")
+    )
+    return Case(
+        When(stripe_count__gt=0, then=Coalesce(Subquery(stripes), Value(0))),
+        default=F("qty") - F("sold"),
+        output_field=IntegerField(),
+    )
+
+
+def event_available(event_id):
+    """
+    Available tickets of ticket types of the event by ticket type id, read from the
+    counters with one query.
+    """
+    return dict(
+        TicketType.objects.filter(event=event_id)
+        .annotate(available=available())
+        .order_by("pk")
+        .values_list("pk", "available")
+    )
+
+
+def lock_available(ticket_type_ids):
+    """
+    Lock counters of ticket types and return available tickets by ticket type id and
+    stripe counts of striped ticket types. Must be called inside a transaction.
+    """
+    available = {}
+    striped = {}
+    for pk, qty, sold, stripe_count in (
+        TicketType.objects.filter(pk__in=ticket_type_ids)
+        .select_for_update()
+        .order_by("pk")
+        .values_list("pk", "qty", "sold", "stripe_count")
+    ):
+        if stripe_count:
+            available[pk] = 0
+            striped[pk] = stripe_count
+        else:
+            available[pk] = qty - sold
+    if striped:
+        for stripe in _lock_stripes(striped):
+            available[stripe.ticket_type_id] += stripe.qty - stripe.sold
+    return available, striped
+
+
+def claim_locked(quantities, striped):
+    """
+    Take tickets of ticket types locked with lock_available, quantities are by
+    ticket type id. Counters which are not striped are updated in one UPDATE.
+    Returns False when stripes don't have the tickets, the transaction must then
+    be rolled back.
+    """
+    plain = {pk: quantity for pk, quantity in quantities.items() if pk not in striped}
+    if plain:
+        TicketType.objects.filter(pk__in=plain).update(
+            sold=F("sold")
+            + Case(
+                *(When(pk=pk, then=Value(quantity)) for pk, quantity in plain.items()),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+    for pk in sorted(set(quantities) & set(striped)):
+        if not _claim_striped(pk, quantities[pk], striped[pk]):
+            return False
+    return True
+
+
+def release(ticket_type_id, quantity=1, stripe_count=0):
+    """
+    Give quantity tickets back to the ticket type.
+    """
+    if not stripe_count:
+        updated = TicketType.objects.filter(pk=ticket_type_id, stripe_count=0).update(
+            sold=F("sold") - quantity
+        )
+        if updated:
+            return
+        stripe_count = _stripe_count(ticket_type_id)
+        if not stripe_count:
+            return
+
+    if _change_stripe(ticket_type_id, stripe_count, Q(sold__gte=quantity), -quantity):
+        return
+    with transaction.atomic():
+        left = quantity
+        changed = []
+        for stripe in _lock_stripes([ticket_type_id]):
+            given = min(left, stripe.sold)
+            if given > 0:
+                stripe.sold -= given
+                left -= given
+                changed.append(stripe)
+        InventoryStripe.objects.bulk_update(changed, ["sold"])
+
+
+def release_tickets(tickets):
+    """
+    Mark tickets from queryset as released and give them back to their ticket types.
+    Returns the number of released tickets.
+    """
+    from .backends import get_backend
+
+    with transaction.atomic():
+        taken = list(
+            tickets.exclude(status=Ticket.RELEASED)
+            .select_for_update(of=("self",))
+            .values_list(
+                "pk",
+                "type_id",
+                "type__event_id",
+                "type__stripe_count",
+                "order__expired_at",
+            )
+        )
+        if not taken:
+            return 0
+
+        Ticket.objects.filter(pk__in=[pk for pk, _, _, _, _ in taken]).update(
+            status=Ticket.RELEASED
+        )
+        released = {}
+        stripe_counts = {}
+        for _, type_id, _, stripe_count, _ in taken:
+            released[type_id] = released.get(type_id, 0) + 1
+            stripe_counts[type_id] = stripe_count
+        # same order as reservations, so releases do not deadlock with them
+        for type_id in sorted(released, key=lambda pk: (stripe_counts[pk] > 0, pk)):
+            release(type_id, released[type_id], stripe_counts[type_id])
+        sales.record(
+            (type_id, stripe_count, expired_at, {"released": 1})
+            for _, type_id, _, stripe_count, expired_at in taken
+        )
+        cache.availability_changed(event_id for _, _, event_id, _, _ in taken)
+        # stock of a reservation store gets the tickets back as well
+        transaction.on_commit(lambda: get_backend().released(released))
+        return len(taken)
+
+
+def _split(total, parts):
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def stripe(ticket_type_id, stripe_count):
+    """
+    Split counter of the ticket type into stripe_count stripes, 0 merges stripes
+    back into the ticket type. Run it again after changing qty of a striped type.
+    """
+    with transaction.atomic():
+        ticket_type = TicketType.objects.select_for_update().get(pk=ticket_type_id)
+        sold = ticket_type.sold
+        if ticket_type.stripe_count:
+            stripes = list(_lock_stripes([ticket_type_id]))
+            sold = sum(stripe.sold for stripe in stripes)
+            InventoryStripe.objects.filter(ticket_type=ticket_type).delete()
+
+        if stripe_count:
+            InventoryStripe.objects.bulk_create(
+                InventoryStripe(ticket_type=ticket_type, index=i, qty=qty, sold=taken)
+                for i, (qty, taken) in enumerate(
+                    zip(
+                        _split(ticket_type.qty, stripe_count),
+                        _split(sold, stripe_count),
+                    )
+                )
+            )
+            sold = 0
+        TicketType.objects.filter(pk=ticket_type_id).update(
+            sold=sold, stripe_count=stripe_count
+        )
+
+
+def rebuild():
+    """
+    Recompute counters of all ticket types from Ticket rows.
+    """
+    taken = (
+        Ticket.objects.filter(type=OuterRef("pk"))
+        .exclude(status=Ticket.RELEASED)
+        .order_by()
+        .values("type")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    updated = TicketType.objects.filter(stripe_count=0).update(
+        sold=Coalesce(Subquery(taken, output_field=IntegerField()), Value(0))
+    )
+
+    with transaction.atomic():
+        for ticket_type in (
+            TicketType.objects.filter(stripe_count__gt=0)
+            .select_for_update()
+            .order_by("pk")
+            .annotate(taken=Coalesce(Subquery(taken), Value(0)))
+        ):
+            stripes = list(_lock_stripes([ticket_type.pk]))
+            for stripe, sold in zip(stripes, _split(ticket_type.taken, len(stripes))):
+                stripe.sold = sold
+            InventoryStripe.objects.bulk_update(stripes, ["sold"])
+            updated += 1
+    return updated
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Set orders admitted per second to checkout of an event by the waiting "
+        "room, 0 lets every checkout in, no rate uses TICKETS_WAITING_ROOM_RATE"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event", type=int)
+        parser.add_argument("rate", type=int, nargs="?")
+
+    def handle(self, *args, **options):
+        if options["rate"] is not None and options["rate"] < 0:
+            raise CommandError("Admission rate can't be negative")
+        if not Event.objects.filter(pk=options["event"]).update(
+            admission_rate=options["rate"]
+        ):
+            raise CommandError(f"Event {options['event']} does not exist")
+        rate = options["rate"]
+        self.stdout.write(
+            f"Event {options['event']} admits "
+            + ("the default rate" if rate is None else f"{rate} orders per second")
+        )
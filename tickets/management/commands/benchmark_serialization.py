@@ -0,0 +1,104 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+from tickets import values
+from tickets.models import Event, Order, TicketType
+from tickets.renderers import FastJSONRenderer
+from tickets.serializers import EventSerializer, OrderSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare serializers and JSONRenderer with payloads of .values() rows and "
+        "FastJSONRenderer on events with ticket types and on orders"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1000)
+        parser.add_argument("--ticket-types", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        # benchmark data is created in a transaction which is rolled back
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        created_at = now()
+        events = Event.objects.bulk_create(
+            Event(name=f"Benchmark event {i}", date_event=created_at)
+            for i in range(options["events"])
+        )
+        TicketType.objects.bulk_create(
+            TicketType(event=event, category=f"Category {i}", price=99.99, qty=100)
+            for event in events
+            for i in range(options["ticket_types"])
+        )
+        orders = Order.objects.bulk_create(
+            Order(expired_at=created_at, total=199.98) for _ in range(options["orders"])
+        )
+        event_ids = [event.pk for event in events]
+        order_ids = [order.pk for order in orders]
+
+        cases = {
+            "events with ticket types": (
+                lambda: JSONRenderer().render(
+                    EventSerializer(
+                        Event.objects.filter(pk__in=event_ids).prefetch_related(
+                            "ticket_types"
+                        ),
+                        many=True,
+                        nested=True,
+                    ).data
+                ),
+                lambda: FastJSONRenderer().render(
+                    values.events(
+                        values.event_rows(Event.objects.filter(pk__in=event_ids)),
+                        True,
+                    )
+                ),
+            ),
+            "orders": (
+                lambda: JSONRenderer().render(
+                    OrderSerializer(
+                        Order.objects.filter(pk__in=order_ids), many=True
+                    ).data
+                ),
+                lambda: FastJSONRenderer().render(
+                    values.orders(
+                        values.order_rows(Order.objects.filter(pk__in=order_ids))
+                    )
+                ),
+            ),
+        }
+        for name, (serializers, fast) in cases.items():
+            if serializers() != fast():
+                raise CommandError(f"{name}: payloads differ")
+            before = best_time(serializers, options["repeat"])
+            after = best_time(fast, options["repeat"])
+            self.stdout.write(
+                f"{name}: serializers {before * 1000:.1f}ms, "
+                f".values() {after * 1000:.1f}ms ({before / after:.1f}x)"
+            )
@@ -0,0 +1,95 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from tickets import inventory, reservations
+from tickets.models import Event, Order, Ticket, TicketType
+
+
+def make_orders(ticket_type, count, hold):
+    cart = [{"ticket_type": ticket_type, "quantity": 1}]
+    sold_out = 0
+    try:
+        for _ in range(count):
+            try:
+                with transaction.atomic():
+                    reservations.create_order(cart)
+                    time.sleep(hold)
+            except reservations.SoldOut:
+                sold_out += 1
+    finally:
+        connections.close_all()
+    return sold_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput of concurrent orders of a single hot ticket type "
+        "for different numbers of stripes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stripes", type=int, nargs="+", default=[0, 2, 4, 8, 16])
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument(
+            "--orders", type=int, default=2000, help="Orders for each stripe count"
+        )
+        parser.add_argument(
+            "--hold-ms",
+            type=float,
+            default=5,
+            help="Time an order keeps its locks before commit, like round trips "
+            "to a remote database",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.create(name="Stripes benchmark", date_event=now())
+        try:
+            for stripe_count in options["stripes"]:
+                # exactly as many tickets as orders, so every stripe is emptied
+                ticket_type = TicketType.objects.create(
+                    event=event, category="BENCH", price=1, qty=options["orders"]
+                )
+                if stripe_count:
+                    inventory.stripe(ticket_type.pk, stripe_count)
+                ticket_type.refresh_from_db()
+
+                elapsed, sold_out = self.run_orders(
+                    ticket_type,
+                    options["workers"],
+                    options["orders"],
+                    options["hold_ms"] / 1000,
+                )
+
+                ticket_type.refresh_from_db()
+                if sold_out or ticket_type.tickets_available:
+                    raise CommandError(
+                        f"{stripe_count} stripes: {sold_out} orders failed, "
+                        f"{ticket_type.tickets_available} tickets left"
+                    )
+                self.stdout.write(
+                    f"{stripe_count} stripes: {options['orders']} orders in "
+                    f"{elapsed:.2f}s ({options['orders'] / elapsed:.0f} orders/s)"
+                )
+        finally:
+            orders = Order.objects.filter(ticket__type__event=event).distinct()
+            order_ids = list(orders.values_list("pk", flat=True))
+            Ticket.objects.filter(type__event=event).delete()
+            Order.objects.filter(pk__in=order_ids).delete()
+            TicketType.objects.filter(event=event).delete()
+            event.delete()
+
+    def run_orders(self, ticket_type, workers, orders, hold):
+        # processes, so the clients are not serialized by the GIL
+        connections.close_all()
+        chunks = [orders // workers + (i < orders % workers) for i in range(workers)]
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            start = time.perf_counter()
+            sold_out = sum(
+                pool.starmap(make_orders, [(ticket_type, n, hold) for n in chunks])
+            )
+            elapsed = time.perf_counter() - start
+        return elapsed, sold_out
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import export
+from tickets.models import Event
+
+
+class Command(BaseCommand):
+    help = "Export tickets of an event with their orders as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event", type=int)
+        parser.add_argument("--format", choices=export.FORMATS, default="csv")
+        parser.add_argument(
+            "--since", help="Orders made from this ISO date or datetime"
+        )
+        parser.add_argument(
+            "--until", help="Orders made before this ISO date or datetime"
+        )
+        parser.add_argument(
+            "--output", help="File to write, standard output by default"
+        )
+
+    def handle(self, *args, **options):
+        if not Event.objects.filter(pk=options["event"]).exists():
+            raise CommandError(f"Event {options['event']} does not exist")
+        bounds = {}
+        for name in ("since", "until"):
+            if options[name] is not None:
+                bounds[name] = export.parse_time(options[name])
+                if bounds[name] is None:
+                    raise CommandError(f"--{name} is not an ISO date or datetime")
+
+        lines = export.lines(options["format"], options["event"], **bounds)
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import backends
+
+
+class Command(BaseCommand):
+    help = (
+        "Write orders queued in the reservation store to the database, "
+        "only one flusher may run at a time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TICKETS_RESERVATION_FLUSH_BATCH_SIZE,
+            help="Number of orders written in one transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.TICKETS_RESERVATION_FLUSH_INTERVAL,
+            help="Seconds between flushes of an empty queue, 0 flushes once and exits",
+        )
+
+    def handle(self, *args, **options):
+        backend = backends.get_backend()
+        if not isinstance(backend, backends.StoreBackend):
+            raise CommandError("TICKETS_RESERVATION_STORE is not set")
+
+        # orders of a flusher stopped in the middle of a batch go first
+        recovered = backend.reconcile()
+        self.stdout.write(f"Reconciled, {recovered} orders were in flight")
+        while True:
+            written = backend.flush(options["batch_size"])
+            if written:
+                self.stdout.write(f"Wrote {written} orders")
+            if not options["interval"]:
+                break
+            if written < options["batch_size"]:
+                time.sleep(options["interval"])
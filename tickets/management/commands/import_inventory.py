@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import imports
+
+
+class Command(BaseCommand):
+    help = "Import events and ticket types from a CSV or JSON file of rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV with a header or JSON list of rows")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        with open(path, newline="") as file:
+            content = file.read()
+        if path.endswith(".json"):
+            try:
+                rows = json.loads(content)
+            except ValueError as error:
+                raise CommandError(f"Invalid JSON: {error}")
+            if not isinstance(rows, list):
+                raise CommandError("Expected a JSON list of rows")
+        else:
+            rows = imports.read_csv(content)
+
+        created, errors = imports.load(rows)
+        for error in errors:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        if errors:
+            raise CommandError(f"{len(errors)} invalid rows, nothing was imported")
+        self.stdout.write(
+            f"Imported {created['events']} events and "
+            f"{created['ticket_types']} ticket types"
+        )
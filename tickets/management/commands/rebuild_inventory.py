@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets import inventory
+
+
+class Command(BaseCommand):
+    help = "Rebuild sold counters of ticket types from Ticket rows"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = inventory.rebuild()
+        self.stdout.write(f"Rebuilt counters of {updated} ticket types")
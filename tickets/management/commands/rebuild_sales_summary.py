@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets import sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild sales summary of ticket types by day from Ticket rows"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = sales.rebuild()
+        self.stdout.write(f"Rebuilt sales summary, {rows} ticket type days")
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import expiry, idempotency
+
+
+class Command(BaseCommand):
+    help = (
+        "Release tickets of expired unpaid orders and delete expired idempotency keys"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TICKETS_EXPIRY_BATCH_SIZE,
+            help="Number of orders released in one transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.TICKETS_EXPIRY_INTERVAL,
+            help="Seconds between sweeps, 0 makes one sweep and exits",
+        )
+
+    def handle(self, *args, **options):
+        # a sweep stops at the first batch which isn't full
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        while True:
+            self.sweep(options["batch_size"])
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sweep(self, batch_size):
+        started = time.monotonic()
+        orders = tickets = batches = 0
+        while True:
+            released_orders, released_tickets = expiry.release_expired(batch_size)
+            if released_orders:
+                batches += 1
+                orders += released_orders
+                tickets += released_tickets
+            # not full batch means there is nothing more to release now
+            if released_orders < batch_size:
+                break
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Released {orders} orders and {tickets} tickets in {batches} batches, "
+            f"{elapsed:.3f}s ({orders / elapsed:.1f} orders/s, "
+            f"{tickets / elapsed:.1f} tickets/s)"
+        )
+
+        keys = 0
+        while True:
+            evicted = idempotency.evict_expired(batch_size)
+            keys += evicted
+            if evicted < batch_size:
+                break
+        if keys:
+            self.stdout.write(f"Deleted {keys} expired idempotency keys")
@@ -0,0 +1,218 @@
+import csv
+import json
+import re
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from tickets.models import Order
+
+LOCUSTFILE = Path(__file__).resolve().parents[2] / "unittests" / "locustfile.py"
+
+SCENARIOS = {
+    "browse": ["BrowseUser"],
+    "spike": ["OnSaleSpikeUser"],
+    "large-carts": ["LargeCartUser"],
+    "churn": ["ExpiryChurnUser"],
+    "mixed": ["BrowseUser", "OnSaleSpikeUser", "LargeCartUser", "ExpiryChurnUser"],
+}
+
+LATENCIES = ("p50", "p95", "p99")
+THROUGHPUTS = ("rps", "orders_per_sec")
+SEED_OPTIONS = ("events", "ticket_types", "qty", "hot_qty")
+
+
+def parse_run_time(run_time):
+    """
+    Seconds of locust run time like "90s", "2m" or "1h30m".
+    """
+    units = {"h": 3600, "m": 60, "s": 1}
+    parts = re.findall(r"(\d+)([hms])", run_time)
+    if not parts or "".join(a + b for a, b in parts) != run_time:
+        raise ValueError(f"Invalid run time {run_time}")
+    return sum(int(value) * units[unit] for value, unit in parts)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _summary(row):
+    return {
+        "requests": int(row["Request Count"]),
+        "failures": int(row["Failure Count"]),
+        "rps": _number(row["Requests/s"]),
+        "p50": _number(row["50%"]),
+        "p95": _number(row["95%"]),
+        "p99": _number(row["99%"]),
+    }
+
+
+def read_stats(path):
+    """
+    Latency percentiles (ms) and throughput from locust _stats.csv file, for all
+    requests and for each endpoint.
+    """
+    with open(path, newline="") as stats_file:
+        rows = {row["Name"]: row for row in csv.DictReader(stats_file)}
+    stats = _summary(rows.pop("Aggregated"))
+    stats["endpoints"] = {name: _summary(row) for name, row in rows.items()}
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """
+    List of regressions of results against baseline, latencies may be higher and
+    throughputs lower by tolerance (fraction) at most.
+    """
+    regressions = []
+
+    def check(name, current, base):
+        for key in LATENCIES:
+            if base.get(key) and current.get(key) is not None:
+                if current[key] > base[key] * (1 + tolerance):
+                    regressions.append(
+                        f"{name} {key} {current[key]:.0f} ms, baseline {base[key]:.0f} ms"
+                    )
+        for key in THROUGHPUTS:
+            if base.get(key) and current.get(key) is not None:
+                if current[key] < base[key] * (1 - tolerance):
+                    regressions.append(
+                        f"{name} {key} {current[key]:.1f}, baseline {base[key]:.1f}"
+                    )
+
+    for scenario, stats in results.items():
+        if scenario not in baseline:
+            continue
+        check(scenario, stats, baseline[scenario])
+        for endpoint, endpoint_stats in stats["endpoints"].items():
+            base = baseline[scenario].get("endpoints", {}).get(endpoint)
+            if base:
+                check(f"{scenario} {endpoint}", endpoint_stats, base)
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Run benchmark scenarios headless with locust against a running server and "
+        "write latency percentiles and throughput to a JSON file, the database is "
+        "flushed and seeded again before each scenario"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="http://localhost:8000/api/")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=list(SCENARIOS),
+            help="Scenario to run, may be repeated, all by default",
+        )
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--spawn-rate", type=int, default=50)
+        parser.add_argument("--run-time", default="1m")
+        parser.add_argument("--events", type=int, default=100)
+        parser.add_argument("--ticket-types", type=int, default=3)
+        parser.add_argument("--qty", type=int, default=10000)
+        parser.add_argument("--hot-qty", type=int, default=20000)
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--baseline", help="JSON file of a previous run")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Fraction by which results may be worse than the baseline",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write results to the --baseline file",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            duration = parse_run_time(options["run_time"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requires --baseline")
+
+        results = {}
+        with tempfile.TemporaryDirectory() as stats_dir:
+            for scenario in options["scenario"] or list(SCENARIOS):
+                results[scenario] = self.run_scenario(scenario, stats_dir, options)
+                results[scenario]["orders_per_sec"] = (
+                    results[scenario]["orders"] / duration
+                )
+                self.stdout.write(self.format(scenario, results[scenario]))
+
+        report = {
+            "created_at": now().isoformat(),
+            "config": {
+                key: options[key]
+                for key in ("host", "users", "spawn_rate", "run_time") + SEED_OPTIONS
+            },
+            "scenarios": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2))
+
+        if options["save_baseline"]:
+            Path(options["baseline"]).write_text(json.dumps(report, indent=2))
+        elif options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+            regressions = compare(results, baseline["scenarios"], options["tolerance"])
+            for regression in regressions:
+                self.stderr.write(f"Regression: {regression}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against baseline")
+
+    def run_scenario(self, scenario, stats_dir, options):
+        # every scenario starts with the same stock, not what the one before left
+        call_command(
+            "seed_benchmark",
+            flush=True,
+            stdout=StringIO(),
+            **{key: options[key] for key in SEED_OPTIONS},
+        )
+        orders_before = Order.objects.count()
+        # unpaid orders of churn scenarios have to be released while it runs
+        reaper = None
+        if "ExpiryChurnUser" in SCENARIOS[scenario]:
+            reaper = subprocess.Popen(
+                [sys.executable, "-m", "django", "release_expired_orders"]
+                + ["--interval", "1"],
+                stdout=subprocess.DEVNULL,
+            )
+        try:
+            subprocess.run(
+                ["locust", "-f", str(LOCUSTFILE), "--headless", "--only-summary"]
+                + ["-u", str(options["users"]), "-r", str(options["spawn_rate"])]
+                + ["-t", options["run_time"], "--host", options["host"]]
+                + ["--csv", f"{stats_dir}/{scenario}"]
+                + SCENARIOS[scenario],
+                stdout=subprocess.DEVNULL,
+                check=False,
+            )
+        finally:
+            if reaper:
+                reaper.terminate()
+                reaper.wait()
+
+        stats = read_stats(f"{stats_dir}/{scenario}_stats.csv")
+        stats["orders"] = Order.objects.count() - orders_before
+        return stats
+
+    def format(self, scenario, stats):
+        return (
+            f"{scenario}: {stats['requests']} requests, {stats['failures']} failures, "
+            f"p50 {stats['p50']} ms, p95 {stats['p95']} ms, p99 {stats['p99']} ms, "
+            f"{stats['rps']:.1f} req/s, {stats['orders_per_sec']:.1f} orders/s"
+        )
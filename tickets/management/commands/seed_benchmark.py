@@ -0,0 +1,73 @@
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from tickets.models import Event, Order, Ticket, TicketType
+
+CATEGORIES = ("VIP", "GC", "NORMAL", "BALCONY", "STANDING", "PREMIUM")
+HOT_CATEGORY = "HOT"
+
+
+class Command(BaseCommand):
+    help = "Fill database with events and ticket types for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=100)
+        parser.add_argument(
+            "--ticket-types",
+            type=int,
+            default=3,
+            help="Number of ticket types of each event",
+        )
+        parser.add_argument("--qty", type=int, default=10000)
+        parser.add_argument(
+            "--hot-qty",
+            type=int,
+            default=20000,
+            help="Tickets of the single hot ticket type hit by the on-sale spike",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete all events, ticket types, orders and tickets first",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options["flush"]:
+            Ticket.objects.all().delete()
+            Order.objects.all().delete()
+            TicketType.objects.all().delete()
+            Event.objects.all().delete()
+
+        date_event = now() + datetime.timedelta(days=60)
+        events = Event.objects.bulk_create(
+            Event(name=f"Benchmark event {i}", date_event=date_event)
+            for i in range(options["events"])
+        )
+        ticket_types = [
+            TicketType(
+                event=event,
+                category=CATEGORIES[i % len(CATEGORIES)],
+                price=Decimal("50.00") * (i + 1),
+                qty=options["qty"],
+            )
+            for event in events
+            for i in range(options["ticket_types"])
+        ]
+        ticket_types.append(
+            TicketType(
+                event=events[0],
+                category=HOT_CATEGORY,
+                price=Decimal("199.99"),
+                qty=options["hot_qty"],
+            )
+        )
+        TicketType.objects.bulk_create(ticket_types, batch_size=5000)
+
+        self.stdout.write(
+            f"Created {len(events)} events and {len(ticket_types)} ticket types"
+        )
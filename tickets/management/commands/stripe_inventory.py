@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import inventory
+from tickets.models import TicketType
+
+
+class Command(BaseCommand):
+    help = (
+        "Split counter of a hot ticket type into stripes claimed by concurrent "
+        "orders, 0 stripes merges them back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ticket_type", type=int)
+        parser.add_argument("stripes", type=int)
+
+    def handle(self, *args, **options):
+        if options["stripes"] < 0:
+            raise CommandError("Number of stripes can't be negative")
+        try:
+            inventory.stripe(options["ticket_type"], options["stripes"])
+        except TicketType.DoesNotExist:
+            raise CommandError(f"Ticket type {options['ticket_type']} does not exist")
+        self.stdout.write(
+            f"Ticket type {options['ticket_type']} has {options['stripes']} stripes"
+        )
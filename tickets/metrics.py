@@ -0,0 +1,118 @@
+"""
+In-process request metrics exposed in the Prometheus text format.
+
+Metrics are kept per process, every worker of the server has its own and
+a scraper sees the worker which served the /api/metrics request.
+"""
+
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observations with their count and sum.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """
+    Latency, SQL query count and DB time of requests by view and method.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+            self.durations = {}
+            self.queries = {}
+            self.db_time = {}
+
+    def observe(self, view, method, status_code, duration, queries, db_time):
+        labels = (view, method)
+        with self.lock:
+            key = labels + (status_code,)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if labels not in self.durations:
+                self.durations[labels] = Histogram(DURATION_BUCKETS)
+                self.queries[labels] = Histogram(QUERY_BUCKETS)
+                self.db_time[labels] = 0
+            self.durations[labels].observe(duration)
+            self.queries[labels].observe(queries)
+            self.db_time[labels] += db_time
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines += [
+                "# HELP tickets_requests_total Sampled requests.",
+                "# TYPE tickets_requests_total counter",
+            ]
+            for (view, method, status_code), value in sorted(self.requests.items()):
+                labels = _labels(view=view, method=method, status=status_code)
+                lines.append(f"tickets_requests_total{{{labels}}} {value}")
+            lines += _histogram(
+                "tickets_request_duration_seconds",
+                "Latency of sampled requests.",
+                self.durations,
+            )
+            lines += _histogram(
+                "tickets_request_queries",
+                "SQL queries of sampled requests.",
+                self.queries,
+            )
+            lines += [
+                "# HELP tickets_request_db_seconds_total Time spent in SQL queries.",
+                "# TYPE tickets_request_db_seconds_total counter",
+            ]
+            for (view, method), value in sorted(self.db_time.items()):
+                labels = _labels(view=view, method=method)
+                lines.append(f"tickets_request_db_seconds_total{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for name, value in labels.items()
+    )
+
+
+def _histogram(name, help_text, histograms):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (view, method), histogram in sorted(histograms.items()):
+        labels = _labels(view=view, method=method)
+        for bound, total in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+registry = RequestMetrics()
@@ -0,0 +1,135 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import registry
+
+logger = logging.getLogger("tickets.metrics")
+
+
+# timer of the sampled request, visible to threads of sync_to_async as well
+current_timer = ContextVar("tickets_metrics_timer", default=None)
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and the time spent in them.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.queries += 1
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of every connection, timing queries of sampled requests.
+    Connections are per thread, so async views query on other connections than
+    the middleware sees, the timer is found in the context instead.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL query count and DB time of a sample of requests.
+
+    Sampled responses get Server-Timing and X-DB-Queries headers, a log record
+    on the tickets.metrics logger and are counted in histograms rendered by
+    /api/metrics. TICKETS_METRICS_SAMPLE_RATE of 0 turns it off.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.TICKETS_METRICS_SAMPLE_RATE
+        # under ASGI the chain stays async, so async views don't hold a thread
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, timer, time.perf_counter() - start)
+
+    def record(self, request, response, timer, duration):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            duration,
+            timer.queries,
+            timer.duration,
+        )
+        response["Server-Timing"] = (
+            f"total;dur={duration * 1000:.2f}, db;dur={timer.duration * 1000:.2f}"
+        )
+        response["X-DB-Queries"] = str(timer.queries)
+        logger.info(
+            "view=%s method=%s status=%s duration_ms=%.2f queries=%d db_ms=%.2f",
+            view,
+            request.method,
+            response.status_code,
+            duration * 1000,
+            timer.queries,
+            timer.duration * 1000,
+            extra={
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": duration * 1000,
+                "queries": timer.queries,
+                "db_ms": timer.duration * 1000,
+            },
+        )
+        return response
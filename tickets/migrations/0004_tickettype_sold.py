@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_sold_tickets(apps, schema_editor):
+    TicketType = apps.get_model("tickets", "TicketType")
+    for ticket_type in TicketType.objects.annotate(taken=Count("ticket")):
+        TicketType.objects.filter(pk=ticket_type.pk).update(sold=ticket_type.taken)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0003_order_ticket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tickettype",
+            name="sold",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="ticket",
+            name="order",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="tickets",
+                related_query_name="ticket",
+                to="tickets.order",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ticket",
+            name="type",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="tickets",
+                related_query_name="ticket",
+                to="tickets.tickettype",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tickettype",
+            name="event",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="ticket_types",
+                related_query_name="ticket_types",
+                to="tickets.event",
+            ),
+        ),
+        migrations.RunPython(count_sold_tickets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0004_tickettype_sold"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticket",
+            name="type",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="tickets",
+                related_query_name="ticket",
+                to="tickets.tickettype",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tickettype",
+            name="event",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="ticket_types",
+                related_query_name="ticket_types",
+                to="tickets.event",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("paid", "N")),
+                fields=["expired_at"],
+                name="order_unpaid_expired_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["paid", "paid_date"], name="order_paid_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["type", "status"], name="ticket_type_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tickettype",
+            index=models.Index(
+                fields=["event", "created_at"], name="tickettype_event_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0006_created_at_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tickettype",
+            name="stripe_count",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="InventoryStripe",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveSmallIntegerField()),
+                ("qty", models.IntegerField()),
+                ("sold", models.IntegerField(default=0)),
+                (
+                    "ticket_type",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stripes",
+                        to="tickets.tickettype",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ticket_type", "index"),
+                        name="inventorystripe_unique_index",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0009_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesSummary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("slot", models.PositiveSmallIntegerField(default=0)),
+                ("reserved", models.IntegerField(default=0)),
+                ("sold", models.IntegerField(default=0)),
+                ("released", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "ticket_type",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales",
+                        to="tickets.tickettype",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date"], name="salessummary_date_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ticket_type", "date", "slot"),
+                        name="salessummary_unique_slot",
+                    )
+                ],
+            },
+        ),
+    ]
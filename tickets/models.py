@@ -1,7 +1,8 @@
 from datetime import timedelta
 
+from django.conf import settings
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 
 
@@ -9,6 +10,14 @@ class Event(models.Model):
     name = models.CharField(max_length=300, validators=[MinLengthValidator(5)])
     date_event = models.DateTimeField(blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # orders admitted per second by tickets.waiting_room, empty uses
+    # TICKETS_WAITING_ROOM_RATE and 0 lets every checkout in
+    admission_rate = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="event_created_idx"),
+        ]
 
 
 class TicketType(models.Model):
@@ -17,40 +26,161 @@ class TicketType(models.Model):
         related_name="ticket_types",
         related_query_name="ticket_types",
         on_delete=models.PROTECT,
+        # covered by tickettype_event_created_idx
+        db_index=False,
     )
     category = models.CharField(max_length=50)
     price = models.DecimalField(blank=False, max_digits=8, decimal_places=2)
     qty = models.IntegerField(blank=False)
+    # number of taken (reserved or paid) tickets, maintained by tickets.inventory
+    sold = models.IntegerField(default=0)
+    # counters split into InventoryStripe rows for hot ticket types, 0 keeps
+    # them in qty and sold, which stays 0 while the type is striped
+    stripe_count = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["event", "created_at"], name="tickettype_event_created_idx"
+            ),
+            models.Index(fields=["created_at", "id"], name="tickettype_created_idx"),
+        ]
+
     @property
     def tickets_available(self):
-        return self.qty - self.tickets.count()
+        if not self.stripe_count:
+            return self.qty - self.sold
+        # annotated by inventory.available(), so lists don't query stripes of
+        # every ticket type
+        if hasattr(self, "available"):
+            return self.available
+        return sum(stripe.qty - stripe.sold for stripe in self.stripes.all())
+
+
+class InventoryStripe(models.Model):
+    """
+    Part of capacity of a striped ticket type with its own counter, so orders
+    claiming from different stripes don't wait for each other's row lock.
+    """
+
+    ticket_type = models.ForeignKey(
+        TicketType,
+        related_name="stripes",
+        on_delete=models.CASCADE,
+        # covered by inventorystripe_unique_index
+        db_index=False,
+    )
+    index = models.PositiveSmallIntegerField()
+    qty = models.IntegerField()
+    sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ticket_type", "index"], name="inventorystripe_unique_index"
+            ),
+        ]
+
+
+class SalesSummary(models.Model):
+    """
+    Tickets of a ticket type reserved, paid and released on a day and revenue of
+    the paid ones, maintained by tickets.sales. Striped ticket types spread their
+    changes over as many slots as they have stripes.
+    """
+
+    ticket_type = models.ForeignKey(
+        TicketType,
+        related_name="sales",
+        on_delete=models.CASCADE,
+        # covered by salessummary_unique_slot
+        db_index=False,
+    )
+    date = models.DateField()
+    slot = models.PositiveSmallIntegerField(default=0)
+    reserved = models.IntegerField(default=0)
+    sold = models.IntegerField(default=0)
+    released = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ticket_type", "date", "slot"],
+                name="salessummary_unique_slot",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"], name="salessummary_date_idx"),
+        ]
 
 
 class Order(models.Model):
+    UNPAID = "N"
+    PAID = "Y"
+    EXPIRED = "E"
+
     created_at = models.DateTimeField(auto_now_add=True)
     expired_at = models.DateTimeField()
     total = models.DecimalField(blank=False, default=0, max_digits=8, decimal_places=2)
-    paid = models.CharField(max_length=1, default="N")
+    paid = models.CharField(max_length=1, default=UNPAID)
     paid_date = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # expiry sweep looks only for unpaid orders
+            models.Index(
+                fields=["expired_at"],
+                name="order_unpaid_expired_idx",
+                condition=models.Q(paid="N"),
+            ),
+            models.Index(fields=["paid", "paid_date"], name="order_paid_date_idx"),
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+        ]
+
     def save(self, *args, **kwargs):
-        d = timedelta(minutes=15)
+        d = timedelta(seconds=settings.TICKETS_ORDER_TTL)
 
         if not self.id:
             self.expired_at = now() + d
             super().save(*args, **kwargs)
 
 
+class IdempotencyKey(models.Model):
+    """
+    Response to an order request made with an Idempotency-Key header, replayed to
+    retries of the request until expired_at.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    # sha256 of the request body, a key can't be reused for another cart
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    # JSON text, jsonb would not keep the order of keys of the response
+    response = models.TextField(null=True)
+    expired_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expired_at"], name="idempotencykey_expired_idx"),
+        ]
+
+
 class Ticket(models.Model):
+    RESERVED = "R"
+    SOLD = "S"
+    RELEASED = "E"
+
     type = models.ForeignKey(
         TicketType,
         related_name="tickets",
         related_query_name="ticket",
         on_delete=models.PROTECT,
+        # covered by ticket_type_status_idx
+        db_index=False,
     )
-    status = models.CharField(max_length=1, blank=False, default="R")
+    status = models.CharField(max_length=1, blank=False, default=RESERVED)
     order = models.ForeignKey(
         Order,
         related_name="tickets",
@@ -58,11 +188,27 @@ class Ticket(models.Model):
         on_delete=models.PROTECT,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["type", "status"], name="ticket_type_status_idx"),
+        ]
+
     def save(self, *args, **kwargs):
-        if self.pk:
+        from .inventory import claim
+
+        if self.pk or self.status == Ticket.RELEASED:
             super().save(*args, **kwargs)
         else:
-            if Ticket.objects.filter(type=self.type).count() < self.type.qty:
+            # counter and ticket row are written together or not at all
+            with transaction.atomic():
+                if not claim(self.type_id):
+                    raise Exception("No enough tickets")
                 super().save(*args, **kwargs)
-            else:
-                raise Exception("No enough tickets")
+
+    def delete(self, *args, **kwargs):
+        from .inventory import release
+
+        with transaction.atomic():
+            if self.status != Ticket.RELEASED:
+                release(self.type_id)
+            return super().delete(*args, **kwargs)
@@ -0,0 +1,33 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedCursorPagination(CursorPagination):
+    """
+    Keyset pagination by creation time, any page costs the same index range scan.
+    Clients which need the whole unpaginated list ask for it with ?unpaginated.
+    """
+
+    ordering = ("created_at", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    unpaginated_query_param = "unpaginated"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.unpaginated_query_param in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+def paginated_data(request, queryset, serialize, view=None, base_url=None):
+    """
+    Serialize one page of queryset with its cursors, or the whole queryset when
+    client asks for unpaginated list. For views without pagination_class, links
+    to other pages are made from base_url when it's given.
+    """
+    paginator = CreatedCursorPagination()
+    page = paginator.paginate_queryset(queryset, request, view)
+    if page is None:
+        return serialize(queryset)
+    if base_url is not None:
+        paginator.base_url = base_url
+    return paginator.get_paginated_response(serialize(page)).data
@@ -0,0 +1,75 @@
+"""
+Confirmation of payments of orders.
+
+Payment webhooks come in bursts, so a batch of orders is confirmed with the same
+queries as a single one: orders are locked in primary key order, the unpaid ones
+which have not expired are marked paid with one UPDATE, their tickets are marked
+sold with another and the sales summary gets them with one more. Locked orders
+can't be released by the expiry worker at the same time.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils.timezone import now
+
+from . import sales
+from .models import Order, Ticket
+
+PAID = "paid"
+ALREADY_PAID = "already_paid"
+EXPIRED = "expired"
+NOT_FOUND = "not_found"
+
+
+def confirm(order_ids, paid_at=None):
+    """
+    Mark unpaid orders with ids paid and their tickets sold, unless the orders have
+    expired. Returns ids of orders by result, PAID, ALREADY_PAID, EXPIRED or
+    NOT_FOUND.
+    """
+    paid_at = paid_at or now()
+    order_ids = set(order_ids)
+    results = {PAID: [], ALREADY_PAID: [], EXPIRED: [], NOT_FOUND: []}
+    with transaction.atomic():
+        found = set()
+        for pk, paid, expired_at in (
+            Order.objects.filter(pk__in=order_ids)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "paid", "expired_at")
+        ):
+            found.add(pk)
+            if paid == Order.PAID:
+                results[ALREADY_PAID].append(pk)
+            elif paid == Order.EXPIRED or expired_at <= paid_at:
+                results[EXPIRED].append(pk)
+            else:
+                results[PAID].append(pk)
+        results[NOT_FOUND] = sorted(order_ids - found)
+
+        if results[PAID]:
+            Order.objects.filter(pk__in=results[PAID]).update(
+                paid=Order.PAID, paid_date=paid_at
+            )
+            tickets = Ticket.objects.filter(
+                order__in=results[PAID], status=Ticket.RESERVED
+            )
+            sold = list(
+                tickets.values("type", "type__price", "type__stripe_count")
+                .annotate(count=Count("pk"))
+                .order_by()
+            )
+            tickets.update(status=Ticket.SOLD)
+            sales.record(
+                (
+                    row["type"],
+                    row["type__stripe_count"],
+                    paid_at,
+                    {
+                        "sold": row["count"],
+                        "revenue": row["count"] * row["type__price"],
+                    },
+                )
+                for row in sold
+            )
+    return results
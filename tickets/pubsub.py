@@ -0,0 +1,44 @@
+"""
+In-process publish/subscribe of availability changes.
+
+Reservation code publishes ids of events whose availability changed once its
+transaction commits, see tickets.cache.availability_changed. Subscribers get the
+event id in the publishing thread and must not block it. Only subscribers of this
+process are told, a broker like Redis pub/sub can replace the module level pubsub
+with an object having the same publish() and subscribe().
+"""
+
+import threading
+
+
+class InProcessPubSub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, event_id, callback):
+        """
+        Call callback(event_id) after availability of the event changes, returns
+        a function which unsubscribes it.
+        """
+        with self.lock:
+            self.subscribers.setdefault(event_id, set()).add(callback)
+
+        def unsubscribe():
+            with self.lock:
+                callbacks = self.subscribers.get(event_id, set())
+                callbacks.discard(callback)
+                if not callbacks:
+                    self.subscribers.pop(event_id, None)
+
+        return unsubscribe
+
+    def publish(self, event_ids):
+        for event_id in event_ids:
+            with self.lock:
+                callbacks = list(self.subscribers.get(event_id, ()))
+            for callback in callbacks:
+                callback(event_id)
+
+
+pubsub = InProcessPubSub()
@@ -0,0 +1,46 @@
+"""
+JSON renderer with the output of DRF JSONRenderer, encoded by orjson when it's
+installed.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders compact JSON with orjson, types orjson doesn't write the same way as
+    DRF (Decimal, datetimes, lazy strings, ...) are passed to the DRF encoder.
+    Indented JSON, JSON with other settings of DRF and data orjson can't encode
+    are rendered by JSONRenderer.
+    """
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or data is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.default, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            # keys which are not strings, integers over 64 bits, ...
+            return super().render(data, accepted_media_type, renderer_context)
+        # escaped like by JSONRenderer, so the output is a strict javascript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,130 @@
+"""
+Reservation of tickets for orders.
+
+Counters of ticket types from the cart are taken with conditional UPDATEs, always
+in primary key order (striped ticket types after the others), so two concurrent
+orders wait for each other's row locks instead of deadlocking and a sold out
+ticket type can't be oversold.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import cache, inventory, sales
+from .models import Order, Ticket
+
+
+class SoldOut(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Not enough tickets"
+    default_code = "sold_out"
+
+
+def cart_quantities(cart):
+    """
+    Sum quantities of validated cart lines by ticket type id.
+    """
+    quantities = {}
+    for item in cart:
+        pk = item["ticket_type"].pk
+        quantities[pk] = quantities.get(pk, 0) + item["quantity"]
+    return quantities
+
+
+def create_order(cart):
+    """
+    Create order with reserved tickets from validated cart, raises SoldOut if any
+    ticket type has not enough tickets. Must be called inside a transaction.
+    """
+    quantities = cart_quantities(cart)
+    stripe_counts = {
+        item["ticket_type"].pk: item["ticket_type"].stripe_count for item in cart
+    }
+    # ticket type counters are locked before stripes, see tickets.inventory
+    for pk in sorted(quantities, key=lambda pk: (stripe_counts[pk] > 0, pk)):
+        if not inventory.claim(pk, quantities[pk], stripe_counts[pk]):
+            raise SoldOut()
+
+    order = Order(
+        total=sum(item["ticket_type"].price * item["quantity"] for item in cart)
+    )
+    order.save()
+    # one INSERT for the whole cart, PostgreSQL returns ids of created tickets
+    Ticket.objects.bulk_create(
+        Ticket(type=item["ticket_type"], order=order)
+        for item in cart
+        for _ in range(item["quantity"])
+    )
+    sales.record(
+        (pk, stripe_counts[pk], order.created_at, {"reserved": quantity})
+        for pk, quantity in quantities.items()
+    )
+    cache.availability_changed(item["ticket_type"].event_id for item in cart)
+    return order
+
+
+def create_orders(carts):
+    """
+    Create orders for many validated carts at once, returns a list with an order
+    for every cart or None where a cart had not enough tickets. Carts are served in
+    order, a sold out cart doesn't stop the ones after it. Must be called inside a
+    transaction.
+
+    Counters of all ticket types are locked with one query, so the number of
+    queries doesn't grow with the number of carts.
+    """
+    demands = [cart_quantities(cart) for cart in carts]
+    available, striped = inventory.lock_available(
+        {pk for demand in demands for pk in demand}
+    )
+
+    claimed = {}
+    accepted = []
+    for demand in demands:
+        if all(available.get(pk, 0) >= quantity for pk, quantity in demand.items()):
+            for pk, quantity in demand.items():
+                available[pk] -= quantity
+                claimed[pk] = claimed.get(pk, 0) + quantity
+            accepted.append(True)
+        else:
+            accepted.append(False)
+    if not inventory.claim_locked(claimed, striped):
+        raise SoldOut()
+
+    # bulk_create skips Order.save(), so expiry is set here
+    expired_at = now() + timedelta(seconds=settings.TICKETS_ORDER_TTL)
+    orders = Order.objects.bulk_create(
+        Order(
+            total=sum(item["ticket_type"].price * item["quantity"] for item in cart),
+            expired_at=expired_at,
+        )
+        for cart, ok in zip(carts, accepted)
+        if ok
+    )
+    created = iter(orders)
+    results = [next(created) if ok else None for ok in accepted]
+
+    Ticket.objects.bulk_create(
+        Ticket(type=item["ticket_type"], order=order)
+        for cart, order in zip(carts, results)
+        if order
+        for item in cart
+        for _ in range(item["quantity"])
+    )
+    sales.record(
+        (pk, striped.get(pk, 0), order.created_at, {"reserved": quantity})
+        for demand, order in zip(demands, results)
+        if order
+        for pk, quantity in demand.items()
+    )
+    cache.availability_changed(
+        item["ticket_type"].event_id
+        for cart, order in zip(carts, results)
+        if order
+        for item in cart
+    )
+    return results
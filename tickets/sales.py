@@ -0,0 +1,111 @@
+"""
+Sales summary of ticket types by day.
+
+Reservations, payments and expiry add their changes to SalesSummary rows in the
+transaction making them, with one INSERT ... ON CONFLICT DO UPDATE, so reports read
+a row per ticket type and day instead of aggregating Ticket and Order rows. Tickets
+are counted as reserved on the day their order was made, as sold on the day it was
+paid and as released on the day it expired. Changes of striped ticket types go to a
+random slot of as many as they have stripes, so concurrent orders don't wait for
+one summary row. rebuild() recomputes the summary from Ticket rows.
+"""
+
+import random
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils.timezone import get_current_timezone, localdate
+
+from .models import SalesSummary, Ticket
+
+FIELDS = ("reserved", "sold", "released", "revenue")
+
+
+def _zero():
+    return {"reserved": 0, "sold": 0, "released": 0, "revenue": Decimal(0)}
+
+
+def record(changes):
+    """
+    Add changes to the summary, changes are tuples of ticket type id, its stripe
+    count, datetime of the change and a dict with some of FIELDS.
+    """
+    rows = {}
+    for ticket_type_id, stripe_count, when, counts in changes:
+        slot = random.randrange(stripe_count) if stripe_count else 0
+        row = rows.setdefault((ticket_type_id, localdate(when), slot), _zero())
+        for field, value in counts.items():
+            row[field] += value
+    if not rows:
+        return
+
+    table = SalesSummary._meta.db_table
+    # rows are locked in one order by all transactions
+    keys = sorted(rows)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (ticket_type_id, date, slot, {', '.join(FIELDS)}) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(keys))} "
+            "ON CONFLICT (ticket_type_id, date, slot) DO UPDATE SET "
+            + ", ".join(
+                f"{field} = {table}.{field} + EXCLUDED.{field}" for field in FIELDS
+            ),
+            [value for key in keys for value in (*key, *rows[key].values())],
+        )
+
+
+def summary(date, event_id=None):
+    """
+    Totals of ticket types with sales on the date, ordered by event and ticket type.
+    """
+    rows = SalesSummary.objects.filter(date=date)
+    if event_id is not None:
+        rows = rows.filter(ticket_type__event=event_id)
+    return (
+        rows.values("ticket_type", event=F("ticket_type__event"))
+        .annotate(**{field: Sum(field) for field in FIELDS})
+        .order_by("event", "ticket_type")
+    )
+
+
+def _by_day(tickets, date_field):
+    return (
+        tickets.annotate(day=TruncDate(date_field, tzinfo=get_current_timezone()))
+        .values("type", "day")
+        .annotate(count=Count("pk"), price=F("type__price"))
+        .order_by()
+    )
+
+
+def rebuild():
+    """
+    Recompute the summary from Ticket rows, returns the number of summary rows.
+    Must be called inside a transaction.
+    """
+    with connection.cursor() as cursor:
+        # changes of concurrent transactions wait until the summary is rebuilt
+        cursor.execute(f"LOCK TABLE {SalesSummary._meta.db_table} IN EXCLUSIVE MODE")
+
+    rows = {}
+
+    def add(key, field, value):
+        rows.setdefault(key, _zero())[field] += value
+
+    for row in _by_day(Ticket.objects.all(), "order__created_at"):
+        add((row["type"], row["day"]), "reserved", row["count"])
+    for row in _by_day(Ticket.objects.filter(status=Ticket.SOLD), "order__paid_date"):
+        add((row["type"], row["day"]), "sold", row["count"])
+        add((row["type"], row["day"]), "revenue", row["count"] * row["price"])
+    for row in _by_day(
+        Ticket.objects.filter(status=Ticket.RELEASED), "order__expired_at"
+    ):
+        add((row["type"], row["day"]), "released", row["count"])
+
+    SalesSummary.objects.all().delete()
+    SalesSummary.objects.bulk_create(
+        SalesSummary(ticket_type_id=ticket_type_id, date=day, **counts)
+        for (ticket_type_id, day), counts in rows.items()
+    )
+    return len(rows)
@@ -1,6 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from . import models
+from . import inventory, models
 
 
 class TicketTypeSerializer(serializers.ModelSerializer):
@@ -36,22 +37,120 @@ class TicketSerializer(serializers.ModelSerializer):
         fields = ("id", "type", "status", "order")
 
 
+class PaymentSerializer(serializers.Serializer):
+    orders = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+
+    def validate_orders(self, value):
+        if len(value) > settings.TICKETS_PAYMENT_BATCH_MAX:
+            raise serializers.ValidationError(
+                f"At most {settings.TICKETS_PAYMENT_BATCH_MAX} orders"
+            )
+        return value
+
+
+class SalesSerializer(serializers.Serializer):
+    reserved = serializers.IntegerField()
+    sold = serializers.IntegerField()
+    released = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class TicketTypeSalesSerializer(SalesSerializer):
+    event = serializers.IntegerField()
+    ticket_type = serializers.IntegerField()
+
+
+class EventSalesSerializer(SalesSerializer):
+    event = serializers.IntegerField()
+
+
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Order
         fields = ("id", "total", "paid", "paid_date", "created_at", "expired_at")
 
 
+def cart_ticket_type_ids(data):
+    """
+    Ids of ticket types referenced by lines of not validated cart data.
+    """
+    ids = set()
+    for item in data:
+        if not isinstance(item, dict) or isinstance(item.get("ticket_type"), bool):
+            continue
+        try:
+            ids.add(int(item.get("ticket_type")))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+class CartTicketTypeField(serializers.PrimaryKeyRelatedField):
+    """
+    Ticket type of a cart line, taken from ticket types preloaded by the cart.
+    """
+
+    def to_internal_value(self, data):
+        ticket_types = getattr(self.root, "ticket_types", None)
+        if ticket_types is None or isinstance(data, bool):
+            return super().to_internal_value(data)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in ticket_types:
+            self.fail("does_not_exist", pk_value=data)
+        return ticket_types[pk]
+
+
+class CartListSerializer(serializers.ListSerializer):
+    """
+    Cart of many lines, ticket types of all lines are loaded with one query, or
+    taken from "ticket_types" of context, and lines of the same ticket type are
+    merged. Events of ticket types are loaded with them for the waiting room.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.ticket_types = self.context.get("ticket_types")
+            if self.ticket_types is None:
+                self.ticket_types = (
+                    models.TicketType.objects.select_related("event")
+                    .annotate(available=inventory.available())
+                    .in_bulk(cart_ticket_type_ids(data))
+                )
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        lines = {}
+        for item in attrs:
+            pk = item["ticket_type"].pk
+            if pk in lines:
+                lines[pk]["quantity"] += item["quantity"]
+            else:
+                lines[pk] = dict(item)
+
+        for line in lines.values():
+            if line["quantity"] > line["ticket_type"].tickets_available:
+                raise serializers.ValidationError(
+                    f"Not enough tickets of ticket type {line['ticket_type'].pk}"
+                )
+        return list(lines.values())
+
+
 class CartSerializer(serializers.Serializer):
-    ticket_type = serializers.PrimaryKeyRelatedField(
-        queryset=models.TicketType.objects.all()
+    ticket_type = CartTicketTypeField(
+        queryset=models.TicketType.objects.annotate(available=inventory.available())
     )
     quantity = serializers.IntegerField(min_value=1)
 
     def validate(self, data):
-        if (data["ticket_type"].tickets.count() + data["quantity"]) <= data[
-            "ticket_type"
-        ].qty:
+        if data["quantity"] <= data["ticket_type"].tickets_available:
             return data
         else:
             raise serializers.ValidationError("Not enough tickets")
+
+    class Meta:
+        list_serializer_class = CartListSerializer
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends, cache, middleware
+from .models import Event, TicketType
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event(sender, instance, **kwargs):
+    cache.invalidate_event(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TicketType)
+def invalidate_ticket_type_event(sender, instance, **kwargs):
+    cache.invalidate_event(instance.event_id)
+    # stock of the reservation store is loaded again with the new qty
+    pk = instance.pk
+    transaction.on_commit(lambda: backends.get_backend().forget_stock([pk]))
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    middleware.install_query_timer(connection)
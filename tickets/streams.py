@@ -0,0 +1,162 @@
+"""
+Server-sent events of availability of an event for the ASGI entry point.
+
+All streams of an event in a process share one feed, which is told about changes
+by tickets.pubsub. Changes published within TICKETS_STREAM_INTERVAL seconds are
+read together with one query and the difference from the last read is pushed to
+every stream as a delta. A stream keeps at most one value per ticket type waiting
+to be sent, a slow client gets one delta with the latest values instead of all of
+them, so its buffer doesn't grow with the number of changes. Feeds of idle events
+are read every TICKETS_STREAM_KEEPALIVE seconds, for changes made by other
+processes. A feed whose read fails is closed and its streams end, clients connect
+again to a new one.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import inventory
+from .pubsub import pubsub
+
+logger = logging.getLogger("tickets.streams")
+
+
+class Client:
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, delta):
+        self.pending.update(delta)
+        self.ready.set()
+
+    def take(self):
+        delta, self.pending = self.pending, {}
+        self.ready.clear()
+        return delta
+
+
+class AvailabilityFeed:
+    """
+    Availability of one event read once per change for all its streams.
+    """
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+        self.started = asyncio.Event()
+        self.clients = set()
+        self.available = None
+        self.failed = False
+        self.unsubscribe = pubsub.subscribe(event_id, self.notify)
+        self.task = asyncio.create_task(self.run())
+
+    def notify(self, event_id):
+        # publishers run in threads of sync code
+        try:
+            self.loop.call_soon_threadsafe(self.changed.set)
+        except RuntimeError:
+            # the loop of a stopped server
+            pass
+
+    async def read(self):
+        return await sync_to_async(inventory.event_available)(self.event_id)
+
+    async def run(self):
+        try:
+            await self.follow()
+        except Exception:
+            logger.exception("Availability feed of event %s failed", self.event_id)
+            # new streams get a new feed, streams of this one are ended
+            self.failed = True
+            self.forget()
+            self.started.set()
+            for client in self.clients:
+                client.ready.set()
+
+    async def follow(self):
+        self.available = await self.read()
+        self.started.set()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self.changed.wait(), settings.TICKETS_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                # changes of other processes, e.g. the expiry worker, aren't
+                # published here, they are read when the feed is idle
+                pass
+            # changes published in the meantime are read with this one
+            await asyncio.sleep(settings.TICKETS_STREAM_INTERVAL)
+            self.changed.clear()
+            available = await self.read()
+            delta = {
+                pk: count
+                for pk, count in available.items()
+                if self.available.get(pk) != count
+            }
+            # deleted ticket types
+            delta.update({pk: None for pk in self.available if pk not in available})
+            self.available = available
+            if delta:
+                for client in self.clients:
+                    client.push(delta)
+
+    def forget(self):
+        self.unsubscribe()
+        if _feeds.get(self.event_id) is self:
+            del _feeds[self.event_id]
+
+    def close(self):
+        self.forget()
+        self.task.cancel()
+
+
+_feeds = {}
+
+
+def _feed(event_id):
+    feed = _feeds.get(event_id)
+    if feed is None or feed.loop is not asyncio.get_running_loop():
+        feed = _feeds[event_id] = AvailabilityFeed(event_id)
+    return feed
+
+
+def _message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def availability_events(event_id):
+    """
+    Messages of a stream of the event, a snapshot of availability by ticket type id
+    and then deltas with changed ticket types.
+    """
+    feed = _feed(event_id)
+    client = Client()
+    feed.clients.add(client)
+    try:
+        await feed.started.wait()
+        if feed.failed:
+            return
+        yield _message("snapshot", feed.available)
+        while True:
+            try:
+                await asyncio.wait_for(
+                    client.ready.wait(), settings.TICKETS_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                # keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if feed.failed:
+                return
+            yield _message("delta", client.take())
+    finally:
+        feed.clients.discard(client)
+        if not feed.clients:
+            feed.close()
@@ -0,0 +1,45 @@
+#!/bin/bash
+# Compares order throughput of the WSGI (gunicorn) and ASGI (uvicorn) entry points
+# with locustfile.py, WSGI runs the DRF order view, ASGI the async one.
+# Needs a database seeded with ./manage.py seed_benchmark, for example:
+#   USERS=1000 RUN_TIME=2m ./tickets/unittests/bench_wsgi_asgi.sh
+
+USERS=${USERS:-500}
+SPAWN_RATE=${SPAWN_RATE:-50}
+RUN_TIME=${RUN_TIME:-1m}
+WORKERS=${WORKERS:-1}
+THREADS=${THREADS:-8}
+RESULTS=${RESULTS:-/tmp/besttickets-bench}
+
+cd "$(dirname "$0")/../.."
+mkdir -p "$RESULTS"
+
+run_locust() {
+    BENCH_CATALOG_HOST=$3 locust -f tickets/unittests/locustfile.py --headless --only-summary \
+        -u "$USERS" -r "$SPAWN_RATE" -t "$RUN_TIME" \
+        --host "$2" --csv "$RESULTS/$1" OrderUser
+}
+
+summary() {
+    # request count, failures, median, p95 and requests/s of the aggregated row
+    awk -F, -v name="$1" '$2 == "Aggregated" {
+        printf "%-5s requests %s failures %s median %s ms p95 %s ms %s req/s\n", name, $3, $4, $5, $17, $10
+    }' "$RESULTS/$1_stats.csv"
+}
+
+gunicorn besttickets.wsgi -w "$WORKERS" --threads "$THREADS" -b 127.0.0.1:8001 &
+SERVER=$!
+sleep 3
+run_locust wsgi http://localhost:8001/api/ http://localhost:8001/api/
+kill $SERVER
+wait $SERVER 2>/dev/null
+
+uvicorn besttickets.asgi:application --workers "$WORKERS" --port 8002 --log-level warning &
+SERVER=$!
+sleep 3
+run_locust asgi http://localhost:8002/api/async/ http://localhost:8002/api/
+kill $SERVER
+wait $SERVER 2>/dev/null
+
+summary wsgi
+summary asgi
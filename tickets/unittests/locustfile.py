@@ -1,19 +1,133 @@
-import json
+"""
+Benchmark scenarios, each one is a user class:
+
+    BrowseUser      storefront traffic, events with tickets and ticket types
+    OnSaleSpikeUser orders hitting the single hot ticket type
+    LargeCartUser   orders with many lines and seats
+    ExpiryChurnUser small orders which are never paid
+    OrderUser       orders of one to ten seats from two ticket types
+
+Ticket types are read from the API at start, seed them with ./manage.py seed_benchmark.
+Run them with ./manage.py run_benchmark or directly:
+
+    locust -f tickets/unittests/locustfile.py --host http://localhost:8000/api/ OrderUser
+"""
+
+import os
 import random
-import time
 
-from locust import HttpUser, between, task
+import requests
+from locust import HttpUser, between, events, task
+
+HOT_CATEGORY = "HOT"
+SOLD_OUT = "Not enough tickets"
+
+# ticket types by event, read once per locust process
+catalog = {"events": {}, "hot": []}
+
+
+@events.test_start.add_listener
+def load_catalog(environment, **kwargs):
+    # async endpoints don't list ticket types, so they may be read from another host
+    url = os.environ.get("BENCH_CATALOG_HOST", environment.host) + "ticket-types/"
+    params = {"page_size": 1000}
+    catalog["events"].clear()
+    catalog["hot"].clear()
+    while url:
+        page = requests.get(url, params=params).json()
+        for ticket_type in page["results"]:
+            if ticket_type["category"] == HOT_CATEGORY:
+                catalog["hot"].append(ticket_type["id"])
+            else:
+                catalog["events"].setdefault(ticket_type["event"], []).append(
+                    ticket_type["id"]
+                )
+        url, params = page["next"], None
+
+
+class OrderMixin:
+    def order(self, cart, name="orders/"):
+        with self.client.post(
+            "orders/", json=cart, name=name, catch_response=True
+        ) as response:
+            # running out of tickets is an expected answer under load, a cart over
+            # available tickets is rejected with 400 by its validation
+            if response.status_code in (201, 409) or (
+                response.status_code == 400 and SOLD_OUT in response.text
+            ):
+                response.success()
+            else:
+                response.failure(f"unexpected status {response.status_code}")
+
+    def random_event(self):
+        return random.choice(list(catalog["events"]))
+
+
+class BrowseUser(HttpUser):
+    wait_time = between(1, 2)
+
+    @task(5)
+    def events_with_tickets(self):
+        self.client.get("events/?tickets", name="events/?tickets")
+
+    @task(3)
+    def event_details(self):
+        event_id = random.choice(list(catalog["events"]))
+        self.client.get(f"events/{event_id}/?tickets", name="events/:id/?tickets")
+
+    @task(2)
+    def ticket_types_of_event(self):
+        event_id = random.choice(list(catalog["events"]))
+        self.client.get(f"events/{event_id}/tickets/", name="events/:id/tickets/")
+
+
+class OnSaleSpikeUser(OrderMixin, HttpUser):
+    wait_time = between(0.1, 0.5)
+
+    @task
+    def make_hot_order(self):
+        cart = [
+            {
+                "ticket_type": random.choice(catalog["hot"]),
+                "quantity": random.randint(1, 4),
+            }
+        ]
+        self.order(cart, name="orders/ hot")
+
+
+class LargeCartUser(OrderMixin, HttpUser):
+    wait_time = between(1, 2)
+
+    @task
+    def make_large_order(self):
+        ticket_types = catalog["events"][self.random_event()]
+        cart = [
+            {"ticket_type": ticket_type, "quantity": random.randint(5, 20)}
+            for ticket_type in ticket_types
+        ]
+        self.order(cart, name="orders/ large")
+
+
+class ExpiryChurnUser(OrderMixin, HttpUser):
+    wait_time = between(0.5, 1)
+
+    @task
+    def make_unpaid_order(self):
+        ticket_types = catalog["events"][self.random_event()]
+        cart = [{"ticket_type": random.choice(ticket_types), "quantity": 1}]
+        self.order(cart, name="orders/ unpaid")
 
 
-class QuickstartUser(HttpUser):
+class OrderUser(OrderMixin, HttpUser):
     wait_time = between(1, 2)
 
     @task(3)
     def make_order(self):
         ticket_by_round = random.randint(1, 10)
+        ticket_types = catalog["events"][self.random_event()]
 
         cart = [
-            {"ticket_type": 1, "quantity": ticket_by_round},
-            {"ticket_type": 2, "quantity": random.randint(1, 2)},
+            {"ticket_type": ticket_types[0], "quantity": ticket_by_round},
+            {"ticket_type": ticket_types[-1], "quantity": random.randint(1, 2)},
         ]
-        self.client.post("orders/", json=cart)
+        self.order(cart)
@@ -0,0 +1,128 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from tickets import backends, reservations
+from tickets.models import Order, Ticket, TicketType
+
+
+class AsyncOrderViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    async def post_cart(self, cart, key=None):
+        headers = {"Idempotency-Key": key} if key else {}
+        return await self.async_client.post(
+            reverse("async-order-list"),
+            json.dumps(cart),
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def test_make_order(self):
+        response = await self.post_cart(
+            [{"ticket_type": 1, "quantity": 2}, {"ticket_type": 2, "quantity": 3}]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCountEqual(
+            json.loads(response.content).keys(),
+            ["id", "total", "paid", "paid_date", "created_at", "expired_at"],
+        )
+        self.assertEqual(response["content-type"], "application/json")
+        self.assertEqual(await Ticket.objects.filter(type=2).acount(), 3)
+        self.assertEqual((await TicketType.objects.aget(pk=1)).sold, 2)
+
+    async def test_retry_with_idempotency_key_gets_original_response(self):
+        cart = [{"ticket_type": 1, "quantity": 2}]
+        first = await self.post_cart(cart, "order-1")
+
+        retry = await self.post_cart(cart, "order-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(retry.content), json.loads(first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(await Order.objects.acount(), 1)
+        self.assertEqual((await TicketType.objects.aget(pk=1)).sold, 2)
+
+    async def test_idempotency_key_reused_or_too_long(self):
+        await self.post_cart([{"ticket_type": 1, "quantity": 2}], "order-1")
+
+        reused = await self.post_cart([{"ticket_type": 2, "quantity": 1}], "order-1")
+        too_long = await self.post_cart([{"ticket_type": 2, "quantity": 1}], "k" * 256)
+
+        self.assertEqual(reused.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(too_long.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Idempotency-Key", json.loads(too_long.content))
+        self.assertEqual(await Order.objects.acount(), 1)
+
+    async def test_sold_out_order_with_idempotency_key_is_not_stored(self):
+        cart = [{"ticket_type": 1, "quantity": 1}]
+        with mock.patch.object(
+            backends.DatabaseBackend,
+            "create_order",
+            side_effect=reservations.SoldOut(),
+        ):
+            sold_out = await self.post_cart(cart, "order-1")
+
+        response = await self.post_cart(cart, "order-1")
+
+        self.assertEqual(sold_out.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(json.loads(sold_out.content), {"detail": "Not enough tickets"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_order_with_invalid_cart(self):
+        response = await self.post_cart([{"ticket_type": 88, "quantity": 2}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(await Order.objects.acount(), 0)
+
+    async def test_order_with_invalid_json(self):
+        response = await self.async_client.post(
+            reverse("async-order-list"), "[{", content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_order_when_lines_together_exceed_availability(self):
+        await TicketType.objects.filter(pk=1).aupdate(sold=299)
+        cart = [{"ticket_type": 1, "quantity": 1}, {"ticket_type": 1, "quantity": 1}]
+
+        response = await self.post_cart(cart)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(await Order.objects.acount(), 0)
+
+
+class AsyncTicketTypeListViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    async def test_get_tickets_type_for_event(self):
+        response = await self.async_client.get(
+            reverse("async-tickets-type-for-event-list", args=(2,))
+        )
+
+        sync_response = await sync_to_async(self.client.get)(
+            reverse("tickets-type-for-event-list", args=(2,)) + "?unpaginated"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, sync_response.content)
+
+    async def test_get_tickets_type_for_non_existing_event(self):
+        response = await self.async_client.get(
+            reverse("async-tickets-type-for-event-list", args=(120,))
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
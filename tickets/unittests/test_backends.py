@@ -0,0 +1,196 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import backends, expiry, inventory
+from tickets.models import InventoryStripe, Order, Ticket, TicketType
+from tickets.views import OrderBatchView, OrderListView
+
+
+@override_settings(TICKETS_RESERVATION_STORE="memory://")
+class StoreBackendTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        backends._backends.clear()
+        self.backend = backends.get_backend()
+        self.store = self.backend.store
+
+    def post_cart(self, cart):
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-list"), json.dumps(cart), content_type="application/json"
+        )
+        response = OrderListView.as_view()(request)
+        response.render()
+        return response
+
+    def test_order_is_written_by_flush(self):
+        response = self.post_cart(
+            [{"ticket_type": 1, "quantity": 2}, {"ticket_type": 2, "quantity": 3}]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = json.loads(response.content)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(self.store.get_stock(1), 298)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+
+        self.assertEqual(self.backend.flush(100), 1)
+
+        order = Order.objects.get()
+        self.assertEqual(order.pk, data["id"])
+        self.assertEqual(str(order.total), data["total"])
+        self.assertEqual(
+            order.created_at.strftime("%Y-%m-%d %H:%M:%S"), data["created_at"]
+        )
+        self.assertEqual(order.tickets.filter(type=2).count(), 3)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 2)
+        self.assertEqual(self.store.queued(), [])
+
+    def test_sold_out_in_store(self):
+        self.store.init_stock({1: 1})
+
+        response = self.post_cart([{"ticket_type": 1, "quantity": 2}])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.store.get_stock(1), 1)
+        self.assertEqual(self.store.queued(), [])
+
+    def test_stock_is_loaded_without_queued_orders(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 5}])
+        TicketType.objects.filter(pk=1).update(sold=10)
+        self.store.forget_stock([1])
+
+        self.backend.load_stock([1])
+
+        self.assertEqual(self.store.get_stock(1), 300 - 10 - 5)
+
+    def test_order_written_while_stock_is_loaded_is_not_missed(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 5}])
+        self.store.forget_stock([1])
+        queued = self.store.queued
+
+        def flush_and_read():
+            # the flusher writes the order just before the store is read
+            self.backend.flush(100)
+            return queued()
+
+        with mock.patch.object(self.store, "queued", flush_and_read):
+            self.backend.load_stock([1])
+
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 5)
+        self.assertEqual(self.store.get_stock(1), 295)
+
+    def test_reconcile_writes_orders_in_flight_once(self):
+        for quantity in (1, 2, 3):
+            self.post_cart([{"ticket_type": 2, "quantity": quantity}])
+        records = self.store.take(2)
+        # flusher stopped after the batch was committed, before ack
+        self.backend.write(records)
+
+        recovered = self.backend.reconcile()
+
+        self.assertEqual(recovered, 2)
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(Ticket.objects.count(), 6)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 6)
+        self.assertEqual(self.store.get_stock(4), 10000)
+
+    def test_expired_orders_give_tickets_back_to_store(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 4}])
+        self.backend.flush(100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            expiry.release_expired(100, until=now() + timedelta(days=1))
+
+        self.assertEqual(self.store.get_stock(1), 300)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+
+    def test_changed_ticket_type_is_loaded_again(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 4}])
+        self.backend.flush(100)
+        ticket_type = TicketType.objects.get(pk=1)
+        ticket_type.qty = 350
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket_type.save()
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        self.assertEqual(self.store.get_stock(1), 345)
+
+    def test_created_at_of_claim_is_kept(self):
+        self.post_cart([{"ticket_type": 3, "quantity": 1}])
+        record = json.loads(self.store.queued()[0])
+
+        self.backend.flush(100)
+
+        order = Order.objects.get()
+        self.assertEqual(order.created_at, parse_datetime(record["created_at"]))
+        self.assertEqual(order.expired_at, parse_datetime(record["expired_at"]))
+
+    def test_batch_without_tickets_in_database_stays_in_flight(self):
+        inventory.stripe(1, 4)
+        self.post_cart([{"ticket_type": 1, "quantity": 2}])
+        # the database has fewer tickets than the store counted on
+        InventoryStripe.objects.filter(ticket_type=1).update(sold=F("qty"))
+
+        with self.assertRaises(backends.Oversold):
+            self.backend.flush(100)
+
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(Ticket.objects.count(), 0)
+        self.assertEqual(len(self.store.in_flight()), 1)
+
+    def test_batch_of_carts_is_claimed_in_store(self):
+        ticket_type = TicketType.objects.create(
+            event_id=1, category="VIP", price=10, qty=5
+        )
+        self.post_cart([{"ticket_type": ticket_type.pk, "quantity": 5}])
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-batch"),
+            json.dumps([[{"ticket_type": ticket_type.pk, "quantity": 5}]]),
+            content_type="application/json",
+        )
+
+        response = OrderBatchView.as_view()(request)
+        self.backend.flush(100)
+
+        self.assertEqual(response.data[0]["status"], status.HTTP_409_CONFLICT)
+        ticket_type.refresh_from_db()
+        self.assertEqual(ticket_type.sold, 5)
+
+    def test_flush_reservations_command(self):
+        self.post_cart([{"ticket_type": 3, "quantity": 2}])
+        out = StringIO()
+
+        call_command("flush_reservations", interval=0, stdout=out)
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertIn("0 orders were in flight", out.getvalue())
+
+
+class BackendSettingTest(TestCase):
+    def test_database_backend_by_default(self):
+        self.assertIsInstance(backends.get_backend(), backends.DatabaseBackend)
+
+    @override_settings(TICKETS_RESERVATION_STORE="mongodb://localhost")
+    def test_unknown_store(self):
+        with self.assertRaises(ImproperlyConfigured):
+            backends.get_backend()
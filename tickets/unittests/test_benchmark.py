@@ -0,0 +1,133 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from tickets.management.commands import run_benchmark
+from tickets.management.commands.run_benchmark import (
+    compare,
+    parse_run_time,
+    read_stats,
+)
+from tickets.models import Event, TicketType
+
+STATS_CSV = """Type,Name,Request Count,Failure Count,Median Response Time,Average Response Time,Min Response Time,Max Response Time,Average Content Size,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%
+POST,orders/ hot,200,2,30,41.5,12,320,210,20.5,0.2,30,35,40,56,86,120,300,310,320,320,320
+GET,events/?tickets,100,0,60,70.1,20,290,900,10.1,0.0,60,66,70,75,80,150,200,280,290,290,290
+,Aggregated,300,2,40,51.0,12,320,443,30.6,0.2,40,45,53,60,90,130,290,300,320,320,320
+"""
+
+
+class SeedBenchmarkTest(TestCase):
+    def test_seed_benchmark(self):
+        out = StringIO()
+        call_command(
+            "seed_benchmark", events=5, ticket_types=2, qty=50, hot_qty=80, stdout=out
+        )
+
+        self.assertEqual(Event.objects.count(), 5)
+        self.assertEqual(TicketType.objects.filter(qty=50).count(), 10)
+        self.assertEqual(TicketType.objects.get(category="HOT").qty, 80)
+        self.assertIn("11 ticket types", out.getvalue())
+
+
+class BenchmarkResultsTest(SimpleTestCase):
+    def setUp(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.csv")
+            with open(path, "w") as f:
+                f.write(STATS_CSV)
+            self.stats = read_stats(path)
+        self.stats["orders_per_sec"] = 18.0
+
+    def test_read_stats(self):
+        self.assertEqual(self.stats["requests"], 300)
+        self.assertEqual(self.stats["failures"], 2)
+        self.assertEqual(
+            (self.stats["p50"], self.stats["p95"], self.stats["p99"]),
+            (40.0, 130.0, 300.0),
+        )
+        self.assertEqual(self.stats["endpoints"]["orders/ hot"]["p99"], 310.0)
+
+    def test_compare_with_same_baseline(self):
+        results = {"spike": self.stats}
+        self.assertEqual(compare(results, results, 0.1), [])
+
+    def test_compare_finds_regressions(self):
+        baseline = {
+            "spike": dict(
+                self.stats,
+                p95=100.0,
+                orders_per_sec=25.0,
+                endpoints={
+                    "orders/ hot": dict(
+                        self.stats["endpoints"]["orders/ hot"], p99=250.0
+                    )
+                },
+            )
+        }
+
+        regressions = compare({"spike": self.stats}, baseline, 0.1)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertIn("spike p95 130 ms, baseline 100 ms", regressions)
+
+    def test_parse_run_time(self):
+        self.assertEqual(parse_run_time("90s"), 90)
+        self.assertEqual(parse_run_time("1h30m"), 5400)
+        with self.assertRaises(ValueError):
+            parse_run_time("2 minutes")
+
+
+class RunBenchmarkTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, "benchmark.json")
+        with open(os.path.join(directory.name, "stats.csv"), "w") as f:
+            f.write(STATS_CSV)
+        self.stats_path = f.name
+
+    def call(self, **options):
+        call_command(
+            "run_benchmark",
+            scenario=["spike", "browse"],
+            run_time="10s",
+            events=2,
+            ticket_types=1,
+            qty=50,
+            hot_qty=80,
+            output=self.output,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_every_scenario_starts_with_seeded_stock(self):
+        hot_available = []
+
+        def run_locust(*args, **kwargs):
+            hot = TicketType.objects.get(category="HOT")
+            hot_available.append(hot.qty - hot.sold)
+            # the scenario sells out the hot ticket type
+            TicketType.objects.filter(pk=hot.pk).update(sold=hot.qty)
+
+        with mock.patch.object(
+            run_benchmark.subprocess, "run", side_effect=run_locust
+        ), mock.patch.object(
+            run_benchmark, "read_stats", return_value=read_stats(self.stats_path)
+        ):
+            self.call()
+
+        self.assertEqual(hot_available, [80, 80])
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_save_baseline_without_baseline(self):
+        with mock.patch.object(run_benchmark.subprocess, "run") as run_locust:
+            with self.assertRaisesMessage(CommandError, "requires --baseline"):
+                self.call(save_baseline=True)
+
+        run_locust.assert_not_called()
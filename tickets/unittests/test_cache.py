@@ -0,0 +1,169 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from tickets import cache as tickets_cache
+from tickets import reservations
+from tickets.models import Event, TicketType
+from tickets.views import EventViewSet
+
+
+@override_settings(TICKETS_CACHE_SHARED=True)
+class EventCacheTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_list(self, query=""):
+        factory = APIRequestFactory()
+        events_view = EventViewSet.as_view({"get": "list"})
+        response = events_view(factory.get(reverse("events-list") + query))
+        response.render()
+        return json.loads(response.content)["results"]
+
+    def get_detail(self, pk, query=""):
+        factory = APIRequestFactory()
+        event_view = EventViewSet.as_view({"get": "retrieve"})
+        request = factory.get(reverse("events-detail", args=(pk,)) + query)
+        response = event_view(request, pk=pk)
+        response.render()
+        return json.loads(response.content)
+
+    def available(self, event):
+        return {item["id"]: item["tickets_available"] for item in event["ticket_types"]}
+
+    def reserve(self, ticket_type_id, quantity):
+        cart = [
+            {
+                "ticket_type": TicketType.objects.get(pk=ticket_type_id),
+                "quantity": quantity,
+            }
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.create_order(cart)
+
+    def test_event_list_is_cached(self):
+        first = self.get_list("?tickets")
+        with self.assertNumQueries(0):
+            second = self.get_list("?tickets")
+
+        self.assertEqual(first, second)
+
+    def test_event_list_pages_are_cached_separately(self):
+        first_page = self.get_list("?page_size=2")
+        with self.assertNumQueries(0):
+            self.get_list("?page_size=2")
+        whole = self.get_list("?page_size=3")
+
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(whole), 3)
+
+    def test_event_detail_is_cached_per_nested_flag(self):
+        nested = self.get_detail(2, "?tickets")
+        with self.assertNumQueries(0):
+            self.get_detail(2, "?tickets")
+        plain = self.get_detail(2)
+
+        self.assertIn("ticket_types", nested)
+        self.assertNotIn("ticket_types", plain)
+
+    def test_event_change_invalidates_cache(self):
+        self.get_list()
+        self.get_detail(1)
+
+        event = Event.objects.get(pk=1)
+        event.name = "Jimi Hendrix Experience Farewell Tour"
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+
+        names = {item["id"]: item["name"] for item in self.get_list()}
+        self.assertEqual(names[1], event.name)
+        self.assertEqual(self.get_detail(1)["name"], event.name)
+
+    def test_ticket_type_change_invalidates_cache(self):
+        self.get_detail(2, "?tickets")
+
+        ticket_type = TicketType.objects.get(pk=1)
+        ticket_type.qty = 350
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket_type.save()
+
+        ticket_types = self.get_detail(2, "?tickets")["ticket_types"]
+        self.assertIn(350, [item["qty"] for item in ticket_types])
+
+    def test_sold_tickets_invalidate_availability(self):
+        self.get_list("?tickets")
+        self.get_detail(2, "?tickets")
+
+        self.reserve(1, 5)
+
+        self.assertEqual(self.available(self.get_detail(2, "?tickets"))[1], 295)
+        events = {item["id"]: item for item in self.get_list("?tickets")}
+        self.assertEqual(self.available(events[2])[1], 295)
+
+    @override_settings(TICKETS_CACHE_AVAILABILITY_STALENESS=5)
+    def test_sold_tickets_within_staleness_bound(self):
+        self.get_detail(2, "?tickets")
+
+        self.reserve(1, 5)
+
+        self.assertEqual(self.available(self.get_detail(2, "?tickets"))[1], 300)
+
+    @override_settings(TICKETS_CACHE_SHARED=False)
+    def test_availability_is_not_kept_in_cache_of_one_process(self):
+        self.get_detail(2)
+        self.get_detail(2, "?tickets")
+        # sold by another process, the cache of this one isn't told
+        TicketType.objects.filter(pk=1).update(sold=5)
+
+        with self.assertNumQueries(0):
+            self.get_detail(2)
+        self.assertEqual(self.available(self.get_detail(2, "?tickets"))[1], 295)
+
+    @override_settings(
+        TICKETS_CACHE_SHARED=False, TICKETS_CACHE_AVAILABILITY_STALENESS=5
+    )
+    def test_cache_of_one_process_keeps_availability_within_staleness_bound(self):
+        self.get_detail(2, "?tickets")
+        with self.assertNumQueries(0):
+            self.get_detail(2, "?tickets")
+
+        self.assertEqual(tickets_cache._timeout(True), 5)
+        self.assertEqual(tickets_cache._timeout(False), 300)
+
+    def test_payload_built_during_invalidation_is_not_kept(self):
+        def build_stale():
+            # the reservation commits while the payload is being built
+            self.reserve(1, 5)
+            return {"stale": True}
+
+        tickets_cache.event_detail(2, True, build_stale)
+
+        self.assertEqual(
+            tickets_cache.event_detail(2, True, lambda: {"stale": False}),
+            {"stale": False},
+        )
+
+    def test_ignored_query_parameters_share_cached_page(self):
+        first = self.get_list("?tickets&page_size=2&x=1")
+        with self.assertNumQueries(0):
+            second = self.get_list("?page_size=2&x=2&tickets")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 2)
+
+    def test_links_have_only_used_query_parameters(self):
+        factory = APIRequestFactory()
+        events_view = EventViewSet.as_view({"get": "list"})
+        response = events_view(factory.get(reverse("events-list") + "?page_size=2&x=1"))
+
+        self.assertIn("page_size=2", response.data["next"])
+        self.assertNotIn("x=1", response.data["next"])
@@ -55,3 +55,54 @@ class CartSerializerTest(TestCase):
         cart = CartSerializer(data=cart_data, many=True)
         with self.assertRaises(ValidationError):
             cart.is_valid(raise_exception=True)
+
+    def test_validation_cart_in_one_query(self):
+        cart_data = [{"ticket_type": pk, "quantity": 1} for pk in (1, 2, 3, 4)] * 10
+
+        cart = CartSerializer(data=cart_data, many=True)
+        with self.assertNumQueries(1):
+            self.assertTrue(cart.is_valid())
+
+    def test_validation_cart_merges_lines_of_same_ticket_type(self):
+        cart_data = [
+            {"ticket_type": 1, "quantity": 2},
+            {"ticket_type": 3, "quantity": 1},
+            {"ticket_type": "1", "quantity": 4},
+        ]
+        cart = CartSerializer(data=cart_data, many=True)
+
+        self.assertTrue(cart.is_valid())
+        self.assertEqual(
+            [
+                (item["ticket_type"].pk, item["quantity"])
+                for item in cart.validated_data
+            ],
+            [(1, 6), (3, 1)],
+        )
+
+    def test_validation_cart_lines_together_not_enough_qty(self):
+        TicketType.objects.filter(pk=1).update(sold=295)
+        cart_data = [
+            {"ticket_type": 1, "quantity": 3},
+            {"ticket_type": 1, "quantity": 3},
+        ]
+        cart = CartSerializer(data=cart_data, many=True)
+
+        self.assertFalse(cart.is_valid())
+        self.assertEqual(
+            cart.errors["non_field_errors"], ["Not enough tickets of ticket type 1"]
+        )
+
+    def test_validation_cart_invalid_ticket_type_ids(self):
+        cart_data = [
+            {"ticket_type": True, "quantity": 1},
+            {"ticket_type": "abc", "quantity": 1},
+            {"ticket_type": 22, "quantity": 1},
+        ]
+        cart = CartSerializer(data=cart_data, many=True)
+
+        self.assertFalse(cart.is_valid())
+        self.assertEqual(
+            [error["ticket_type"][0].code for error in cart.errors.values()],
+            ["incorrect_type", "incorrect_type", "does_not_exist"],
+        )
@@ -0,0 +1,114 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from tickets import inventory, reservations
+from tickets.models import TicketType
+
+
+@override_settings(TICKETS_CACHE_SHARED=True)
+class EventAvailabilityViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get(self, event_id, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(
+            reverse("event-availability", args=(event_id,)), **headers
+        )
+
+    def reserve(self, ticket_type_id, quantity):
+        cart = [
+            {
+                "ticket_type": TicketType.objects.get(pk=ticket_type_id),
+                "quantity": quantity,
+            }
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.create_order(cart)
+
+    def test_availability_of_event(self):
+        response = self.get(2)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["content-type"], "application/json")
+        self.assertEqual(
+            json.loads(response.content), {"1": 300, "2": 1000, "3": 20000}
+        )
+
+    def test_availability_is_read_with_one_query_and_cached(self):
+        with self.assertNumQueries(1):
+            self.get(2)
+        with self.assertNumQueries(0):
+            self.get(2)
+
+    def test_unchanged_availability_is_not_modified(self):
+        etag = self.get(2)["ETag"]
+
+        response = self.get(2, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_reservation_changes_etag(self):
+        etag = self.get(2)["ETag"]
+        self.reserve(1, 2)
+
+        response = self.get(2, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(json.loads(response.content)["1"], 298)
+
+    @override_settings(TICKETS_CACHE_SHARED=False)
+    def test_change_of_another_process_is_seen_by_next_poll(self):
+        etag = self.get(2)["ETag"]
+        # e.g. released by the expiry worker, the cache of this process isn't told
+        TicketType.objects.filter(pk=1).update(sold=7)
+
+        response = self.get(2, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["1"], 293)
+
+    @override_settings(
+        TICKETS_CACHE_SHARED=False, TICKETS_CACHE_AVAILABILITY_STALENESS=5
+    )
+    def test_cache_of_one_process_within_staleness_bound(self):
+        etag = self.get(2)["ETag"]
+        TicketType.objects.filter(pk=1).update(sold=7)
+
+        with self.assertNumQueries(0):
+            response = self.get(2, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_striped_ticket_type(self):
+        inventory.stripe(1, 4)
+        self.reserve(1, 5)
+        cache.clear()
+
+        response = self.get(2)
+
+        self.assertEqual(json.loads(response.content)["1"], 295)
+
+    def test_event_without_ticket_types(self):
+        response = self.get(1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {})
+
+    def test_non_existing_event(self):
+        response = self.get(88)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -3,20 +3,29 @@ import json
 from unittest import mock
 
 import pytz
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIRequestFactory
 
-from tickets.models import Event
+from tickets.models import Event, TicketType
 from tickets.serializers import EventSerializer
 from tickets.views import EventViewSet
 
+
+def first_page(results):
+    return {"next": None, "previous": None, "results": results}
+
+
 ### There is only information about get event details in documentation, so tests are only for get views.
 
 
 class EventViewsALLTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
     def test_get_all_events_empty_list(self):
         factory = APIRequestFactory()
         events_view = EventViewSet.as_view({"get": "list"})
@@ -25,7 +34,7 @@ class EventViewsALLTest(TestCase):
         response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(json.loads(response.content), [])
+        self.assertEqual(json.loads(response.content), first_page([]))
         self.assertEqual(response["content-type"], "application/json")
 
     def test_get_all_events(self):
@@ -61,7 +70,7 @@ class EventViewsALLTest(TestCase):
         response.render()
 
         events_serialized = EventSerializer(events, many=True).data
-        events_json = JSONRenderer().render(events_serialized)
+        events_json = JSONRenderer().render(first_page(events_serialized))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.content, events_json)
@@ -69,6 +78,9 @@ class EventViewsALLTest(TestCase):
 
 
 class EventViewsDetailsTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
     def test_get_details_non_existing_event(self):
         factory = APIRequestFactory()
         event_view = EventViewSet.as_view({"get": "retrieve"})
@@ -110,6 +122,9 @@ class EventViewShowTickets(TestCase):
         "tickets/unittests/fixtures/two_events_four_tickets.json",
     ]
 
+    def setUp(self) -> None:
+        cache.clear()
+
     def test_single_event_view_show_tickets(self):
         event = Event.objects.get(pk=2)
         factory = APIRequestFactory()
@@ -134,8 +149,46 @@ class EventViewShowTickets(TestCase):
         response.render()
 
         events_serialized = EventSerializer(events, many=True, nested=True).data
-        events_json = JSONRenderer().render(events_serialized)
+        events_json = JSONRenderer().render(first_page(events_serialized))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.content, events_json)
         self.assertEqual(response["content-type"], "application/json")
+
+
+class EventViewsNumberOfQueriesTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        date_event = datetime.datetime(2021, 10, 1, 18, 0, 0, tzinfo=pytz.utc)
+        for i in range(10):
+            event = Event.objects.create(
+                name=f"Best concert number {i}", date_event=date_event
+            )
+            for category in ("VIP", "GC", "NORMAL"):
+                TicketType.objects.create(
+                    event=event, category=category, price=199, qty=100
+                )
+
+    def test_list_events_with_tickets_number_of_queries(self):
+        factory = APIRequestFactory()
+        events_view = EventViewSet.as_view({"get": "list"})
+        request = factory.get(reverse("events-list") + "?tickets")
+
+        # events and ticket types of all events
+        with self.assertNumQueries(2):
+            response = events_view(request)
+            response.render()
+
+        self.assertEqual(len(json.loads(response.content)["results"]), 10)
+
+    def test_single_event_with_tickets_number_of_queries(self):
+        event = Event.objects.first()
+        factory = APIRequestFactory()
+        event_view = EventViewSet.as_view({"get": "retrieve"})
+        request = factory.get(reverse("events-detail", args=(event.pk,)) + "?tickets")
+
+        with self.assertNumQueries(2):
+            response = event_view(request, pk=event.pk)
+            response.render()
+
+        self.assertEqual(len(json.loads(response.content)["ticket_types"]), 3)
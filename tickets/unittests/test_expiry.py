@@ -0,0 +1,81 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.timezone import now
+
+from tickets import expiry, reservations
+from tickets.models import Order, Ticket, TicketType
+
+
+class ReleaseExpiredOrdersTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def make_order(self, expired=True, paid=Order.UNPAID):
+        cart = [
+            {"ticket_type": TicketType.objects.get(pk=1), "quantity": 2},
+            {"ticket_type": TicketType.objects.get(pk=2), "quantity": 1},
+        ]
+        order = reservations.create_order(cart)
+        Order.objects.filter(pk=order.pk).update(paid=paid)
+        if expired:
+            Order.objects.filter(pk=order.pk).update(
+                expired_at=now() - datetime.timedelta(minutes=1)
+            )
+        return order
+
+    def test_release_expired_orders(self):
+        expired_order = self.make_order()
+        valid_order = self.make_order(expired=False)
+        paid_order = self.make_order(paid=Order.PAID)
+
+        released = expiry.release_expired(batch_size=10)
+
+        self.assertEqual(released, (1, 3))
+        self.assertEqual(Order.objects.get(pk=expired_order.pk).paid, Order.EXPIRED)
+        self.assertEqual(Order.objects.get(pk=valid_order.pk).paid, Order.UNPAID)
+        self.assertEqual(Order.objects.get(pk=paid_order.pk).paid, Order.PAID)
+        self.assertFalse(
+            Ticket.objects.filter(order=expired_order)
+            .exclude(status=Ticket.RELEASED)
+            .exists()
+        )
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 4)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 2)
+
+    def test_release_expired_orders_in_batches(self):
+        for _ in range(5):
+            self.make_order()
+
+        self.assertEqual(expiry.release_expired(batch_size=2), (2, 6))
+        self.assertEqual(expiry.release_expired(batch_size=2), (2, 6))
+        self.assertEqual(expiry.release_expired(batch_size=2), (1, 3))
+        self.assertEqual(expiry.release_expired(batch_size=2), (0, 0))
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+
+    def test_release_expired_orders_command(self):
+        for _ in range(3):
+            self.make_order()
+
+        out = StringIO()
+        call_command("release_expired_orders", batch_size=2, interval=0, stdout=out)
+
+        self.assertIn("Released 3 orders and 9 tickets in 2 batches", out.getvalue())
+        self.assertIn("orders/s", out.getvalue())
+        self.assertEqual(Order.objects.filter(paid=Order.EXPIRED).count(), 3)
+
+    def test_command_rejects_empty_batches(self):
+        for batch_size in (0, -1):
+            with self.assertRaisesMessage(CommandError, "at least 1"):
+                call_command(
+                    "release_expired_orders",
+                    batch_size=batch_size,
+                    interval=0,
+                    stdout=StringIO(),
+                )
@@ -0,0 +1,180 @@
+import csv
+import json
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+
+from tickets import export, payments, reservations
+from tickets.models import Order, Ticket, TicketType
+
+
+class ExportTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.first = self.order((1, 2), (2, 1))
+        self.second = self.order((3, 1))
+        self.order((4, 3))
+        payments.confirm([self.first.pk])
+        Order.objects.filter(pk=self.second.pk).update(
+            created_at=now() - timedelta(days=2)
+        )
+
+    def order(self, *lines):
+        return reservations.create_order(
+            [
+                {"ticket_type": TicketType.objects.get(pk=pk), "quantity": quantity}
+                for pk, quantity in lines
+            ]
+        )
+
+    def get(self, event_id=2, query=""):
+        return self.client.get(reverse("event-export", args=(event_id,)) + query)
+
+    def test_csv(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["content-type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            response["content-disposition"],
+            'attachment; filename="event-2-tickets.csv"',
+        )
+        rows = list(
+            csv.DictReader(StringIO(b"".join(response.streaming_content).decode()))
+        )
+        self.assertEqual(
+            [(int(row["order_id"]), row["ticket_type_id"]) for row in rows],
+            [
+                (self.first.pk, "1"),
+                (self.first.pk, "1"),
+                (self.first.pk, "2"),
+                (self.second.pk, "3"),
+            ],
+        )
+        self.first.refresh_from_db()
+        self.assertEqual(rows[0]["order_paid"], Order.PAID)
+        self.assertEqual(rows[0]["order_paid_date"], self.first.paid_date.isoformat())
+        self.assertEqual(rows[0]["ticket_status"], Ticket.SOLD)
+        self.assertEqual(rows[0]["ticket_type_price"], "999.99")
+        self.assertEqual(rows[3]["order_paid_date"], "")
+
+    def test_ndjson(self):
+        response = self.get(query="?format=ndjson")
+
+        self.assertEqual(response["content-type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(list(rows[0]), export.HEADER)
+        self.assertEqual(rows[3]["order_id"], self.second.pk)
+        self.assertEqual(rows[3]["ticket_status"], Ticket.RESERVED)
+        self.assertIsNone(rows[3]["order_paid_date"])
+
+    def test_orders_between_since_and_until(self):
+        yesterday = (now() - timedelta(days=1)).date().isoformat()
+
+        recent = self.get(query=f"?format=ndjson&since={yesterday}")
+        older = self.get(query=f"?format=ndjson&until={yesterday}")
+
+        self.assertEqual(
+            {json.loads(line)["order_id"] for line in recent.streaming_content},
+            {self.first.pk},
+        )
+        self.assertEqual(
+            {json.loads(line)["order_id"] for line in older.streaming_content},
+            {self.second.pk},
+        )
+
+    def test_invalid_parameters(self):
+        response = self.get(query="?format=xml&since=yesterday")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.json()), {"format", "since"})
+
+    def test_non_existing_event(self):
+        self.assertEqual(self.get(88).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_command(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "tickets.csv"
+            call_command("export_tickets", 2, output=str(path))
+            content = path.read_bytes().decode()
+
+        out = StringIO()
+        call_command("export_tickets", 2, stdout=out)
+        self.assertEqual(out.getvalue(), content)
+        self.assertEqual(content.splitlines()[0], ",".join(export.HEADER))
+        self.assertEqual(len(content.splitlines()), 5)
+
+        with self.assertRaises(CommandError):
+            call_command("export_tickets", 2, since="yesterday")
+
+
+@override_settings(TICKETS_EXPORT_CHUNK_SIZE=100)
+class ExportMemoryTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def add_tickets(self, count):
+        order = Order.objects.create()
+        Ticket.objects.bulk_create(Ticket(type_id=3, order=order) for _ in range(count))
+
+    def peak_memory(self):
+        tracemalloc.start()
+        try:
+            for _ in export.lines("ndjson", 2):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_rows(self):
+        self.add_tickets(2000)
+        small = self.peak_memory()
+        self.add_tickets(8000)
+
+        for disabled in (False, True):
+            with self.subTest(disable_server_side_cursors=disabled):
+                with mock.patch.dict(
+                    connection.settings_dict,
+                    {"DISABLE_SERVER_SIDE_CURSORS": disabled},
+                ):
+                    large = self.peak_memory()
+
+                self.assertLess(large, small * 1.5)
+
+    def test_rows_are_read_in_chunks(self):
+        for count in (150, 1, 99):
+            self.add_tickets(count)
+
+        # 250 rows, the last chunk is not full
+        with self.assertNumQueries(3):
+            exported = list(export.rows(2))
+
+        self.assertEqual(
+            [(row[0], row[export.TICKET_ID]) for row in exported],
+            list(
+                Ticket.objects.order_by("order_id", "pk").values_list("order_id", "pk")
+            ),
+        )
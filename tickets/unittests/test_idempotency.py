@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from concurrent import futures
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import backends, idempotency
+from tickets.models import IdempotencyKey, Order, Ticket, TicketType
+from tickets.views import OrderListView
+
+
+def post_cart(cart, key=None):
+    factory = APIRequestFactory()
+    headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+    request = factory.post(
+        reverse("order-list"),
+        json.dumps(cart),
+        content_type="application/json",
+        **headers,
+    )
+    response = OrderListView.as_view()(request)
+    response.render()
+    return response
+
+
+class IdempotencyKeyTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.cart = [{"ticket_type": 1, "quantity": 2}]
+
+    def test_retry_gets_original_response(self):
+        first = post_cart(self.cart, "order-1")
+
+        with self.assertNumQueries(1):
+            retry = post_cart(self.cart, "order-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 2)
+
+    def test_different_keys_make_different_orders(self):
+        post_cart(self.cart, "order-1")
+        post_cart(self.cart, "order-2")
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_for_another_cart(self):
+        post_cart(self.cart, "order-1")
+
+        response = post_cart([{"ticket_type": 2, "quantity": 1}], "order-1")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        TicketType.objects.filter(pk=1).update(sold=299)
+        failed = post_cart(self.cart, "order-1")
+        TicketType.objects.filter(pk=1).update(sold=0)
+
+        response = post_cart(self.cart, "order-1")
+
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_integrity_error_of_request_is_raised(self):
+        def handle():
+            raise IntegrityError("duplicate key value violates unique constraint")
+
+        with self.assertRaises(IntegrityError):
+            idempotency.run("order-1", self.cart, handle)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_makes_new_order(self):
+        post_cart(self.cart, "order-1")
+        IdempotencyKey.objects.update(expired_at=now() - timedelta(seconds=1))
+
+        response = post_cart(self.cart, "order-1")
+
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_too_long_key(self):
+        response = post_cart(self.cart, "k" * 256)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_expired_keys_are_deleted_by_expiry_worker(self):
+        for key in ("order-1", "order-2", "order-3"):
+            post_cart(self.cart, key)
+        IdempotencyKey.objects.exclude(key="order-3").update(
+            expired_at=now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+
+        call_command("release_expired_orders", batch_size=1, interval=0, stdout=out)
+
+        self.assertIn("Deleted 2 expired idempotency keys", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["order-3"]
+        )
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class IdempotencyKeyRaceTest(TransactionTestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def test_duplicate_waits_for_first_request(self):
+        entered = threading.Event()
+        finish = threading.Event()
+        create_order = backends.DatabaseBackend.create_order
+        calls = []
+
+        def slow_create_order(backend, cart):
+            calls.append(cart)
+            entered.set()
+            finish.wait(5)
+            return create_order(backend, cart)
+
+        def request():
+            try:
+                return post_cart([{"ticket_type": 1, "quantity": 1}], "order-1")
+            finally:
+                connection.close()
+
+        with mock.patch.object(
+            backends.DatabaseBackend, "create_order", slow_create_order
+        ), futures.ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(request)
+            entered.wait(5)
+            duplicate = executor.submit(request)
+            time.sleep(0.2)
+            self.assertFalse(duplicate.done())
+            finish.set()
+            first, duplicate = first.result(), duplicate.result()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(duplicate.content, first.content)
+        self.assertEqual(duplicate["Idempotent-Replayed"], "true")
+        self.assertEqual(Ticket.objects.count(), 1)
@@ -0,0 +1,220 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import imports
+from tickets.models import Event, TicketType
+from tickets.views import InventoryImportView
+
+CSV = """event,event_name,event_date,category,price,qty
+,Woodstock Festival,2027-08-15T12:00:00Z,Day pass,150.00,20000
+,Woodstock Festival,2027-08-15T12:00:00Z,Camping,80.50,5000
+,Monterey Pop Festival,2027-06-16T18:00:00,Standing,45,3000
+2,,,Balcony,120,40
+"""
+
+
+class InventoryImportViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def post(self, content, content_type="application/json"):
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("inventory-import"), content, content_type=content_type
+        )
+        response = InventoryImportView.as_view()(request)
+        response.render()
+        return response
+
+    def test_import_csv(self):
+        response = self.post(CSV, "text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content), {"events": 2, "ticket_types": 4})
+        woodstock = Event.objects.get(name="Woodstock Festival")
+        self.assertEqual(
+            list(
+                woodstock.ticket_types.order_by("pk").values_list(
+                    "category", "price", "qty"
+                )
+            ),
+            [("Day pass", 150, 20000), ("Camping", 80.5, 5000)],
+        )
+        self.assertTrue(
+            TicketType.objects.filter(event=2, category="Balcony", qty=40).exists()
+        )
+
+    def test_import_json(self):
+        rows = [
+            {
+                "event_name": "Isle of Wight Festival",
+                "event_date": "2027-08-26T16:00:00Z",
+                "category": "Weekend",
+                "price": 99.99,
+                "qty": 600,
+            },
+            {"event": 3, "category": "Standing", "price": "25", "qty": "100"},
+        ]
+
+        response = self.post(json.dumps(rows))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            TicketType.objects.get(category="Weekend").event.name,
+            "Isle of Wight Festival",
+        )
+        self.assertEqual(TicketType.objects.get(category="Standing").event_id, 3)
+
+    def test_invalid_rows_are_reported_and_nothing_is_imported(self):
+        rows = [
+            {"event": 88, "category": "Balcony", "price": 10, "qty": 1},
+            {"event_name": "Live", "event_date": "soon", "price": 1.005, "qty": -1},
+            {"event": 2, "category": "Balcony", "price": 10, "qty": 1},
+            {"event": 2, "event_name": "Woodstock", "category": "x", "price": 1},
+            "row",
+        ]
+
+        response = self.post(json.dumps(rows))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = json.loads(response.content)["errors"]
+        self.assertEqual([error["row"] for error in errors], [1, 2, 4, 5])
+        self.assertEqual(set(errors[0]["errors"]), {"event"})
+        self.assertEqual(
+            set(errors[1]["errors"]),
+            {"event_name", "event_date", "category", "price", "qty"},
+        )
+        self.assertEqual(set(errors[2]["errors"]), {"event", "qty"})
+        self.assertEqual(TicketType.objects.count(), 4)
+
+    def test_numbers_out_of_range_of_columns(self):
+        rows = [
+            {"event": 2, "category": "Balcony", "price": 10, "qty": 10**12},
+            {"event": 10**12, "category": "Balcony", "price": 10, "qty": 1},
+        ]
+
+        response = self.post(json.dumps(rows))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = json.loads(response.content)["errors"]
+        self.assertEqual(
+            [set(error["errors"]) for error in errors], [{"qty"}, {"event"}]
+        )
+
+    def test_invalid_request(self):
+        for content in ("[]", "{}", '"rows"'):
+            response = self.post(content)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TICKETS_IMPORT_MAX_ROWS=2)
+    def test_too_many_rows(self):
+        response = self.post(CSV, "text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TICKETS_IMPORT_BATCH_SIZE=100)
+    def test_rows_are_inserted_in_batches(self):
+        rows = [
+            {
+                "event_name": f"Festival day {i // 10}",
+                "event_date": "2027-08-15T12:00:00Z",
+                "category": f"Stage {i % 10}",
+                "price": 10,
+                "qty": 100,
+            }
+            for i in range(1000)
+        ]
+
+        # savepoint, INSERT of events, 10 INSERTs of ticket types, release of
+        # savepoint, no event ids are looked up
+        with self.assertNumQueries(13):
+            response = self.post(json.dumps(rows))
+
+        self.assertEqual(
+            json.loads(response.content), {"events": 100, "ticket_types": 1000}
+        )
+
+
+class ImportInventoryCommandTest(TestCase):
+
+    fixtures = ["tickets/unittests/fixtures/events.json"]
+
+    def call(self, name, content):
+        out = StringIO()
+        err = StringIO()
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / name
+            path.write_text(content)
+            call_command("import_inventory", str(path), stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        out, _ = self.call("inventory.csv", CSV)
+
+        self.assertIn("Imported 2 events and 4 ticket types", out)
+
+    def test_import_json(self):
+        rows = [{"event": 1, "category": "Balcony", "price": 120, "qty": 40}]
+
+        out, _ = self.call("inventory.json", json.dumps(rows))
+
+        self.assertIn("Imported 0 events and 1 ticket types", out)
+
+    def test_invalid_rows(self):
+        with self.assertRaisesMessage(CommandError, "1 invalid rows"):
+            self.call("inventory.csv", CSV.replace("80.50", "eighty"))
+
+        self.assertFalse(Event.objects.filter(name="Woodstock Festival").exists())
+
+
+class CheckRowTest(TestCase):
+    def test_row_of_new_event(self):
+        errors = {}
+
+        fields = imports._check(
+            {
+                "event_name": " Woodstock ",
+                "event_date": "2027-08-15T12:00:00+02:00",
+                "category": "Day pass",
+                "price": "150.5",
+                "qty": "20000",
+            },
+            errors,
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual(fields["event_name"], "Woodstock")
+        self.assertEqual(fields["event_date"].utcoffset().total_seconds(), 7200)
+        self.assertEqual(str(fields["price"]), "150.5")
+        self.assertEqual(fields["qty"], 20000)
+
+    def test_invalid_values(self):
+        for field, value in (
+            ("event", "two"),
+            ("event", True),
+            ("price", "1e10"),
+            ("price", "NaN"),
+            ("qty", 1.5),
+            ("qty", 10**12),
+            ("qty", str(imports.QTY_MAX + 1)),
+            ("category", "x" * 51),
+        ):
+            errors = {}
+            row = {"event": 2, "category": "Balcony", "price": 1, "qty": 1}
+
+            imports._check({**row, field: value}, errors)
+
+            self.assertIn(field, errors)
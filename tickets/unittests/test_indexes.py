@@ -0,0 +1,75 @@
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+
+from tickets.models import Event, Order, Ticket, TicketType
+
+# Plans are checked on tables filled like after a few busy on-sale days: most orders
+# are already paid or expired, tickets are spread over many ticket types.
+
+
+class HotQueriesIndexesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        date_event = now() + datetime.timedelta(days=30)
+        events = Event.objects.bulk_create(
+            Event(name=f"Event number {i}", date_event=date_event) for i in range(1000)
+        )
+        ticket_types = TicketType.objects.bulk_create(
+            TicketType(event=event, category=category, price=Decimal("99.99"), qty=500)
+            for event in events
+            for category in ("VIP", "GC", "NORMAL")
+        )
+
+        created = now() - datetime.timedelta(days=2)
+        orders = Order.objects.bulk_create(
+            Order(
+                expired_at=created + datetime.timedelta(minutes=15),
+                paid=Order.UNPAID if i % 100 == 0 else Order.PAID,
+                paid_date=None if i % 100 == 0 else created,
+            )
+            for i in range(10000)
+        )
+        Ticket.objects.bulk_create(
+            (
+                Ticket(
+                    type=ticket_types[i % len(ticket_types)],
+                    order=orders[i % len(orders)],
+                    status=Ticket.SOLD,
+                )
+                for i in range(30000)
+            ),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.ticket_type = ticket_types[5]
+        cls.event = events[7]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_unpaid_expired_orders_use_partial_index(self):
+        queryset = Order.objects.filter(
+            paid=Order.UNPAID, expired_at__lte=now()
+        ).order_by("expired_at")[:500]
+        self.assertUsesIndex(queryset, "order_unpaid_expired_idx")
+
+    def test_paid_orders_by_date_use_index(self):
+        queryset = Order.objects.filter(
+            paid=Order.PAID, paid_date__gte=now() - datetime.timedelta(hours=1)
+        )
+        self.assertUsesIndex(queryset, "order_paid_date_idx")
+
+    def test_tickets_by_type_and_status_use_index(self):
+        queryset = Ticket.objects.filter(type=self.ticket_type, status=Ticket.RESERVED)
+        self.assertUsesIndex(queryset, "ticket_type_status_idx")
+
+    def test_ticket_types_by_event_use_index(self):
+        queryset = TicketType.objects.filter(event=self.event).order_by("created_at")
+        self.assertUsesIndex(queryset, "tickettype_event_created_idx")
@@ -0,0 +1,248 @@
+from concurrent import futures
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from tickets import inventory, reservations
+from tickets.models import InventoryStripe, Order, Ticket, TicketType
+from tickets.serializers import CartSerializer
+
+
+class InventoryTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.ticket_type = TicketType.objects.get(pk=1)
+        self.order = Order()
+        self.order.save()
+
+    def test_claim_increases_sold_counter(self):
+        self.assertTrue(inventory.claim(self.ticket_type.pk, 5))
+        self.ticket_type.refresh_from_db()
+
+        self.assertEqual(self.ticket_type.sold, 5)
+        self.assertEqual(self.ticket_type.tickets_available, self.ticket_type.qty - 5)
+
+    def test_claim_more_than_available(self):
+        self.assertTrue(inventory.claim(self.ticket_type.pk, self.ticket_type.qty))
+        self.assertFalse(inventory.claim(self.ticket_type.pk, 1))
+        self.ticket_type.refresh_from_db()
+
+        self.assertEqual(self.ticket_type.tickets_available, 0)
+
+    def test_release_decreases_sold_counter(self):
+        inventory.claim(self.ticket_type.pk, 5)
+        inventory.release(self.ticket_type.pk, 2)
+        self.ticket_type.refresh_from_db()
+
+        self.assertEqual(self.ticket_type.sold, 3)
+
+    def test_ticket_save_and_delete_update_counter(self):
+        ticket = Ticket.objects.create(type=self.ticket_type, order=self.order)
+        self.ticket_type.refresh_from_db()
+        self.assertEqual(self.ticket_type.sold, 1)
+
+        ticket.delete()
+        self.ticket_type.refresh_from_db()
+        self.assertEqual(self.ticket_type.sold, 0)
+
+    def test_ticket_save_when_sold_out(self):
+        inventory.claim(self.ticket_type.pk, self.ticket_type.qty)
+
+        with self.assertRaises(Exception):
+            Ticket.objects.create(type=self.ticket_type, order=self.order)
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_release_tickets(self):
+        for _ in range(3):
+            Ticket.objects.create(type=self.ticket_type, order=self.order)
+        Ticket.objects.create(type=TicketType.objects.get(pk=2), order=self.order)
+
+        released = inventory.release_tickets(Ticket.objects.filter(order=self.order))
+        # released tickets are not given back twice
+        released_again = inventory.release_tickets(
+            Ticket.objects.filter(order=self.order)
+        )
+
+        self.assertEqual(released, 4)
+        self.assertEqual(released_again, 0)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 0)
+        self.assertFalse(Ticket.objects.exclude(status=Ticket.RELEASED).exists())
+
+    def test_rebuild_inventory_command(self):
+        for _ in range(3):
+            Ticket.objects.create(type=self.ticket_type, order=self.order)
+        Ticket.objects.create(
+            type=self.ticket_type, order=self.order, status=Ticket.RELEASED
+        )
+        TicketType.objects.update(sold=50)
+
+        out = StringIO()
+        call_command("rebuild_inventory", stdout=out)
+
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 3)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 0)
+        self.assertIn("4 ticket types", out.getvalue())
+
+
+class StripedInventoryTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.order = Order()
+        self.order.save()
+
+    def stripes(self, ticket_type_id=1):
+        return list(
+            InventoryStripe.objects.filter(ticket_type=ticket_type_id)
+            .order_by("index")
+            .values_list("qty", "sold")
+        )
+
+    def test_stripe_splits_capacity_and_sold_tickets(self):
+        TicketType.objects.filter(pk=1).update(sold=10)
+
+        inventory.stripe(1, 4)
+
+        ticket_type = TicketType.objects.get(pk=1)
+        self.assertEqual(ticket_type.stripe_count, 4)
+        self.assertEqual(ticket_type.sold, 0)
+        self.assertEqual(self.stripes(), [(75, 3), (75, 3), (75, 2), (75, 2)])
+        self.assertEqual(ticket_type.tickets_available, 290)
+
+    def test_availability_of_striped_ticket_types_without_query_per_type(self):
+        inventory.stripe(1, 4)
+        inventory.stripe(2, 2)
+        inventory.claim(1, 5, 4)
+        cart = [
+            {"ticket_type": pk, "quantity": quantity}
+            for pk, quantity in ((1, 295), (2, 1000), (3, 1))
+        ]
+
+        with self.assertNumQueries(1):
+            ticket_types = list(
+                TicketType.objects.annotate(available=inventory.available()).order_by(
+                    "pk"
+                )
+            )
+            self.assertEqual(
+                [ticket_type.tickets_available for ticket_type in ticket_types],
+                [295, 1000, 20000, 10000],
+            )
+        with self.assertNumQueries(1):
+            self.assertTrue(CartSerializer(data=cart, many=True).is_valid())
+
+    def test_restripe_and_merge_keep_sold_tickets(self):
+        inventory.stripe(1, 4)
+        inventory.claim(1, 7)
+
+        inventory.stripe(1, 3)
+        self.assertEqual(sum(sold for _, sold in self.stripes()), 7)
+
+        inventory.stripe(1, 0)
+        ticket_type = TicketType.objects.get(pk=1)
+        self.assertEqual((ticket_type.stripe_count, ticket_type.sold), (0, 7))
+        self.assertEqual(self.stripes(), [])
+
+    def test_claim_takes_tickets_from_one_stripe(self):
+        inventory.stripe(1, 4)
+
+        self.assertTrue(inventory.claim(1, 5))
+
+        self.assertEqual(sorted(sold for _, sold in self.stripes()), [0, 0, 0, 5])
+        self.assertEqual(TicketType.objects.get(pk=1).tickets_available, 295)
+
+    def test_claim_falls_back_to_several_stripes(self):
+        inventory.stripe(1, 3)
+        InventoryStripe.objects.filter(ticket_type=1).update(sold=98)
+
+        # no stripe has 5 tickets left, together they have 6
+        self.assertTrue(inventory.claim(1, 5, stripe_count=3))
+        self.assertFalse(inventory.claim(1, 2, stripe_count=3))
+
+        self.assertEqual(TicketType.objects.get(pk=1).tickets_available, 1)
+
+    def test_release_gives_tickets_back_to_stripes(self):
+        inventory.stripe(1, 2)
+        inventory.claim(1, 3)
+        inventory.claim(1, 3)
+
+        inventory.release(1, 5)
+
+        self.assertEqual(sum(sold for _, sold in self.stripes()), 1)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+
+    def test_orders_and_expiry_of_striped_ticket_type(self):
+        inventory.stripe(1, 4)
+        cart = [
+            {"ticket_type": TicketType.objects.get(pk=1), "quantity": 3},
+            {"ticket_type": TicketType.objects.get(pk=2), "quantity": 2},
+        ]
+
+        with transaction.atomic():
+            order = reservations.create_order(cart)
+            reservations.create_orders([cart, cart])
+
+        self.assertEqual(TicketType.objects.get(pk=1).tickets_available, 291)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 6)
+
+        inventory.release_tickets(Ticket.objects.filter(order=order))
+        self.assertEqual(TicketType.objects.get(pk=1).tickets_available, 294)
+
+    def test_rebuild_striped_ticket_type(self):
+        inventory.stripe(1, 2)
+        for _ in range(3):
+            Ticket.objects.create(type_id=1, order=self.order)
+        InventoryStripe.objects.update(sold=40)
+
+        inventory.rebuild()
+
+        self.assertEqual(self.stripes(), [(150, 2), (150, 1)])
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 0)
+
+    def test_stripe_inventory_command(self):
+        out = StringIO()
+        call_command("stripe_inventory", "1", "8", stdout=out)
+
+        self.assertEqual(len(self.stripes()), 8)
+        self.assertIn("Ticket type 1 has 8 stripes", out.getvalue())
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class StripedInventoryRaceTest(TransactionTestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def test_concurrent_claims_do_not_oversell_stripes(self):
+        TicketType.objects.filter(pk=1).update(qty=50)
+        inventory.stripe(1, 4)
+
+        with futures.ThreadPoolExecutor(max_workers=12) as executor:
+            claimed = list(executor.map(claim_in_transaction, [1, 2, 3] * 20))
+
+        sold = sum(quantity for quantity, ok in zip([1, 2, 3] * 20, claimed) if ok)
+        self.assertEqual(sold, 50 - TicketType.objects.get(pk=1).tickets_available)
+        self.assertLessEqual(sold, 50)
+        self.assertGreaterEqual(sold, 48)
+
+
+def claim_in_transaction(quantity):
+    try:
+        with transaction.atomic():
+            return inventory.claim(1, quantity)
+    finally:
+        connection.close()
@@ -0,0 +1,96 @@
+import timeit
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from tickets.metrics import Histogram, registry
+from tickets.middleware import MetricsMiddleware
+
+
+class HistogramTest(SimpleTestCase):
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5, 10))
+        for value in (0, 1, 3, 7, 50):
+            histogram.observe(value)
+
+        self.assertEqual(
+            list(histogram.cumulative()), [(1, 2), (5, 3), (10, 4), ("+Inf", 5)]
+        )
+        self.assertEqual((histogram.count, histogram.sum), (5, 61))
+
+
+class MetricsMiddlewareTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        registry.reset()
+
+    @override_settings(TICKETS_METRICS_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        with self.assertLogs("tickets.metrics", "INFO") as logs:
+            response = self.client.get(
+                reverse("tickets-type-for-event-list", args=(2,))
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-DB-Queries"], "2")
+        self.assertRegex(
+            response["Server-Timing"], r"^total;dur=[\d.]+, db;dur=[\d.]+$"
+        )
+        self.assertEqual(logs.records[0].view, "tickets-type-for-event-list")
+        self.assertEqual(logs.records[0].queries, 2)
+
+        text = self.client.get("/api/metrics").content.decode()
+        labels = 'view="tickets-type-for-event-list",method="GET"'
+        self.assertIn(f'tickets_requests_total{{{labels},status="200"}} 1', text)
+        self.assertIn(f'tickets_request_queries_bucket{{{labels},le="1"}} 0', text)
+        self.assertIn(f'tickets_request_queries_bucket{{{labels},le="2"}} 1', text)
+        self.assertIn(f"tickets_request_duration_seconds_count{{{labels}}} 1", text)
+        self.assertIn(f"tickets_request_db_seconds_total{{{labels}}}", text)
+
+    @override_settings(TICKETS_METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        response = self.client.get(reverse("tickets-type-for-event-list", args=(2,)))
+
+        self.assertNotIn("X-DB-Queries", response)
+        self.assertEqual(registry.requests, {})
+
+    def test_metrics_content_type(self):
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["content-type"], "text/plain; version=0.0.4")
+
+    @override_settings(TICKETS_METRICS_SAMPLE_RATE=0)
+    def test_overhead_when_sampling_off(self):
+        response = HttpResponse()
+        middleware = MetricsMiddleware(lambda request: response)
+
+        overhead = min(timeit.repeat(lambda: middleware(None), number=1000, repeat=5))
+
+        # seconds for 1000 calls, microseconds per call
+        self.assertLess(overhead, 0.005)
+
+    @override_settings(TICKETS_METRICS_SAMPLE_RATE=1)
+    async def test_sampled_async_request(self):
+        response = await self.async_client.get(
+            reverse("async-tickets-type-for-event-list", args=(2,))
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # queries run in threads of sync_to_async are counted
+        self.assertEqual(response["X-DB-Queries"], "2")
+
+    def test_async_chain_stays_async(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: None)))
@@ -0,0 +1,100 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets.models import Order, Ticket, TicketType
+from tickets.views import OrderBatchView
+
+
+class OrderBatchViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def post_carts(self, carts):
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-batch"), json.dumps(carts), content_type="application/json"
+        )
+        response = OrderBatchView.as_view()(request)
+        response.render()
+        return response
+
+    def test_make_orders(self):
+        carts = [
+            [{"ticket_type": 1, "quantity": 2}, {"ticket_type": 2, "quantity": 3}],
+            [{"ticket_type": 4, "quantity": 1}],
+        ]
+
+        response = self.post_carts(carts)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)
+        self.assertEqual([result["status"] for result in results], [201, 201])
+        first = Order.objects.get(pk=results[0]["order"]["id"])
+        self.assertEqual(first.total, Decimal("999.99") * 2 + Decimal("499.99") * 3)
+        self.assertIsNotNone(first.expired_at)
+        self.assertEqual(first.tickets.count(), 5)
+        self.assertEqual(Ticket.objects.filter(type=4).count(), 1)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 3)
+
+    def test_sold_out_and_invalid_carts_do_not_stop_others(self):
+        TicketType.objects.filter(pk=1).update(sold=297)
+        carts = [
+            [{"ticket_type": 1, "quantity": 2}],
+            [{"ticket_type": 1, "quantity": 2}, {"ticket_type": 2, "quantity": 1}],
+            [{"ticket_type": 88, "quantity": 1}],
+            [],
+            [{"ticket_type": 1, "quantity": 1}, {"ticket_type": 3, "quantity": 4}],
+        ]
+
+        response = self.post_carts(carts)
+
+        results = json.loads(response.content)
+        self.assertEqual(
+            [result["status"] for result in results], [201, 409, 400, 400, 201]
+        )
+        self.assertEqual(results[1]["errors"], {"detail": "Not enough tickets"})
+        self.assertEqual(Order.objects.count(), 2)
+        # sold out cart keeps no ticket of its other lines
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 300)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 0)
+        self.assertEqual(Ticket.objects.filter(type=3).count(), 4)
+
+    def test_number_of_queries_not_depend_on_number_of_carts(self):
+        carts = [
+            [{"ticket_type": 1, "quantity": 1}, {"ticket_type": 2, "quantity": 2}]
+            for _ in range(20)
+        ]
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-batch"), json.dumps(carts), content_type="application/json"
+        )
+
+        # ticket types, savepoint, lock, counters, orders, tickets, sales summary
+        # and release of savepoint, the same for any number of carts
+        with self.assertNumQueries(8):
+            response = OrderBatchView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertEqual(Ticket.objects.count(), 60)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 40)
+
+    def test_not_a_list_of_carts(self):
+        response = self.post_carts({"ticket_type": 1, "quantity": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TICKETS_ORDER_BATCH_MAX=2)
+    def test_too_many_carts(self):
+        response = self.post_carts([[{"ticket_type": 1, "quantity": 1}]] * 3)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
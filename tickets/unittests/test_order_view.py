@@ -2,14 +2,17 @@ import json
 import random
 from concurrent import futures
 from decimal import Decimal
+from unittest import mock
 
+from django.db import connection
 from django.http import QueryDict
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIRequestFactory
 
 from tickets.models import Order, Ticket, TicketType
+from tickets.serializers import CartListSerializer, CartSerializer
 from tickets.views import OrderListView
 
 
@@ -61,6 +64,9 @@ class OrderViewListTest(TestCase):
                 TicketType.objects.get(pk=item["ticket_type"]).price * item["quantity"]
             )
 
+        self.assertEqual(Decimal(json.loads(response.render().content)["total"]), total)
+        self.assertEqual(Order.objects.get().total, total)
+
     def test_make_order_check_if_creates_tickets(self):
         factory = APIRequestFactory()
         order_view = OrderListView.as_view()
@@ -77,6 +83,27 @@ class OrderViewListTest(TestCase):
                 item["quantity"],
             )
 
+    def test_make_order_number_of_queries_not_depend_on_quantity(self):
+        cart = [
+            {"ticket_type": 1, "quantity": 10},
+            {"ticket_type": 2, "quantity": 25},
+        ]
+        factory = APIRequestFactory()
+        order_view = OrderListView.as_view()
+        request = factory.post(
+            reverse("order-list"),
+            json.dumps(cart),
+            content_type="application/json",
+        )
+        # ticket types, 2 counters, order, tickets, sales summary and savepoint
+        with self.assertNumQueries(8):
+            response = order_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(type=1).count(), 10)
+        self.assertEqual(Ticket.objects.filter(type=2).count(), 25)
+        self.assertEqual(TicketType.objects.get(pk=2).sold, 25)
+
     def test_order_with_invalid_cart(self):
         cart = [
             {"tickettype": 6, "qty": 3},
@@ -122,32 +149,83 @@ class OrderViewListTest(TestCase):
         self.assertEqual(response["content-type"], "application/json")
 
 
-# class OrderRaceTest(TestCase):
-#
-#     fixtures = [
-#             "tickets/unittests/fixtures/events.json",
-#             "tickets/unittests/fixtures/two_events_four_tickets.json",
-#         ]
-#     def test_check_race_condition_if_not_creates_too_much_tickets(self):
-#
-#         carts = []
-#         total_tickets = 0
-#         for i in range(20):
-#             ticket_by_round = random.randint(1,10)
-#             total_tickets+=ticket_by_round
-#             carts.append([{"ticket_type": 1, "quantity": ticket_by_round}, {"ticket_type": 2, "quantity": random.randint(1,2)}])
-#         executor =futures.ProcessPoolExecutor(max_workers=2)
-#         results= [executor.submit(make_order_requests, cart) for cart in carts]
-#         executor.shutdown(wait=True)
-#
-#
-#
-# def make_order_requests(cart):
-#     factory = APIRequestFactory()
-#     order_view = OrderListView.as_view()
-#     request = factory.post(
-#         reverse("order-list"), json.dumps(cart), content_type="application/json"
-#     )
-#     response = order_view(request)
-#     response.render()
-#     return response.content
+class OrderSoldOutTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def test_order_when_tickets_sold_out_during_reservation(self):
+        cart = [{"ticket_type": 1, "quantity": 2}]
+        factory = APIRequestFactory()
+        order_view = OrderListView.as_view()
+        request = factory.post(
+            reverse("order-list"),
+            json.dumps(cart),
+            content_type="application/json",
+        )
+        TicketType.objects.filter(pk=1).update(sold=299)
+        # cart was validated before other order took the tickets
+        with mock.patch.object(
+            CartSerializer, "validate", lambda self, data: data
+        ), mock.patch.object(CartListSerializer, "validate", lambda self, attrs: attrs):
+            response = order_view(request)
+        response.render()
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.all().count(), 0)
+        self.assertEqual(Ticket.objects.all().count(), 0)
+        self.assertEqual(TicketType.objects.get(pk=1).sold, 299)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class OrderRaceTest(TransactionTestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def test_check_race_condition_if_not_creates_too_much_tickets(self):
+        TicketType.objects.filter(pk=1).update(qty=50)
+        carts = []
+        for i in range(60):
+            carts.append(
+                [
+                    {"ticket_type": 2, "quantity": random.randint(1, 2)},
+                    {"ticket_type": 1, "quantity": random.randint(1, 3)},
+                ]
+            )
+
+        with futures.ThreadPoolExecutor(max_workers=12) as executor:
+            codes = list(executor.map(make_order_request, carts))
+
+        ticket_type = TicketType.objects.get(pk=1)
+        self.assertLessEqual(ticket_type.sold, ticket_type.qty)
+        self.assertEqual(ticket_type.sold, Ticket.objects.filter(type=1).count())
+        self.assertEqual(
+            TicketType.objects.get(pk=2).sold, Ticket.objects.filter(type=2).count()
+        )
+        self.assertEqual(Order.objects.count(), codes.count(status.HTTP_201_CREATED))
+        self.assertLessEqual(
+            set(codes),
+            {
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+            },
+        )
+
+
+def make_order_request(cart):
+    factory = APIRequestFactory()
+    order_view = OrderListView.as_view()
+    request = factory.post(
+        reverse("order-list"), json.dumps(cart), content_type="application/json"
+    )
+    try:
+        response = order_view(request)
+        return response.status_code
+    finally:
+        connection.close()
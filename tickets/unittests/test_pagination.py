@@ -0,0 +1,112 @@
+import datetime
+import json
+from unittest import mock
+
+import pytz
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from tickets import reservations
+from tickets.models import Event, TicketType
+from tickets.views import (
+    EventViewSet,
+    OrderListView,
+    TicketTypeListView,
+    TicketTypeViewSet,
+)
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = APIRequestFactory()
+        date_event = datetime.datetime(2021, 10, 1, 18, 0, 0, tzinfo=pytz.utc)
+        for i in range(7):
+            created_at = datetime.datetime(2020, 1, 1, i, 0, 0, tzinfo=pytz.utc)
+            with mock.patch(
+                "django.utils.timezone.now", mock.Mock(return_value=created_at)
+            ):
+                event = Event.objects.create(
+                    name=f"Best concert number {i}", date_event=date_event
+                )
+                TicketType.objects.create(
+                    event=event, category="NORMAL", price=199, qty=100
+                )
+
+    def get(self, view, url, **kwargs):
+        response = view(self.factory.get(url), **kwargs)
+        response.render()
+        return json.loads(response.content)
+
+    def get_all_pages(self, view, url, **kwargs):
+        ids = []
+        while url:
+            page = self.get(view, url, **kwargs)
+            ids.extend(item["id"] for item in page["results"])
+            url = page["next"]
+        return ids
+
+    def test_events_pages(self):
+        events_view = EventViewSet.as_view({"get": "list"})
+        ids = self.get_all_pages(events_view, reverse("events-list") + "?page_size=3")
+
+        self.assertEqual(
+            ids, list(Event.objects.order_by("created_at").values_list("id", flat=True))
+        )
+
+    def test_ticket_types_pages(self):
+        ticket_types_view = TicketTypeViewSet.as_view({"get": "list"})
+        ids = self.get_all_pages(
+            ticket_types_view, reverse("ticket-types-list") + "?page_size=2"
+        )
+
+        self.assertEqual(
+            ids,
+            list(
+                TicketType.objects.order_by("created_at").values_list("id", flat=True)
+            ),
+        )
+
+    def test_ticket_types_of_event_pages(self):
+        event = Event.objects.first()
+        TicketType.objects.create(event=event, category="VIP", price=999, qty=10)
+        ticket_types_view = TicketTypeListView.as_view()
+        url = reverse("tickets-type-for-event-list", args=(event.pk,))
+
+        ids = self.get_all_pages(
+            ticket_types_view, url + "?page_size=1", event_id=event.pk
+        )
+
+        self.assertEqual(len(ids), 2)
+
+    def test_orders_pages(self):
+        ticket_type = TicketType.objects.first()
+        for _ in range(5):
+            reservations.create_order([{"ticket_type": ticket_type, "quantity": 1}])
+        orders_view = OrderListView.as_view()
+
+        ids = self.get_all_pages(orders_view, reverse("order-list") + "?page_size=2")
+
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_next_page_is_keyset_query(self):
+        events_view = EventViewSet.as_view({"get": "list"})
+        first = self.get(events_view, reverse("events-list") + "?page_size=3")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get(events_view, first["next"])
+
+        sql = queries[0]["sql"]
+        self.assertIn('"created_at" >', sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_unpaginated_opt_in(self):
+        events_view = EventViewSet.as_view({"get": "list"})
+        events = self.get(events_view, reverse("events-list") + "?unpaginated")
+
+        self.assertIsInstance(events, list)
+        self.assertEqual(len(events), 7)
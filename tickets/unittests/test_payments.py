@@ -0,0 +1,111 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import expiry, reservations
+from tickets.models import Order, Ticket, TicketType
+from tickets.views import PaymentView
+
+
+class PaymentViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.ticket_type = TicketType.objects.get(pk=3)
+
+    def make_orders(self, count, quantity=2):
+        return reservations.create_orders(
+            [[{"ticket_type": self.ticket_type, "quantity": quantity}]] * count
+        )
+
+    def pay(self, data):
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-payments"), json.dumps(data), content_type="application/json"
+        )
+        response = PaymentView.as_view()(request)
+        response.render()
+        return response
+
+    def test_pay_order(self):
+        order, other = self.make_orders(2)
+
+        response = self.pay({"orders": [order.pk]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(response.content),
+            {"paid": [order.pk], "already_paid": [], "expired": [], "not_found": []},
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.paid, Order.PAID)
+        self.assertIsNotNone(order.paid_date)
+        self.assertEqual(
+            set(order.tickets.values_list("status", flat=True)), {Ticket.SOLD}
+        )
+        self.assertEqual(
+            set(other.tickets.values_list("status", flat=True)), {Ticket.RESERVED}
+        )
+
+    def test_orders_which_can_not_be_paid(self):
+        paid, late, released, unpaid = self.make_orders(4)
+        self.pay({"orders": [paid.pk]})
+        Order.objects.filter(pk=late.pk).update(expired_at=now() - timedelta(seconds=1))
+        Order.objects.filter(pk=released.pk).update(paid=Order.EXPIRED)
+
+        response = self.pay({"orders": [paid.pk, late.pk, released.pk, unpaid.pk, 88]})
+
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "paid": [unpaid.pk],
+                "already_paid": [paid.pk],
+                "expired": [late.pk, released.pk],
+                "not_found": [88],
+            },
+        )
+        self.assertEqual(Ticket.objects.filter(status=Ticket.SOLD).count(), 4)
+        self.assertEqual(Order.objects.get(pk=late.pk).paid, Order.UNPAID)
+
+    def test_batch_is_paid_with_constant_number_of_queries(self):
+        orders = self.make_orders(1000)
+
+        # savepoint, lock of orders, two UPDATEs, sold tickets by ticket type,
+        # sales summary, release of savepoint
+        with self.assertNumQueries(7):
+            response = self.pay({"orders": [order.pk for order in orders]})
+
+        self.assertEqual(len(json.loads(response.content)["paid"]), 1000)
+        self.assertEqual(Order.objects.filter(paid=Order.PAID).count(), 1000)
+        self.assertEqual(Ticket.objects.filter(status=Ticket.SOLD).count(), 2000)
+        self.assertEqual(TicketType.objects.get(pk=3).sold, 2000)
+
+    def test_paid_orders_are_not_released(self):
+        (order,) = self.make_orders(1)
+        self.pay({"orders": [order.pk]})
+
+        released, _ = expiry.release_expired(100, until=now() + timedelta(days=1))
+
+        self.assertEqual(released, 0)
+        self.assertEqual(TicketType.objects.get(pk=3).sold, 2)
+
+    def test_invalid_request(self):
+        for data in ({"orders": []}, {"orders": ["x"]}, {}, [1]):
+            response = self.pay(data)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TICKETS_PAYMENT_BATCH_MAX=2)
+    def test_too_many_orders(self):
+        response = self.pay({"orders": [1, 2, 3]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
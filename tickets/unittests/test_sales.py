@@ -0,0 +1,190 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import localdate, now
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import expiry, inventory, payments, reservations, sales
+from tickets.models import Order, SalesSummary, TicketType
+from tickets.views import SalesSummaryView
+
+
+class SalesSummaryTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def order(self, *lines):
+        cart = [
+            {"ticket_type": TicketType.objects.get(pk=pk), "quantity": quantity}
+            for pk, quantity in lines
+        ]
+        return reservations.create_order(cart)
+
+    def totals(self, date=None):
+        return {
+            row["ticket_type"]: (
+                row["reserved"],
+                row["sold"],
+                row["released"],
+                row["revenue"],
+            )
+            for row in sales.summary(date or localdate())
+        }
+
+    def test_reservation_payment_and_expiry_are_summed(self):
+        paid = self.order((1, 2), (2, 3))
+        expired = self.order((1, 1))
+        self.order((4, 5))
+        payments.confirm([paid.pk])
+        Order.objects.filter(pk=expired.pk).update(expired_at=now())
+        expiry.release_expired(100)
+
+        self.assertEqual(
+            self.totals(),
+            {
+                1: (3, 2, 1, Decimal("1999.98")),
+                2: (3, 3, 0, Decimal("1499.97")),
+                4: (5, 0, 0, Decimal("0")),
+            },
+        )
+
+    def test_batch_of_orders(self):
+        ticket_type = TicketType.objects.get(pk=3)
+        reservations.create_orders([[{"ticket_type": ticket_type, "quantity": 2}]] * 5)
+
+        self.assertEqual(self.totals(), {3: (10, 0, 0, Decimal("0"))})
+
+    def test_striped_ticket_type_is_spread_over_slots(self):
+        inventory.stripe(3, 4)
+        for _ in range(20):
+            self.order((3, 1))
+
+        self.assertGreater(SalesSummary.objects.filter(ticket_type=3).count(), 1)
+        self.assertEqual(self.totals(), {3: (20, 0, 0, Decimal("0"))})
+
+    def test_rebuild_gives_the_same_summary(self):
+        paid = self.order((1, 2), (3, 1))
+        expired = self.order((2, 4))
+        self.order((1, 1))
+        payments.confirm([paid.pk])
+        Order.objects.filter(pk=expired.pk).update(expired_at=now())
+        expiry.release_expired(100)
+        inventory.stripe(3, 4)
+        for _ in range(10):
+            self.order((3, 1))
+        before = self.totals()
+
+        out = StringIO()
+        call_command("rebuild_sales_summary", stdout=out)
+
+        self.assertEqual(self.totals(), before)
+        self.assertIn("3 ticket type days", out.getvalue())
+
+    def test_days_are_kept_apart(self):
+        order = self.order((1, 1))
+        Order.objects.filter(pk=order.pk).update(
+            created_at=order.created_at - timedelta(days=1)
+        )
+        self.order((1, 2))
+
+        sales.rebuild()
+
+        yesterday = localdate() - timedelta(days=1)
+        self.assertEqual(self.totals(yesterday), {1: (1, 0, 0, Decimal("0"))})
+        self.assertEqual(self.totals(), {1: (2, 0, 0, Decimal("0"))})
+
+
+class SalesSummaryViewTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        carts = [
+            [(1, 2), (2, 1)],
+            [(4, 3)],
+            [(1, 1)],
+        ]
+        orders = [
+            reservations.create_order(
+                [
+                    {"ticket_type": TicketType.objects.get(pk=pk), "quantity": quantity}
+                    for pk, quantity in cart
+                ]
+            )
+            for cart in carts
+        ]
+        payments.confirm([orders[0].pk, orders[1].pk])
+
+    def get(self, query=""):
+        factory = APIRequestFactory()
+        response = SalesSummaryView.as_view()(
+            factory.get(reverse("sales-summary") + query)
+        )
+        response.render()
+        return response
+
+    def test_summary_of_today(self):
+        with self.assertNumQueries(1):
+            response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(data["date"], str(localdate()))
+        self.assertEqual(
+            data["events"],
+            [
+                {
+                    "reserved": 4,
+                    "sold": 3,
+                    "released": 0,
+                    "revenue": "2499.97",
+                    "event": 2,
+                },
+                {
+                    "reserved": 3,
+                    "sold": 3,
+                    "released": 0,
+                    "revenue": "599.97",
+                    "event": 3,
+                },
+            ],
+        )
+        self.assertEqual(
+            data["ticket_types"][0],
+            {
+                "reserved": 3,
+                "sold": 2,
+                "released": 0,
+                "revenue": "1999.98",
+                "event": 2,
+                "ticket_type": 1,
+            },
+        )
+
+    def test_summary_of_event(self):
+        data = json.loads(self.get("?event=3").content)
+
+        self.assertEqual([row["ticket_type"] for row in data["ticket_types"]], [4])
+
+    def test_summary_of_other_day(self):
+        data = json.loads(self.get("?date=2020-01-01").content)
+
+        self.assertEqual(data, {"date": "2020-01-01", "events": [], "ticket_types": []})
+
+    def test_invalid_parameters(self):
+        for query in ("?date=2020-13-01", "?date=today", "?event=x"):
+            response = self.get(query)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from tickets import cache, streams
+from tickets.models import TicketType
+from tickets.pubsub import InProcessPubSub, pubsub
+
+
+def parse(message):
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+@override_settings(TICKETS_STREAM_INTERVAL=0)
+class AvailabilityStreamTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    async def sell(self, ticket_type_id, sold):
+        await TicketType.objects.filter(pk=ticket_type_id).aupdate(sold=sold)
+        pubsub.publish([2])
+
+    async def test_stream_response(self):
+        response = await self.async_client.get(
+            reverse("async-event-availability-stream", args=(2,))
+        )
+        content = response.streaming_content
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["content-type"], "text/event-stream")
+        self.assertEqual(response["cache-control"], "no-cache")
+        self.assertEqual(
+            parse((await anext(content)).decode()),
+            ("snapshot", {"1": 300, "2": 1000, "3": 20000}),
+        )
+        await content.aclose()
+
+    async def test_stream_of_non_existing_event(self):
+        response = await self.async_client.get(
+            reverse("async-event-availability-stream", args=(88,))
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_changes_are_sent_as_deltas(self):
+        events = streams.availability_events(2)
+        await anext(events)
+
+        await self.sell(1, 5)
+        first = parse(await anext(events))
+        await self.sell(3, 7)
+        second = parse(await anext(events))
+        await events.aclose()
+
+        self.assertEqual(first, ("delta", {"1": 295}))
+        self.assertEqual(second, ("delta", {"3": 19993}))
+
+    async def test_changes_of_slow_client_are_coalesced(self):
+        events = streams.availability_events(2)
+        await anext(events)
+
+        for sold in (1, 2, 3):
+            await self.sell(1, sold)
+            # the feed reads every change, the client reads none of them
+            await asyncio.sleep(0.05)
+        await self.sell(2, 10)
+        await asyncio.sleep(0.05)
+        delta = parse(await anext(events))
+        await events.aclose()
+
+        self.assertEqual(delta, ("delta", {"1": 297, "2": 990}))
+
+    async def test_streams_of_event_share_feed(self):
+        first = streams.availability_events(2)
+        second = streams.availability_events(2)
+        await anext(first)
+        await anext(second)
+
+        self.assertEqual(len(streams._feeds[2].clients), 2)
+        await first.aclose()
+        self.assertIn(2, streams._feeds)
+        await second.aclose()
+        self.assertNotIn(2, streams._feeds)
+        self.assertNotIn(2, pubsub.subscribers)
+
+    @override_settings(TICKETS_STREAM_KEEPALIVE=0.01)
+    async def test_idle_stream_gets_keepalive(self):
+        events = streams.availability_events(2)
+        await anext(events)
+
+        message = await anext(events)
+        await events.aclose()
+
+        self.assertEqual(message, ": keepalive\n\n")
+
+    @override_settings(TICKETS_STREAM_KEEPALIVE=0.01)
+    async def test_changes_not_published_are_read_when_idle(self):
+        events = streams.availability_events(2)
+        await anext(events)
+
+        await TicketType.objects.filter(pk=1).aupdate(sold=4)
+        for _ in range(20):
+            message = await anext(events)
+            if message.startswith("event"):
+                break
+        await events.aclose()
+
+        self.assertEqual(parse(message), ("delta", {"1": 296}))
+
+    async def test_stream_ends_when_first_read_fails(self):
+        events = streams.availability_events(2)
+
+        with mock.patch.object(
+            streams.inventory, "event_available", side_effect=DatabaseError
+        ), self.assertLogs("tickets.streams", "ERROR"):
+            with self.assertRaises(StopAsyncIteration):
+                await asyncio.wait_for(anext(events), 5)
+
+        self.assertNotIn(2, streams._feeds)
+        self.assertNotIn(2, pubsub.subscribers)
+        events = streams.availability_events(2)
+        self.assertEqual(parse(await anext(events))[0], "snapshot")
+        await events.aclose()
+
+    async def test_stream_ends_when_read_of_change_fails(self):
+        events = streams.availability_events(2)
+        await anext(events)
+
+        with mock.patch.object(
+            streams.inventory, "event_available", side_effect=DatabaseError
+        ), self.assertLogs("tickets.streams", "ERROR"):
+            pubsub.publish([2])
+            with self.assertRaises(StopAsyncIteration):
+                await asyncio.wait_for(anext(events), 5)
+
+        self.assertNotIn(2, streams._feeds)
+
+
+class PubSubTest(TestCase):
+    def test_change_is_published_after_commit(self):
+        published = []
+        unsubscribe = pubsub.subscribe(2, published.append)
+        self.addCleanup(unsubscribe)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache.availability_changed([2, 3])
+            self.assertEqual(published, [])
+
+        self.assertEqual(published, [2])
+
+    def test_unsubscribe(self):
+        broker = InProcessPubSub()
+        published = []
+        unsubscribe = broker.subscribe(1, published.append)
+
+        unsubscribe()
+        broker.publish([1])
+
+        self.assertEqual(published, [])
+        self.assertEqual(broker.subscribers, {})
@@ -93,10 +93,12 @@ class TicketTypeModelTest(TestCase):
         ticket_type.save()
         ticket_type.full_clean()
         ticket_type.refresh_from_db()
-        mock_query_set = mock.MagicMock()
-        with mock.patch("tickets.models.TicketType.tickets", mock_query_set):
-            mock_query_set.count.return_value = 100
+        with mock.patch(
+            "tickets.models.TicketType.tickets", mock.MagicMock()
+        ) as mock_query_set:
+            ticket_type.sold = 100
             self.assertEqual(ticket_type.tickets_available, 400)
+            mock_query_set.count.assert_not_called()
 
 
 class TicketSerializerTest(TestCase):
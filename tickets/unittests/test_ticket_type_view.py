@@ -11,6 +11,10 @@ from tickets.serializers import TicketTypeSerializer
 from tickets.views import TicketTypeListView, TicketTypeViewSet
 
 
+def first_page(results):
+    return {"next": None, "previous": None, "results": results}
+
+
 ### There is only information about get tickets details in documentation, so tests are only for get views.
 class TicketTypeViewsALLTest(TestCase):
 
@@ -27,7 +31,7 @@ class TicketTypeViewsALLTest(TestCase):
         response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(json.loads(response.content), [])
+        self.assertEqual(json.loads(response.content), first_page([]))
         self.assertEqual(response["content-type"], "application/json")
 
     def test_get_all_tickets_type_from_wrong_id_event(self):
@@ -52,11 +56,39 @@ class TicketTypeViewsALLTest(TestCase):
         tickets_type_serialized = TicketTypeSerializer(
             TicketType.objects.filter(event=event_id), many=True
         ).data
-        tickets_type_json = JSONRenderer().render(tickets_type_serialized)
+        tickets_type_json = JSONRenderer().render(first_page(tickets_type_serialized))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.content, tickets_type_json)
         self.assertEqual(response["content-type"], "application/json")
 
+    def test_get_all_tickets_type_from_event_number_of_queries(self):
+        event = Event.objects.get(pk=2)
+        for i in range(20):
+            TicketType.objects.create(
+                event=event, category=f"SECTOR {i}", price=99, qty=100
+            )
+        factory = APIRequestFactory()
+        tickets_type_view = TicketTypeListView.as_view()
+        request = factory.get(reverse("tickets-type-for-event-list", args=(2,)))
+
+        # event and its ticket types
+        with self.assertNumQueries(2):
+            response = tickets_type_view(request, event_id=2)
+            response.render()
+
+        self.assertEqual(len(json.loads(response.content)["results"]), 23)
+
+    def test_get_all_tickets_type_number_of_queries(self):
+        factory = APIRequestFactory()
+        ticket_type_view = TicketTypeViewSet.as_view({"get": "list"})
+        request = factory.get(reverse("ticket-types-list"))
+
+        with self.assertNumQueries(1):
+            response = ticket_type_view(request)
+            response.render()
+
+        self.assertEqual(len(json.loads(response.content)["results"]), 4)
+
 
 class TicketTypeViewsDetailTest(TestCase):
 
@@ -103,7 +135,7 @@ class TicketTypeViewsEmptyDB(TestCase):
         response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(json.loads(response.content), [])
+        self.assertEqual(json.loads(response.content), first_page([]))
         self.assertEqual(response["content-type"], "application/json")
 
 
@@ -124,7 +156,9 @@ class TicketTypeViewsWithTickets(TestCase):
         self.assertEqual(
             response.content,
             JSONRenderer().render(
-                TicketTypeSerializer(TicketType.objects.all(), many=True).data
+                first_page(
+                    TicketTypeSerializer(TicketType.objects.all(), many=True).data
+                )
             ),
         )
         self.assertEqual(response["content-type"], "application/json")
@@ -145,7 +179,7 @@ class TicketTypeViewsFilters(TestCase):
         response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(json.loads(response.content), []),
+        self.assertEqual(json.loads(response.content), first_page([])),
         self.assertEqual(response["content-type"], "application/json")
 
     def test_get_tickets_from_event_with_tickets(self):
@@ -162,7 +196,7 @@ class TicketTypeViewsFilters(TestCase):
         self.assertEqual(
             response.content,
             JSONRenderer().render(
-                TicketTypeSerializer(event.ticket_types, many=True).data
+                first_page(TicketTypeSerializer(event.ticket_types, many=True).data)
             ),
         ),
         self.assertEqual(response["content-type"], "application/json")
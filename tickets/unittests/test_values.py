@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+from tickets import inventory, payments, renderers, reservations
+from tickets.models import Event, Order, TicketType
+from tickets.renderers import FastJSONRenderer
+from tickets.serializers import EventSerializer, OrderSerializer, TicketTypeSerializer
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class ValuesPayloadTest(TestCase):
+    """
+    Payloads built from .values() rows are rendered to the same bytes as data of
+    the serializers.
+    """
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        self.event = Event.objects.create(
+            name='Koncert Żółtej \u2028 Łodzi "live"',
+            date_event=now() + timedelta(days=30, microseconds=123456),
+        )
+        TicketType.objects.create(
+            event=self.event, category="Parter \u2029", price=Decimal("100"), qty=10
+        )
+        inventory.stripe(3, 4)
+        paid = reservations.create_order(
+            [{"ticket_type": TicketType.objects.get(pk=3), "quantity": 3}]
+        )
+        reservations.create_order(
+            [{"ticket_type": TicketType.objects.get(pk=1), "quantity": 1}]
+        )
+        payments.confirm([paid.pk])
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+
+    def get(self, name, args=(), query=""):
+        response = self.client.get(reverse(name, args=args) + query)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_events(self):
+        events = Event.objects.prefetch_related("ticket_types")
+
+        for nested in (False, True):
+            query = "?unpaginated&tickets" if nested else "?unpaginated"
+
+            self.assertEqual(
+                self.get("events-list", query=query),
+                render(EventSerializer(events, many=True, nested=nested).data),
+            )
+
+    def test_event(self):
+        event = Event.objects.get(pk=2)
+
+        self.assertEqual(
+            self.get("events-detail", (2,), "?tickets"),
+            render(EventSerializer(event, nested=True).data),
+        )
+        self.assertEqual(
+            self.get("events-detail", (2,)), render(EventSerializer(event).data)
+        )
+
+    def test_pages_of_events(self):
+        events = list(Event.objects.order_by("created_at", "id"))
+        url = reverse("events-list") + "?tickets&page_size=1"
+
+        for event in events:
+            response = self.client.get(url).json()
+            self.assertEqual(
+                render(response["results"]),
+                render(EventSerializer([event], many=True, nested=True).data),
+            )
+            url = response["next"]
+        self.assertIsNone(url)
+
+    def test_ticket_types(self):
+        ticket_types = TicketType.objects.filter(event=2).order_by("created_at", "id")
+        expected = render(TicketTypeSerializer(ticket_types, many=True).data)
+
+        self.assertEqual(
+            self.get("tickets-type-for-event-list", (2,), "?unpaginated"), expected
+        )
+        self.assertEqual(
+            self.get("ticket-types-list", query="?unpaginated&event=2"), expected
+        )
+        self.assertEqual(self.get("async-tickets-type-for-event-list", (2,)), expected)
+
+    def test_orders(self):
+        self.assertEqual(
+            self.get("order-list", query="?unpaginated"),
+            render(OrderSerializer(Order.objects.all(), many=True).data),
+        )
+
+    @override_settings(
+        REST_FRAMEWORK={
+            "DATETIME_FORMAT": "iso-8601",
+            "COERCE_DECIMAL_TO_STRING": False,
+            "DEFAULT_RENDERER_CLASSES": ("tickets.renderers.FastJSONRenderer",),
+        }
+    )
+    def test_other_settings_of_drf(self):
+        self.assertEqual(
+            self.get("order-list", query="?unpaginated"),
+            render(OrderSerializer(Order.objects.all(), many=True).data),
+        )
+        self.assertEqual(
+            self.get("events-detail", (self.event.pk,), "?tickets"),
+            render(EventSerializer(self.event, nested=True).data),
+        )
+
+
+class FastJSONRendererTest(TestCase):
+    data = {
+        "price": Decimal("12.50"),
+        "when": now(),
+        "day": now().date(),
+        "text": 'Żółw \u2028\u2029 "\\',
+        "list": [1, 2.5, None, True, ("a", "b")],
+        2: "key which is not a string",
+    }
+
+    def test_same_output_as_json_renderer(self):
+        for data in (self.data, {"detail": "Not found."}, [], None):
+            self.assertEqual(FastJSONRenderer().render(data), render(data))
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.data), render(self.data))
+
+    def test_indent(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=2", {}),
+            JSONRenderer().render(self.data, "application/json; indent=2", {}),
+        )
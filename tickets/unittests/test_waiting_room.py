@@ -0,0 +1,201 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from tickets import waiting_room
+from tickets.models import Event, Order
+from tickets.views import OrderBatchView, OrderListView
+
+
+@override_settings(TICKETS_WAITING_ROOM_BURST=1, TICKETS_WAITING_ROOM_PARK=0)
+class WaitingRoomTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        waiting_room._stores.clear()
+        Event.objects.filter(pk=2).update(admission_rate=2)
+        self.clock = mock.patch("tickets.waiting_room.time").start()
+        self.clock.time.return_value = 1000.0
+        self.addCleanup(mock.patch.stopall)
+
+    def post_cart(self, cart, token=None):
+        factory = APIRequestFactory()
+        headers = {"HTTP_X_ADMISSION_TOKEN": token} if token else {}
+        request = factory.post(
+            reverse("order-list"),
+            json.dumps(cart),
+            content_type="application/json",
+            **headers,
+        )
+        response = OrderListView.as_view()(request)
+        response.render()
+        return response
+
+    def test_checkouts_over_rate_are_queued(self):
+        responses = [
+            self.post_cart([{"ticket_type": 1, "quantity": 1}]) for _ in range(3)
+        ]
+
+        self.assertEqual(responses[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(responses[2]["Retry-After"], "1")
+        data = json.loads(responses[2].content)
+        self.assertEqual(data["position"], 2)
+        self.assertEqual(data["retry_after"], 1.0)
+        self.assertEqual(json.loads(responses[1].content)["position"], 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_queued_checkout_is_admitted_with_its_token(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+        token = json.loads(self.post_cart([{"ticket_type": 2, "quantity": 1}]).content)[
+            "token"
+        ]
+
+        self.clock.time.return_value = 1000.2
+        early = self.post_cart([{"ticket_type": 2, "quantity": 1}], token)
+        self.clock.time.return_value = 1000.5
+        response = self.post_cart([{"ticket_type": 2, "quantity": 1}], token)
+
+        self.assertEqual(early.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(json.loads(early.content)["position"], 1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_token_makes_one_order(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+        token = json.loads(self.post_cart([{"ticket_type": 1, "quantity": 1}]).content)[
+            "token"
+        ]
+        self.clock.time.return_value = 1000.5
+        self.post_cart([{"ticket_type": 1, "quantity": 1}], token)
+
+        response = self.post_cart([{"ticket_type": 1, "quantity": 1}], token)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_forged_token_joins_the_queue(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        response = self.post_cart([{"ticket_type": 1, "quantity": 1}], "1:forged")
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotEqual(json.loads(response.content)["token"], "1:forged")
+
+    @override_settings(TICKETS_WAITING_ROOM_ADMISSION_WINDOW=60)
+    def test_missed_slot_goes_to_the_end(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+        token = json.loads(self.post_cart([{"ticket_type": 1, "quantity": 1}]).content)[
+            "token"
+        ]
+        self.clock.time.return_value = 1100.0
+        self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        response = self.post_cart([{"ticket_type": 1, "quantity": 1}], token)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(json.loads(response.content)["position"], 1)
+
+    def test_events_without_rate_are_not_gated(self):
+        for _ in range(3):
+            response = self.post_cart([{"ticket_type": 4, "quantity": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(TICKETS_WAITING_ROOM_RATE=1)
+    def test_default_rate_and_disabled_event(self):
+        Event.objects.filter(pk=2).update(admission_rate=0)
+        self.post_cart([{"ticket_type": 4, "quantity": 1}])
+
+        gated = self.post_cart([{"ticket_type": 4, "quantity": 1}])
+        open_event = self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        self.assertEqual(gated.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(open_event.status_code, status.HTTP_201_CREATED)
+
+    def test_invalid_cart_does_not_join_the_queue(self):
+        self.post_cart([{"ticket_type": 1, "quantity": 100000}])
+
+        response = self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_batch_does_not_take_carts_of_gated_events(self):
+        carts = [
+            [{"ticket_type": 4, "quantity": 1}],
+            [{"ticket_type": 1, "quantity": 1}],
+            [{"ticket_type": 4, "quantity": 1}, {"ticket_type": 3, "quantity": 1}],
+        ]
+        factory = APIRequestFactory()
+        request = factory.post(
+            reverse("order-batch"), json.dumps(carts), content_type="application/json"
+        )
+
+        response = OrderBatchView.as_view()(request)
+
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+        self.assertEqual(
+            response.data[1]["errors"]["detail"], waiting_room.BATCH_DETAIL
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_admission_rate_command(self):
+        call_command("admission_rate", 3, 50, stdout=StringIO())
+        call_command("admission_rate", 2, stdout=StringIO())
+
+        self.assertEqual(Event.objects.get(pk=3).admission_rate, 50)
+        self.assertIsNone(Event.objects.get(pk=2).admission_rate)
+
+
+@override_settings(TICKETS_WAITING_ROOM_BURST=1)
+class AsyncWaitingRoomTest(TestCase):
+
+    fixtures = [
+        "tickets/unittests/fixtures/events.json",
+        "tickets/unittests/fixtures/two_events_four_tickets.json",
+    ]
+
+    def setUp(self) -> None:
+        waiting_room._stores.clear()
+        Event.objects.filter(pk=2).update(admission_rate=20)
+
+    async def post_cart(self, cart):
+        return await self.async_client.post(
+            reverse("async-order-list"),
+            json.dumps(cart),
+            content_type="application/json",
+        )
+
+    async def test_short_wait_is_parked(self):
+        for _ in range(2):
+            response = await self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(await Order.objects.acount(), 2)
+
+    @override_settings(TICKETS_WAITING_ROOM_PARK=0)
+    async def test_long_wait_is_queued(self):
+        await self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        response = await self.post_cart([{"ticket_type": 1, "quantity": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(json.loads(response.content)["position"], 1)
@@ -1,11 +1,19 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from tickets import async_views
 from tickets.views import (
     EventViewSet,
+    InventoryImportView,
+    OrderBatchView,
     OrderListView,
+    PaymentView,
+    SalesSummaryView,
     TicketTypeListView,
     TicketTypeViewSet,
+    event_availability_view,
+    event_export_view,
+    metrics_view,
 )
 
 router = routers.DefaultRouter()
@@ -20,5 +28,32 @@ urlpatterns = [
         TicketTypeListView.as_view(),
         name="tickets-type-for-event-list",
     ),
+    path(
+        "events/<int:event_id>/availability/",
+        event_availability_view,
+        name="event-availability",
+    ),
+    path(
+        "events/<int:event_id>/export/",
+        event_export_view,
+        name="event-export",
+    ),
+    path("inventory/import/", InventoryImportView.as_view(), name="inventory-import"),
     path("orders/", OrderListView.as_view(), name="order-list"),
+    path("orders/batch/", OrderBatchView.as_view(), name="order-batch"),
+    path("orders/payments/", PaymentView.as_view(), name="order-payments"),
+    path("sales/", SalesSummaryView.as_view(), name="sales-summary"),
+    path("metrics", metrics_view, name="metrics"),
+    # async variants served natively under ASGI
+    path(
+        "async/events/<int:event_id>/tickets/",
+        async_views.ticket_types_list,
+        name="async-tickets-type-for-event-list",
+    ),
+    path("async/orders/", async_views.order_create, name="async-order-list"),
+    path(
+        "async/events/<int:event_id>/availability/stream/",
+        async_views.availability_stream,
+        name="async-event-availability-stream",
+    ),
 ]
@@ -0,0 +1,119 @@
+"""
+Payloads of events, ticket types and orders built from .values() rows.
+
+They are the same as data of EventSerializer, TicketTypeSerializer and
+OrderSerializer, with DATETIME_FORMAT and COERCE_DECIMAL_TO_STRING of DRF, but
+skip model instances and per-field serializer calls, and hold only types the JSON
+encoder writes without calling back to Python. Rows keep "created_at" for the
+cursor pagination, payloads don't have it unless the serializer has it.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.timezone import get_current_timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from . import inventory
+from .models import TicketType
+
+CENT = Decimal("0.01")
+
+
+def _datetime():
+    """
+    Function formatting datetimes as DateTimeField of DRF.
+    """
+    output_format = api_settings.DATETIME_FORMAT
+    if (
+        output_format is None
+        or output_format.lower() == ISO_8601
+        or not settings.USE_TZ
+    ):
+        return serializers.DateTimeField().to_representation
+    timezone = get_current_timezone()
+
+    def to_representation(value):
+        return value.astimezone(timezone).strftime(output_format) if value else None
+
+    return to_representation
+
+
+def _decimal():
+    """
+    Function formatting decimals with 2 decimal places as DecimalField of DRF.
+    """
+    if api_settings.COERCE_DECIMAL_TO_STRING:
+        return lambda value: f"{value.quantize(CENT):f}"
+    # rendered as float by the encoder of DRF
+    return lambda value: float(value.quantize(CENT))
+
+
+def event_rows(queryset):
+    return queryset.values("id", "name", "date_event", "created_at")
+
+
+def events(rows, nested):
+    """
+    Payloads of event rows, with their ticket types read by one query when nested.
+    """
+    date = _datetime()
+    payloads = [
+        {"id": row["id"], "name": row["name"], "date_event": date(row["date_event"])}
+        for row in rows
+    ]
+    if nested:
+        by_event = {payload["id"]: [] for payload in payloads}
+        # the same query and order of rows as prefetch_related("ticket_types")
+        rows = ticket_type_rows(TicketType.objects.filter(event__in=list(by_event)))
+        for ticket_type in ticket_types(rows):
+            by_event[ticket_type["event"]].append(ticket_type)
+        for payload in payloads:
+            payload["ticket_types"] = by_event[payload["id"]]
+    return payloads
+
+
+def ticket_type_rows(queryset):
+    if "available" not in queryset.query.annotations:
+        queryset = queryset.annotate(available=inventory.available())
+    return queryset.values(
+        "id", "event", "category", "price", "qty", "available", "created_at"
+    )
+
+
+def ticket_types(rows):
+    # price is not coerced to string by TicketTypeSerializer
+    return [
+        {
+            "id": row["id"],
+            "event": row["event"],
+            "category": row["category"],
+            "price": float(row["price"].quantize(CENT)),
+            "qty": row["qty"],
+            "tickets_available": row["available"],
+        }
+        for row in rows
+    ]
+
+
+def order_rows(queryset):
+    return queryset.values(
+        "id", "total", "paid", "paid_date", "created_at", "expired_at"
+    )
+
+
+def orders(rows):
+    date = _datetime()
+    decimal = _decimal()
+    return [
+        {
+            "id": row["id"],
+            "total": decimal(row["total"]),
+            "paid": row["paid"],
+            "paid_date": date(row["paid_date"]),
+            "created_at": date(row["created_at"]),
+            "expired_at": date(row["expired_at"]),
+        }
+        for row in rows
+    ]
@@ -1,42 +1,168 @@
-from django.db import transaction
-from django.http import Http404
-from django.shortcuts import get_object_or_404
+import csv
+import hashlib
+import json
+
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags, urlencode
+from django.utils.timezone import localdate
+from django.views.decorators.http import require_GET
 from rest_framework import status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Event, Order, Ticket, TicketType
+from . import (
+    backends,
+    cache,
+    export,
+    idempotency,
+    imports,
+    inventory,
+    metrics,
+    payments,
+    reservations,
+    sales,
+    values,
+    waiting_room,
+)
+from .models import Event, Order, TicketType
+from .pagination import paginated_data
 from .serializers import (
     CartSerializer,
+    EventSalesSerializer,
     EventSerializer,
     OrderSerializer,
+    PaymentSerializer,
     TicketSerializer,
+    TicketTypeSalesSerializer,
     TicketTypeSerializer,
+    cart_ticket_type_ids,
 )
 
 
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    # the only query parameters of the list, cached pages are kept by them
+    list_query_params = ("cursor", "page_size", "tickets", "unpaginated")
 
     def list(self, request):
-        queryset = Event.objects.all()
         if request.GET.get("tickets", None) is not None:
             nested_tickets = True
         else:
             nested_tickets = False
-        serializer = EventSerializer(queryset, many=True, nested=nested_tickets)
-        return Response(serializer.data)
+
+        params = [
+            (name, request.GET[name])
+            for name in self.list_query_params
+            if name in request.GET
+        ]
+        url = request.build_absolute_uri(request.path)
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        def serialize():
+            # one query for ticket types of all events of the page, availability
+            # is read from the counters, so there is no query per event
+            return paginated_data(
+                request,
+                values.event_rows(Event.objects.all()),
+                lambda rows: values.events(rows, nested_tickets),
+                view=self,
+                base_url=url,
+            )
+
+        return Response(cache.event_list(nested_tickets, url, serialize))
 
     def retrieve(self, request, pk=None):
-        queryset = Event.objects.all()
         if request.GET.get("tickets", None) is not None:
             nested_tickets = True
         else:
             nested_tickets = False
-        event = get_object_or_404(queryset, pk=pk)
-        serializer = EventSerializer(event, nested=nested_tickets)
-        return Response(serializer.data)
+
+        # cache key needs the same id for "1" and "01"
+        try:
+            event_id = int(pk)
+        except ValueError:
+            raise Http404
+
+        def serialize():
+            rows = values.event_rows(Event.objects.filter(pk=event_id))
+            payloads = values.events(rows, nested_tickets)
+            if not payloads:
+                raise Http404
+            return payloads[0]
+
+        return Response(cache.event_detail(event_id, nested_tickets, serialize))
+
+
+@require_GET
+def event_availability_view(request, event_id):
+    """
+    Available tickets of ticket types of the event, for storefronts polling it.
+    """
+
+    def build():
+        available = inventory.event_available(event_id)
+        if not available and not Event.objects.filter(pk=event_id).exists():
+            return None
+        content = json.dumps(available, separators=(",", ":"))
+        return {"content": content, "etag": hashlib.md5(content.encode()).hexdigest()}
+
+    payload = cache.event_availability(event_id, build)
+    if payload is None:
+        raise Http404
+    etag = f'"{payload["etag"]}"'
+    # unchanged availability is answered without a body
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload["content"], content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@require_GET
+def event_export_view(request, event_id):
+    """
+    Tickets of the event with their orders as CSV or NDJSON, ?format=csv|ndjson,
+    orders made from ?since up to ?until, streamed while they are read.
+    """
+    if not Event.objects.filter(pk=event_id).exists():
+        raise Http404
+
+    errors = {}
+    format = request.GET.get("format", "csv")
+    if format not in export.FORMATS:
+        errors["format"] = [f"Expected one of {', '.join(export.FORMATS)}"]
+    bounds = {}
+    for name in ("since", "until"):
+        if name in request.GET:
+            bounds[name] = export.parse_time(request.GET[name])
+            if bounds[name] is None:
+                errors[name] = ["Expected ISO date or datetime"]
+    if errors:
+        return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        export.lines(format, event_id, **bounds),
+        content_type=(
+            "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+        ),
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="event-{event_id}-tickets.{format}"'
+    )
+    return response
 
 
 # I was thinking about url structure for ticket lists, /events/:event_id/tickets vs /tickets, I chose the first one
@@ -54,9 +180,14 @@ class TicketTypeListView(APIView):
         except Event.DoesNotExist:
             raise Http404
 
-        tickets_type = TicketType.objects.filter(event=event)
-        serializer = TicketTypeSerializer(tickets_type, many=True)
-        return Response(serializer.data)
+        return Response(
+            paginated_data(
+                request,
+                values.ticket_type_rows(TicketType.objects.filter(event=event)),
+                values.ticket_types,
+                view=self,
+            )
+        )
 
     def post(self, request, event_id):
         data = request.data.dict()
@@ -70,35 +201,211 @@ class TicketTypeListView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class InventoryImportView(APIView):
+    """
+    Create events and ticket types of a JSON list or CSV file of rows at once.
+    """
+
+    def post(self, request):
+        if request.content_type.startswith("text/csv"):
+            try:
+                rows = imports.read_csv(request.body.decode())
+            except (UnicodeDecodeError, csv.Error):
+                return Response(
+                    {"detail": "Expected UTF-8 CSV with a header"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"detail": "Expected a non-empty list of rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(rows) > settings.TICKETS_IMPORT_MAX_ROWS:
+            return Response(
+                {"detail": f"At most {settings.TICKETS_IMPORT_MAX_ROWS} rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created, errors = imports.load(rows)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(created, status=status.HTTP_201_CREATED)
+
+
 class TicketTypeViewSet(viewsets.ModelViewSet):
-    queryset = TicketType.objects.all()
+    queryset = TicketType.objects.annotate(available=inventory.available())
     serializer_class = TicketTypeSerializer
     filterset_fields = ("event",)
 
+    def list(self, request, *args, **kwargs):
+        rows = values.ticket_type_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(values.ticket_types(rows))
+        return self.get_paginated_response(values.ticket_types(page))
+
 
 class OrderListView(APIView):
     """
-    create a new order.
+    List orders, or create a new order.
     """
 
+    def get(self, request):
+        return Response(
+            paginated_data(
+                request,
+                values.order_rows(Order.objects.all()),
+                values.orders,
+                view=self,
+            )
+        )
+
     def post(self, request):
+        key = request.headers.get(idempotency.HEADER)
+        if not key:
+            data, status_code = self.create_order(request)
+            return Response(data, status=status_code)
+
+        # retries of a request with the key get its response, not another order
+        data, status_code, replayed = idempotency.run(
+            key, request.data, lambda: self.create_order(request)
+        )
+        response = Response(data, status=status_code)
+        if replayed:
+            response["Idempotent-Replayed"] = "true"
+        return response
+
+    def create_order(self, request):
         cart = CartSerializer(data=request.data, many=True)
         # if cart is correct, create order, tickets and count total sum for order
         if cart.is_valid(raise_exception=True) and len(cart.validated_data):
-            # make order and reserve tickets in transaction
-            with transaction.atomic():
-                order = Order()
-                order.save()
-                for item in cart.validated_data:
-                    for _ in range(item["quantity"]):
-                        order.total += item["ticket_type"].price
-                        ticket = Ticket(type=item["ticket_type"], order=order)
-                        ticket.save()
-                order.save()
-                order_serializer = OrderSerializer(instance=order)
-                return Response(order_serializer.data, status=status.HTTP_201_CREATED)
+            # under a spike checkouts are let in at the admission rate of events
+            waiting_room.check(
+                cart.validated_data, request.headers.get(waiting_room.TOKEN_HEADER)
+            )
+            # reserve tickets in the database or in the reservation store
+            order = backends.get_backend().create_order(cart.validated_data)
+            return OrderSerializer(instance=order).data, status.HTTP_201_CREATED
         else:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
+            return None, status.HTTP_400_BAD_REQUEST
+
+
+class OrderBatchView(APIView):
+    """
+    Create many independent orders, one for every cart of the list.
+    """
+
+    def post(self, request):
+        carts = request.data
+        if not isinstance(carts, list) or not carts:
+            return Response(
+                {"detail": "Expected a non-empty list of carts"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(carts) > settings.TICKETS_ORDER_BATCH_MAX:
+            return Response(
+                {"detail": f"At most {settings.TICKETS_ORDER_BATCH_MAX} carts"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # ticket types of all carts are loaded with one query
+        ticket_types = (
+            TicketType.objects.select_related("event")
+            .annotate(available=inventory.available())
+            .in_bulk(
+                set().union(
+                    *(
+                        cart_ticket_type_ids(data)
+                        for data in carts
+                        if isinstance(data, list)
+                    )
+                )
+            )
+        )
+        results = [None] * len(carts)
+        valid = []
+        for i, data in enumerate(carts):
+            cart = CartSerializer(
+                data=data, many=True, context={"ticket_types": ticket_types}
+            )
+            if not cart.is_valid() or not len(cart.validated_data):
+                results[i] = {
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": cart.errors or ["Empty cart"],
+                }
+            elif waiting_room.event_rates(cart.validated_data):
+                # a batch would take many checkouts past the waiting room at once
+                results[i] = {
+                    "status": status.HTTP_429_TOO_MANY_REQUESTS,
+                    "errors": {"detail": waiting_room.BATCH_DETAIL},
+                }
+            else:
+                valid.append((i, cart.validated_data))
+
+        # the database backend reserves all valid carts in one transaction
+        orders = backends.get_backend().create_orders([cart for _, cart in valid])
+        for (i, _), order in zip(valid, orders):
+            if order is None:
+                results[i] = {
+                    "status": status.HTTP_409_CONFLICT,
+                    "errors": {"detail": reservations.SoldOut.default_detail},
+                }
+            else:
+                results[i] = {
+                    "status": status.HTTP_201_CREATED,
+                    "order": OrderSerializer(instance=order).data,
+                }
+        return Response(results)
+
+
+class PaymentView(APIView):
+    """
+    Confirm payment of one or many orders, their tickets become sold.
+    """
+
+    def post(self, request):
+        serializer = PaymentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(payments.confirm(serializer.validated_data["orders"]))
+
+
+class SalesSummaryView(APIView):
+    """
+    Tickets reserved, sold and released on a day and revenue, by ticket type and
+    event, read from the sales summary. Today by default, ?date=YYYY-MM-DD for
+    another day, ?event=:event_id for a single event.
+    """
+
+    def get(self, request):
+        date = localdate()
+        if "date" in request.query_params:
+            try:
+                date = parse_date(request.query_params["date"])
+            except ValueError:
+                date = None
+            if date is None:
+                raise ValidationError({"date": ["Expected YYYY-MM-DD"]})
+        event_id = request.query_params.get("event")
+        if event_id is not None and not event_id.isdigit():
+            raise ValidationError({"event": ["Expected event id"]})
+
+        ticket_types = list(sales.summary(date, event_id))
+        events = {}
+        for row in ticket_types:
+            totals = events.setdefault(
+                row["event"], {"event": row["event"], **dict.fromkeys(sales.FIELDS, 0)}
+            )
+            for field in sales.FIELDS:
+                totals[field] += row[field]
+        return Response(
+            {
+                "date": date,
+                "events": EventSalesSerializer(events.values(), many=True).data,
+                "ticket_types": TicketTypeSalesSerializer(ticket_types, many=True).data,
+            }
+        )
 
 
 # def create_tickets(request, how_many):
@@ -108,3 +415,10 @@ class OrderListView(APIView):
 #     if ticket_serializer.is_valid():
 #         with transaction.atomic():
 #             ticket_serializer.save()
+
+
+@require_GET
+def metrics_view(request):
+    return HttpResponse(
+        metrics.registry.render(), content_type="text/plain; version=0.0.4"
+    )
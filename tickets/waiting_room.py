@@ -0,0 +1,220 @@
+"""
+Waiting room in front of order creation.
+
+Checkouts of an event with an admission rate are let in at that many orders per
+second, TICKETS_WAITING_ROOM_BURST of them at once after a quiet period, so the
+database keeps its sustainable throughput under a spike instead of slowing down for
+everyone. A checkout without admission joins the queue of every gated event of its
+cart and gets a slot, a time it's let in at. The slots are kept in a signed token,
+the checkout is answered with 429, its position and Retry-After and sends the token
+back in the X-Admission-Token header. A token makes one order, within
+TICKETS_WAITING_ROOM_ADMISSION_WINDOW seconds after its slot.
+
+The store keeps the next free slot of every event and used tokens,
+TICKETS_WAITING_ROOM_STORE is "memory://" for a single process or "redis://..." for
+many.
+"""
+
+import math
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import Throttled
+
+TOKEN_HEADER = "X-Admission-Token"
+TOKEN_SALT = "tickets.waiting_room"
+# carts of gated events are not taken by the batch endpoint
+BATCH_DETAIL = "Event has a waiting room, make the order with POST /orders/."
+
+JOIN_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local slot = now - (tonumber(ARGV[3]) - 1) * interval
+local next_slot = tonumber(redis.call("GET", KEYS[1]))
+if next_slot and next_slot > slot then
+    slot = next_slot
+end
+-- slots of a burst are in the past, an expiry of 0 or less fails the SET
+local ttl = math.max(math.ceil(slot + interval - now) + 60, 1)
+redis.call("SET", KEYS[1], tostring(slot + interval), "EX", ttl)
+return tostring(slot)
+"""
+
+
+class MemoryStore:
+    """
+    In-process store for tests and a single process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_slots = {}
+        self.used = {}
+
+    def join(self, event_id, interval, burst, now):
+        """
+        Take the next free slot of the event, slots are interval seconds apart and
+        up to burst of them may be in the past.
+        """
+        with self.lock:
+            slot = max(self.next_slots.get(event_id, now), now - (burst - 1) * interval)
+            self.next_slots[event_id] = slot + interval
+            return slot
+
+    def use(self, token_id, timeout):
+        """
+        Mark the token as used for timeout seconds, returns False if it already is.
+        """
+        now = time.time()
+        with self.lock:
+            if len(self.used) > 1024:
+                self.used = {
+                    key: expires for key, expires in self.used.items() if expires > now
+                }
+            if self.used.get(token_id, 0) > now:
+                return False
+            self.used[token_id] = now + timeout
+            return True
+
+
+class RedisStore:
+    """
+    Store in Redis shared by all web processes.
+    """
+
+    def __init__(self, url, prefix="tickets:waiting_room:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                "Redis waiting room store requires redis package"
+            )
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.join_script = self.client.register_script(JOIN_SCRIPT)
+
+    def join(self, event_id, interval, burst, now):
+        slot = self.join_script(
+            keys=[f"{self.prefix}next:{event_id}"],
+            args=[repr(now), repr(interval), burst],
+        )
+        return float(slot)
+
+    def use(self, token_id, timeout):
+        return bool(
+            self.client.set(f"{self.prefix}used:{token_id}", 1, nx=True, ex=timeout)
+        )
+
+
+_stores = {}
+
+
+def get_store():
+    url = settings.TICKETS_WAITING_ROOM_STORE
+    if url not in _stores:
+        if url.startswith("memory://"):
+            _stores[url] = MemoryStore()
+        elif url.startswith(("redis://", "rediss://", "unix://")):
+            _stores[url] = RedisStore(url)
+        else:
+            raise ImproperlyConfigured(f"Unknown waiting room store {url}")
+    return _stores[url]
+
+
+class Admission:
+    def __init__(self, token, wait, position):
+        self.token = token
+        self.wait = wait
+        self.position = position
+
+    @property
+    def admitted(self):
+        return self.wait <= 0
+
+
+class Queued(Throttled):
+    default_detail = "Waiting for admission to checkout."
+    default_code = "queued"
+
+    def __init__(self, admission):
+        super().__init__(wait=admission.wait)
+        self.detail = {
+            "detail": self.detail,
+            "position": admission.position,
+            "retry_after": round(admission.wait, 3),
+            "token": admission.token,
+        }
+
+
+def event_rates(cart):
+    """
+    Admission rates of gated events of validated cart by event id, ticket types
+    of the cart come with their events.
+    """
+    rates = {}
+    for item in cart:
+        event = item["ticket_type"].event
+        rate = event.admission_rate
+        if rate is None:
+            rate = settings.TICKETS_WAITING_ROOM_RATE
+        if rate:
+            rates[event.pk] = rate
+    return rates
+
+
+def _load(token):
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+        return {int(pk): slot for pk, slot in data["slots"].items()}, data["id"]
+    except (signing.BadSignature, TypeError, KeyError, ValueError, AttributeError):
+        return {}, uuid4().hex
+
+
+def _join(store, rates, slots, token_id, now):
+    window = settings.TICKETS_WAITING_ROOM_ADMISSION_WINDOW
+    for event_id, rate in rates.items():
+        # a slot not used in time is lost, the checkout goes to the end
+        if event_id not in slots or slots[event_id] + window < now:
+            slots[event_id] = store.join(
+                event_id, 1 / rate, settings.TICKETS_WAITING_ROOM_BURST, now
+            )
+    wait = max(slots[pk] for pk in rates) - now
+    position = max(math.ceil((slots[pk] - now) * rate) for pk, rate in rates.items())
+    token = signing.dumps(
+        {"id": token_id, "slots": {str(pk): slot for pk, slot in slots.items()}},
+        salt=TOKEN_SALT,
+    )
+    return Admission(token, max(wait, 0), max(position, 0))
+
+
+def admit(rates, token=None):
+    """
+    Admit a checkout to events with rates, token is the one of its earlier
+    attempt. A used or forged token joins the queues again.
+    """
+    store = get_store()
+    now = time.time()
+    slots, token_id = _load(token)
+    while True:
+        admission = _join(store, rates, slots, token_id, now)
+        timeout = settings.TICKETS_WAITING_ROOM_ADMISSION_WINDOW + math.ceil(
+            max(slots.values()) - now
+        )
+        if not admission.admitted or store.use(token_id, max(timeout, 1)):
+            return admission
+        slots, token_id = {}, uuid4().hex
+
+
+def check(cart, token=None):
+    """
+    Raise Queued unless checkout of validated cart is admitted.
+    """
+    rates = event_rates(cart)
+    if rates:
+        admission = admit(rates, token)
+        if not admission.admitted:
+            raise Queued(admission)